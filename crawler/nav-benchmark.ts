@@ -0,0 +1,63 @@
+// Navigation benchmark for the build's prefetch hints: open each page, let
+// its hinted prefetches finish, follow the "next" arrow and time the
+// navigation. Compare a normal build against one built with
+// MATHNOTES_PREFETCH_BUDGET=0 (no hints).
+// Usage: npx tsx nav-benchmark.ts <base-url> [--pages 30] [--start /mathnotes/algebra/]
+import { chromium, Page } from 'playwright';
+
+function arg(name: string, fallback: string): string {
+  const i = process.argv.indexOf(`--${name}`);
+  return i > 0 && process.argv[i + 1] ? process.argv[i + 1] : fallback;
+}
+
+async function contentPages(page: Page, base: string, start: string, limit: number): Promise<string[]> {
+  await page.goto(new URL('/sitemap.xml', base).toString());
+  const locs = await page.evaluate(() => Array.from(document.querySelectorAll('loc')).map((l) => l.textContent || ''));
+  return locs
+    .map((loc) => new URL(loc).pathname)
+    .filter((path) => path.startsWith(start) && path.split('/').filter(Boolean).length > 2)
+    .slice(0, limit);
+}
+
+async function timeNextNavigation(page: Page, url: string): Promise<number | null> {
+  await page.goto(url, { waitUntil: 'networkidle' });
+  const next = page.locator('a.nav-next');
+  if ((await next.count()) === 0) return null;
+  const from = new URL(url).pathname;
+  await Promise.all([page.waitForURL((u) => u.pathname !== from, { waitUntil: 'load' }), next.click()]);
+  return page.evaluate(() => {
+    const [nav] = performance.getEntriesByType('navigation') as PerformanceNavigationTiming[];
+    return nav.loadEventEnd - nav.startTime;
+  });
+}
+
+function percentile(sorted: number[], p: number): number {
+  return sorted[Math.min(sorted.length - 1, Math.floor((p / 100) * sorted.length))];
+}
+
+(async () => {
+  const base = process.argv[2] || 'http://web-dev:5000';
+  const limit = parseInt(arg('pages', '30'), 10);
+  const start = arg('start', '/mathnotes/');
+
+  const browser = await chromium.launch();
+  try {
+    const page = await browser.newPage();
+    const urls = await contentPages(page, base, start, limit);
+    const timings: number[] = [];
+    for (const path of urls) {
+      const ms = await timeNextNavigation(page, new URL(path, base).toString());
+      if (ms !== null) {
+        timings.push(ms);
+        console.log(`${ms.toFixed(0).padStart(6)} ms  ${path} -> next`);
+      }
+    }
+    timings.sort((a, b) => a - b);
+    if (timings.length) {
+      console.log(`\n${timings.length} navigations: median ${percentile(timings, 50).toFixed(0)} ms, ` +
+        `p90 ${percentile(timings, 90).toFixed(0)} ms`);
+    }
+  } finally {
+    await browser.close();
+  }
+})();
@@ -84,6 +84,58 @@ const buildOptions = {
   resolveExtensions: ['.tsx', '.ts', '.jsx', '.js', '.css', '.json']
 };
 
+// Demo registry entries in main.ts: 'name': () => import('@demos/path')
+const DEMO_REGISTRY_RE = /'([\w-]+)':\s*\(\)\s*=>\s*import\('@demos\/([^']+)'\)/g;
+
+// Per-demo chunks for the site build's modulepreload lists
+// (mathnotes/demo_bundles.py): each registered demo's chunk plus the shared
+// chunks it statically imports that main.js doesn't already load, and the
+// size of every JS output so the build can report JS bytes per page.
+async function buildDemoManifest(metafile) {
+  const outputs = metafile.outputs;
+  const strip = (key) => key.replace('static/dist/', '');
+
+  const staticImports = (key, seen = new Set()) => {
+    for (const imp of outputs[key].imports) {
+      if (imp.kind === 'import-statement' && !seen.has(imp.path)) {
+        seen.add(imp.path);
+        staticImports(imp.path, seen);
+      }
+    }
+    return seen;
+  };
+  const bundle = (key, loaded) => ({
+    file: strip(key),
+    imports: [...staticImports(key)].filter((p) => !loaded.has(p)).map(strip).sort(),
+  });
+
+  const byEntry = {};
+  for (const [key, value] of Object.entries(outputs)) {
+    if (value.entryPoint && key.endsWith('.js')) {
+      byEntry[value.entryPoint.replace(/\.[jt]sx?$/, '').replace(/\/index$/, '')] = key;
+    }
+  }
+  const mainKey = byEntry['demos-framework/src/main'];
+  const mainLoaded = new Set([mainKey, ...staticImports(mainKey)]);
+
+  const demos = {};
+  const registry = await fs.readFile('demos-framework/src/main.ts', 'utf8');
+  for (const [, name, modulePath] of registry.matchAll(DEMO_REGISTRY_RE)) {
+    const key = byEntry[`demos/${modulePath}`];
+    if (key) {
+      demos[name] = bundle(key, mainLoaded);
+    } else {
+      console.warn(`No chunk for demo "${name}" (@demos/${modulePath})`);
+    }
+  }
+
+  const bytes = {};
+  for (const [key, value] of Object.entries(outputs)) {
+    if (key.endsWith('.js')) bytes[strip(key)] = value.bytes;
+  }
+  return { main: bundle(mainKey, new Set()), demos, bytes };
+}
+
 // Build function
 async function build() {
   try {
@@ -124,6 +176,11 @@ async function build() {
       JSON.stringify(manifest, null, 2)
     );
     
+    await fs.writeFile(
+      './static/dist/demo-manifest.json',
+      JSON.stringify(await buildDemoManifest(result.metafile), null, 2)
+    );
+
     console.log('✓ Build complete');
     console.log('✓ Manifest generated');
     
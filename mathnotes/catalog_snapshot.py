@@ -0,0 +1,163 @@
+"""
+On-disk snapshot of the content catalog, for fast builder startup.
+
+A fresh process would otherwise re-read every content file just to learn
+its URL and title. The snapshot stores, per file, the canonical URL, title,
+mtime, size and a SHA-256 of its bytes, in a small versioned binary format
+that is memory-mapped and unpacked in one pass. On restore, files whose
+mtime and size still match are trusted; the rest are hashed, and only those
+whose bytes changed (plus new and deleted files) go through
+ContentDiscovery.apply_changes.
+
+Layout (little-endian):
+    header:  magic b"MNCATLG\\0", u32 version, u32 record count
+    record:  u16 path len, u16 url len, u16 title len, i64 mtime_ns,
+             i64 size, 32-byte sha256, then the three UTF-8 strings
+"""
+
+import hashlib
+import logging
+import mmap
+import os
+import struct
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from .config import CONTENT_DIRS
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"MNCATLG\0"
+VERSION = 1
+_HEADER = struct.Struct("<8sII")
+_RECORD = struct.Struct("<HHHqq32s")
+
+# file path -> (mtime_ns, size, sha256 digest)
+Stamp = Tuple[int, int, bytes]
+
+
+def _stat(path: str) -> Optional[Tuple[int, int]]:
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return st.st_mtime_ns, st.st_size
+
+
+def _digest(path: str) -> Optional[bytes]:
+    try:
+        with open(path, "rb") as f:
+            return hashlib.sha256(f.read()).digest()
+    except OSError:
+        return None
+
+
+def _read(path: Path) -> Optional[Dict[str, Tuple[str, str, Stamp]]]:
+    """{file path: (canonical URL, title, stamp)} in stored order, or None."""
+    try:
+        with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+            magic, version, count = _HEADER.unpack_from(buf, 0)
+            if magic != MAGIC or version != VERSION:
+                return None
+            records = {}
+            offset = _HEADER.size
+            for _ in range(count):
+                record = _RECORD.unpack_from(buf, offset)
+                path_len, url_len, title_len, mtime_ns, size, digest = record
+                offset += _RECORD.size
+                raw = buf[offset:offset + path_len + url_len + title_len]
+                offset += len(raw)
+                file_path = raw[:path_len].decode("utf-8")
+                canonical_url = raw[path_len:path_len + url_len].decode("utf-8")
+                title = raw[path_len + url_len:].decode("utf-8")
+                records[file_path] = (canonical_url, title, (mtime_ns, size, digest))
+            return records
+    except (OSError, ValueError, struct.error, UnicodeDecodeError):
+        return None
+
+
+def save_catalog(discovery, path) -> None:
+    """Write the discovery catalog to path (atomically, via a temp file)."""
+    path = Path(path)
+    stamps = getattr(discovery, "_snapshot_stamps", {})
+    parts = [b""]
+    count = 0
+    fresh_stamps = {}
+    for file_path, canonical_url in discovery.file_to_canonical.items():
+        stat = _stat(file_path)
+        if stat is None:
+            continue
+        known = stamps.get(file_path)
+        if known and known[:2] == stat:
+            digest = known[2]
+        else:
+            digest = _digest(file_path)
+            if digest is None:
+                continue
+        fresh_stamps[file_path] = (*stat, digest)
+        fields = (file_path, canonical_url, discovery.titles[file_path])
+        encoded = [s.encode("utf-8") for s in fields]
+        parts.append(_RECORD.pack(*(len(s) for s in encoded), *stat, digest))
+        parts.extend(encoded)
+        count += 1
+    parts[0] = _HEADER.pack(MAGIC, VERSION, count)
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_bytes(b"".join(parts))
+    os.replace(tmp, path)
+    discovery._snapshot_stamps = fresh_stamps
+
+
+def _changes(records) -> Tuple[List[str], Dict[str, Stamp]]:
+    """(files new, deleted or edited since the snapshot, stamps of the rest)."""
+    on_disk = set()
+    for section in CONTENT_DIRS:
+        for pattern in ("*.tex", "*.md"):
+            on_disk.update(str(p).replace("\\", "/") for p in Path(section).rglob(pattern))
+
+    changed = sorted(on_disk.difference(records))  # new files (and stray .md)
+    stamps = {}
+    for file_path, (_, _, stamp) in records.items():
+        stat = _stat(file_path)
+        if stat is None:
+            changed.append(file_path)  # deleted
+            continue
+        if stat != stamp[:2]:
+            digest = _digest(file_path)
+            if digest != stamp[2]:
+                changed.append(file_path)
+                continue
+            stamp = (*stat, digest)  # touched but identical
+        stamps[file_path] = stamp
+    return changed, stamps
+
+
+def changed_since_snapshot(path) -> Optional[List[str]]:
+    """Content files new, deleted or edited since the snapshot at path, or
+    None when there is no usable snapshot."""
+    records = _read(Path(path))
+    return None if records is None else _changes(records)[0]
+
+
+def restore_catalog(discovery, path) -> bool:
+    """Fill discovery from a snapshot, re-reading only files that changed.
+
+    Returns False when there is no usable snapshot or the changes since
+    can't be applied; the caller should then run build_url_mappings().
+    """
+    records = _read(Path(path))
+    if records is None:
+        return False
+
+    changed, stamps = _changes(records)
+    discovery._replace({p: (url, title) for p, (url, title, _) in records.items()})
+    discovery._snapshot_stamps = stamps
+    try:
+        discovery.apply_changes(changed)
+    except ValueError:
+        # e.g. a collision introduced since the snapshot: let the full
+        # build report it the usual way
+        return False
+    logger.info(f"Restored {len(records)} catalog entries from {path} ({len(changed)} changed)")
+    return True
@@ -1,5 +1,6 @@
 """Configuration for the mathnotes site."""
 
+import os
 from pathlib import Path
 
 _REPO_ROOT = Path(__file__).resolve().parent.parent
@@ -7,6 +8,38 @@ _REPO_ROOT = Path(__file__).resolve().parent.parent
 # Production base URL
 BASE_URL = "https://lacunary.org"
 
+# Content catalog snapshot reused across builder processes (relative to the
+# build's cwd, like content/); set MATHNOTES_CATALOG_SNAPSHOT="" to disable
+CATALOG_SNAPSHOT = os.environ.get("MATHNOTES_CATALOG_SNAPSHOT", ".cache/catalog.bin")
+
+# Unix socket of the warm build service (scripts/build_daemon.py, or the watcher)
+BUILD_SOCKET = os.environ.get("MATHNOTES_BUILD_SOCKET", "/tmp/mathnotes-build.sock")
+
+# Watcher keeps rendered pages in memory and serves them on BUILD_SOCKET, so
+# the dev server can skip reading them back from disk (docker-compose.dev.yml)
+MEMORY_PAGES = os.environ.get("MATHNOTES_MEMORY_PAGES", "") == "1"
+
+# Bytes of prefetch/preload hints each content page may emit (see
+# resource_hints); MATHNOTES_PREFETCH_BUDGET=0 builds without hints
+PREFETCH_BUDGET_BYTES = int(os.environ.get("MATHNOTES_PREFETCH_BUDGET", "150000"))
+
+# Emit and register a service worker (see service_worker). Off in dev: its
+# page cache would hide rebuilds the watcher doesn't re-manifest
+SERVICE_WORKER = os.environ.get("MATHNOTES_SERVICE_WORKER", "1") == "1"
+
+# Pages every visitor's service worker caches at install, for offline reading
+SW_CORE_PAGES = ["/", "/mathnotes/"]
+
+# Subset the latexblocks web fonts to the glyphs pages use (see font_subset),
+# caching subsets per glyph set. Off in dev, where in-memory rebuilds don't
+# re-subset
+FONT_SUBSETTING = os.environ.get("MATHNOTES_FONT_SUBSET", "1") == "1"
+FONT_CACHE_DIR = os.environ.get("MATHNOTES_FONT_CACHE", ".cache/fonts")
+
+# Memoized TeX -> MathML conversions kept between builds (see math_cache);
+# set MATHNOTES_MATH_CACHE="" to keep the memo in memory only
+MATH_CACHE = os.environ.get("MATHNOTES_MATH_CACHE", ".cache/math.bin")
+
 
 def configure_latexblocks():
     """Point latexblocks at this site's layout. Absolute sty and
@@ -24,6 +57,10 @@ def configure_latexblocks():
         notation_sty_path=str(_REPO_ROOT / "latex" / "mathnotes-notation.sty"),
         node_modules_dir=str(_REPO_ROOT),
     )
+    # configure() replaced the converter; memoize in front of the new one
+    from .math_cache import install_math_cache
+
+    install_math_cache()
 
 # Content directories
 CONTENT_DIRS = [
@@ -1,6 +1,7 @@
 from pathlib import Path
-from typing import Dict
+from typing import Any, Dict, Iterable, Optional, Tuple
 from .config import CONTENT_DIRS
+from .content_fs import get_content_fs
 from latexblocks.content_loader import load_content_file
 
 
@@ -10,6 +11,9 @@ class ContentDiscovery:
     def __init__(self):
         self.url_mappings: Dict[str, str] = {}  # Maps canonical URLs to file paths
         self.file_to_canonical: Dict[str, str] = {}  # Maps file paths to canonical URLs
+        self.titles: Dict[str, str] = {}  # Maps file paths to display titles
+        self._folder_tree: Optional[Dict[str, Any]] = None
+        self._snapshot_stamps: Dict[str, Tuple[int, int, bytes]] = {}  # see catalog_snapshot
 
     def build_url_mappings(self):
         """Build URL mappings from all content files."""
@@ -17,55 +21,170 @@ class ContentDiscovery:
         # deleted/moved files don't linger across incremental rebuilds
         self.url_mappings.clear()
         self.file_to_canonical.clear()
+        self.titles.clear()
+        self._folder_tree = None
 
+        fs = get_content_fs()
         for section in CONTENT_DIRS:
-            section_path = Path(section)
-
-            stray_md = sorted(section_path.rglob("*.md"))
+            stray_md = fs.files(section, ".md")
             if stray_md:
                 raise ValueError(
                     f"Markdown content is no longer supported: {stray_md[0]} — convert to .tex"
                 )
-            content_files = sorted(section_path.rglob("*.tex"))
-            for content_file in content_files:
-                metadata, _ = load_content_file(content_file)
-
-                # Build canonical URL
-                relative_path = content_file.relative_to(Path("."))
-
-                # Check if there's a custom slug that should override the filename
-                custom_slug = metadata.get("slug")
-                if custom_slug:
-                    # Custom slug replaces the filename but preserves the directory
-                    # path, so nested sections keep their full URL (e.g.
-                    # content/applied-math/information-theory/01-discrete-entropy.tex
-                    # -> applied-math/information-theory/<slug>).
-                    parts = relative_path.parts
-                    start = 1 if parts[0] == "content" else 0
-                    dir_parts = parts[start:-1]  # directories between content/ and the file
-                    canonical_url = "/".join([*dir_parts, custom_slug])
-                else:
-                    # No custom slug - use full directory structure
-                    # Remove content/ prefix and extension
-                    url_path = "/".join(relative_path.parts[1:])
-                    url_path = url_path[: -len(content_file.suffix)]
-                    canonical_url = url_path
-
-                # Ensure canonical URL has trailing slash
-                canonical_url += "/"
-
-                # Store mappings
-                file_path = str(relative_path).replace("\\", "/")
-                if canonical_url in self.url_mappings:
-                    raise ValueError(
-                        f"URL collision: {file_path} and "
-                        f"{self.url_mappings[canonical_url]} both map to /{canonical_url}"
-                    )
-                self.url_mappings[canonical_url] = file_path
-                self.file_to_canonical[file_path] = canonical_url
+            for content_file in fs.files(section, ".tex"):
+                self._add(*self._read_entry(Path(content_file)))
 
         print(f"Built {len(self.url_mappings)} URL mappings")
 
+    def apply_changes(self, changed_paths: Iterable[str]) -> bool:
+        """Update the mappings for changed paths only (the watcher's rebuilds).
+
+        Re-reads just the changed .tex files under CONTENT_DIRS; deleted ones
+        are unmapped, and a rename arrives as its old and new paths. Slug
+        overrides, collision errors and .md rejection behave as in
+        build_url_mappings, the dicts are updated in place, and their order
+        matches what a full rebuild would produce.
+
+        Returns:
+            True if any mapping or title changed.
+        """
+        fs = get_content_fs()
+        candidates = set()
+        for path in changed_paths:
+            path = path.replace("\\", "/")
+            if _section_index(path) is None:
+                continue
+            if path.endswith(".md") and fs.is_file(path):
+                raise ValueError(
+                    f"Markdown content is no longer supported: {path} — convert to .tex"
+                )
+            if path.endswith(".tex"):
+                candidates.add(path)
+
+        # Read everything first so an unreadable file leaves the mappings intact
+        present = {}
+        for file_path in sorted(candidates):
+            if fs.is_file(file_path):
+                present[file_path] = self._read_entry(Path(file_path))
+
+        before = {p: (self.file_to_canonical.get(p), self.titles.get(p)) for p in candidates}
+        previous = {p: (self.file_to_canonical[p], self.titles[p]) for p in self.file_to_canonical}
+        # Drop every candidate's old mapping before adding, so a rename or a
+        # slug swap between two changed files isn't mistaken for a collision
+        for file_path in candidates:
+            canonical_url = self.file_to_canonical.pop(file_path, None)
+            if canonical_url is not None:
+                del self.url_mappings[canonical_url]
+                del self.titles[file_path]
+        try:
+            for entry in present.values():
+                self._add(*entry)
+        except ValueError:
+            # Leave the last good state so the next edit retries these files
+            self._replace(previous)
+            raise
+
+        changed = any(
+            before[p] != (self.file_to_canonical.get(p), self.titles.get(p)) for p in candidates
+        )
+        if changed:
+            order = sorted(self.file_to_canonical, key=lambda p: (_section_index(p), Path(p)))
+            self._replace({p: (self.file_to_canonical[p], self.titles[p]) for p in order})
+            print(f"Updated URL mappings for {len(candidates)} changed files")
+        return changed
+
+    def _replace(self, by_file: Dict[str, Tuple[str, str]]):
+        """Refill the dicts in place from {file path: (canonical URL, title)}."""
+        self.url_mappings.clear()
+        self.file_to_canonical.clear()
+        self.titles.clear()
+        for file_path, (canonical_url, title) in by_file.items():
+            self.url_mappings[canonical_url] = file_path
+            self.file_to_canonical[file_path] = canonical_url
+            self.titles[file_path] = title
+        self._folder_tree = None
+
+    def _read_entry(self, content_file: Path) -> Tuple[str, str, str]:
+        """(canonical URL, file path, title) for one content file."""
+        fs = get_content_fs()
+        if fs.on_disk:
+            # through this module's name, which the catalog tests spy on
+            metadata, _ = load_content_file(content_file)
+        else:
+            metadata, _ = fs.load_content(content_file.as_posix())
+
+        # Build canonical URL
+        relative_path = content_file.relative_to(Path("."))
+
+        # Check if there's a custom slug that should override the filename
+        custom_slug = metadata.get("slug")
+        if custom_slug:
+            # Custom slug replaces the filename but preserves the directory
+            # path, so nested sections keep their full URL (e.g.
+            # content/applied-math/information-theory/01-discrete-entropy.tex
+            # -> applied-math/information-theory/<slug>).
+            parts = relative_path.parts
+            start = 1 if parts[0] == "content" else 0
+            dir_parts = parts[start:-1]  # directories between content/ and the file
+            canonical_url = "/".join([*dir_parts, custom_slug])
+        else:
+            # No custom slug - use full directory structure
+            # Remove content/ prefix and extension
+            url_path = "/".join(relative_path.parts[1:])
+            url_path = url_path[: -len(content_file.suffix)]
+            canonical_url = url_path
+
+        # Ensure canonical URL has trailing slash
+        canonical_url += "/"
+
+        file_path = str(relative_path).replace("\\", "/")
+        title = (metadata.get("title") or "").strip() or page_title_from_filename(content_file)
+        return canonical_url, file_path, title
+
+    def _add(self, canonical_url: str, file_path: str, title: str):
+        """Store one mapping, refusing two files with the same URL."""
+        if canonical_url in self.url_mappings:
+            raise ValueError(
+                f"URL collision: {file_path} and "
+                f"{self.url_mappings[canonical_url]} both map to /{canonical_url}"
+            )
+        self.url_mappings[canonical_url] = file_path
+        self.file_to_canonical[file_path] = canonical_url
+        self.titles[file_path] = title
+
+    def folder_tree(self) -> Dict[str, Any]:
+        """Discovered pages as a folder tree, so listings need no filesystem walk.
+
+        Each node is {"pages": [file paths sorted by filename], "folders":
+        {name: node}}; only folders with a discovered page somewhere below
+        them appear. Built lazily and reused until the mappings are rebuilt.
+        """
+        if self._folder_tree is None:
+            root: Dict[str, Any] = {"pages": [], "folders": {}}
+            for file_path in self.file_to_canonical:
+                node = root
+                for part in file_path.split("/")[:-1]:
+                    node = node["folders"].setdefault(part, {"pages": [], "folders": {}})
+                node["pages"].append(file_path)
+
+            def sort_pages(node: Dict[str, Any]):
+                node["pages"].sort(key=lambda p: p.rsplit("/", 1)[-1].lower())
+                for child in node["folders"].values():
+                    sort_pages(child)
+
+            sort_pages(root)
+            self._folder_tree = root
+        return self._folder_tree
+
+    def get_folder(self, folder_path: str) -> Optional[Dict[str, Any]]:
+        """The folder_tree() node for a directory like "content/algebra", if any."""
+        node = self.folder_tree()
+        for part in Path(folder_path).parts:
+            node = node["folders"].get(part)
+            if node is None:
+                return None
+        return node
+
     def get_canonical_url(self, file_path: str) -> str:
         """Get the canonical URL for a file path."""
         file_path_normalized = file_path.replace("\\", "/")
@@ -75,3 +194,16 @@ class ContentDiscovery:
     def get_file_path(self, canonical_url: str) -> str:
         """Get the file path for a canonical URL."""
         return self.url_mappings.get(canonical_url)
+
+
+def page_title_from_filename(file_path: Path) -> str:
+    """Display title derived from the filename, for pages without one."""
+    return Path(file_path).stem.replace("-", " ").title()
+
+
+def _section_index(file_path: str) -> Optional[int]:
+    """Position in CONTENT_DIRS of the section holding file_path, if any."""
+    for i, section in enumerate(CONTENT_DIRS):
+        if file_path.startswith(section + "/"):
+            return i
+    return None
@@ -0,0 +1,247 @@
+"""
+Where content is read from: the working tree, a git commit, or memory.
+
+Discovery, navigation titles, the bibliography and resource hints read
+content through the active ContentFS (get_content_fs) rather than the filesystem. The same code
+can then catalog any revision without a checkout, or a test fixture held in
+a dict. Paths are repo-relative POSIX strings like
+"content/algebra/groups.tex".
+
+- WorkingTreeFS: files under the current directory (the default)
+- GitTreeFS: the tree of one commit, read through git cat-file
+- MemoryFS: a {path: text} dict
+
+latexblocks' block index and page renderer still load pages through its own
+content_loader, which reads the disk, so only the working tree can feed a
+full site build.
+"""
+
+import os
+import subprocess
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Hashable, Iterator, List, Optional, Tuple
+
+
+def _sort_key(path: str) -> List[str]:
+    # Path ordering (by component), so listings match the old rglob order
+    return path.split("/")
+
+
+def _under(path: str, directory: str) -> bool:
+    directory = directory.strip("/")
+    return not directory or directory == "." or path.startswith(directory + "/")
+
+
+class ContentFS(ABC):
+    """Read-only view of the content tree."""
+
+    # Whether paths are also real files under the cwd (catalog snapshots,
+    # latexblocks' loader and the watcher only make sense then)
+    on_disk = False
+
+    def __init__(self):
+        self._parsed: Dict[str, Tuple[Hashable, tuple]] = {}
+
+    @abstractmethod
+    def files(self, directory: str, suffix: str) -> List[str]:
+        """Paths of the files below directory (recursively) ending in suffix, sorted."""
+
+    def is_file(self, path: str) -> bool:
+        return self.stamp(path) is not None
+
+    @abstractmethod
+    def read_text(self, path: str) -> str:
+        """The file's text; FileNotFoundError when it doesn't exist."""
+
+    @abstractmethod
+    def stamp(self, path: str) -> Optional[Hashable]:
+        """A value that changes whenever the file does; None when it doesn't exist."""
+
+    @abstractmethod
+    def size(self, path: str) -> Optional[int]:
+        """The file's size in bytes; None when it doesn't exist."""
+
+    def load_content(self, path: str) -> tuple:
+        """(metadata, PageDoc) for a content file, parsed once per stamp."""
+        from latexblocks.latex_processor import parse_latex_file
+
+        stamp = self.stamp(path)
+        cached = self._parsed.get(path)
+        if cached is not None and cached[0] == stamp:
+            return cached[1]
+        parsed = parse_latex_file(self.read_text(path), path)
+        self._parsed[path] = (stamp, parsed)
+        return parsed
+
+
+class WorkingTreeFS(ContentFS):
+    """The files under the current directory."""
+
+    on_disk = True
+
+    def files(self, directory: str, suffix: str) -> List[str]:
+        return sorted(
+            (p.as_posix() for p in Path(directory).rglob(f"*{suffix}") if p.is_file()),
+            key=_sort_key,
+        )
+
+    def is_file(self, path: str) -> bool:
+        return os.path.isfile(path)
+
+    def read_text(self, path: str) -> str:
+        with open(path, "r", encoding="utf-8") as f:
+            return f.read()
+
+    def stamp(self, path: str) -> Optional[Hashable]:
+        try:
+            return os.stat(path).st_mtime_ns
+        except OSError:
+            return None
+
+    def size(self, path: str) -> Optional[int]:
+        try:
+            return os.path.getsize(path)
+        except OSError:
+            return None
+
+    def load_content(self, path: str) -> tuple:
+        # latexblocks' own mtime cache: the block index mutates the very
+        # PageDoc objects it hands out, so everyone must share them
+        from latexblocks.content_loader import load_content_file
+
+        return load_content_file(Path(path))
+
+
+class GitTreeFS(ContentFS):
+    """The tree of one commit, read from the object database (no checkout).
+
+    Blobs stream through a single `git cat-file --batch` process, started
+    on first read; close() ends it.
+    """
+
+    def __init__(self, revision: str = "HEAD", repo: str = "."):
+        super().__init__()
+        self.repo = repo
+        self.commit = self._git("rev-parse", "--verify", f"{revision}^{{commit}}").decode().strip()
+        self._blobs: Dict[str, str] = {}
+        self._sizes: Dict[str, int] = {}
+        listing = self._git("ls-tree", "-r", "-l", "-z", "--full-tree", self.commit)
+        for entry in listing.split(b"\0"):
+            if not entry:
+                continue
+            meta, path = entry.split(b"\t", 1)
+            _mode, kind, sha, size = meta.split()
+            if kind == b"blob":
+                path = path.decode("utf-8")
+                self._blobs[path] = sha.decode()
+                self._sizes[path] = int(size)
+        self._texts: Dict[str, str] = {}
+        self._cat_file: Optional[subprocess.Popen] = None
+
+    def _git(self, *args) -> bytes:
+        return subprocess.run(
+            ["git", "-C", self.repo, *args], check=True, capture_output=True
+        ).stdout
+
+    def files(self, directory: str, suffix: str) -> List[str]:
+        return sorted(
+            (p for p in self._blobs if p.endswith(suffix) and _under(p, directory)),
+            key=_sort_key,
+        )
+
+    def stamp(self, path: str) -> Optional[Hashable]:
+        return self._blobs.get(path)
+
+    def size(self, path: str) -> Optional[int]:
+        return self._sizes.get(path)
+
+    def read_text(self, path: str) -> str:
+        sha = self._blobs.get(path)
+        if sha is None:
+            raise FileNotFoundError(f"{path} is not in {self.commit[:12]}")
+        if sha not in self._texts:
+            self._texts[sha] = self._read_blob(sha).decode("utf-8")
+        return self._texts[sha]
+
+    def _read_blob(self, sha: str) -> bytes:
+        if self._cat_file is None:
+            self._cat_file = subprocess.Popen(
+                ["git", "-C", self.repo, "cat-file", "--batch"],
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+            )
+        self._cat_file.stdin.write(sha.encode() + b"\n")
+        self._cat_file.stdin.flush()
+        header = self._cat_file.stdout.readline().split()
+        if len(header) != 3:
+            raise OSError(f"git cat-file could not read {sha}: {b' '.join(header).decode()}")
+        data = self._cat_file.stdout.read(int(header[2]))
+        self._cat_file.stdout.read(1)  # the newline after each object
+        return data
+
+    def close(self):
+        if self._cat_file is not None:
+            self._cat_file.stdin.close()
+            self._cat_file.wait()
+            self._cat_file = None
+
+
+class MemoryFS(ContentFS):
+    """Content held in a {path: text} dict, for fixtures and tests."""
+
+    def __init__(self, files: Optional[Dict[str, str]] = None):
+        super().__init__()
+        self._files: Dict[str, str] = {}
+        self._versions: Dict[str, int] = {}
+        for path, text in (files or {}).items():
+            self.write(path, text)
+
+    def write(self, path: str, text: str):
+        self._files[path] = text
+        self._versions[path] = self._versions.get(path, 0) + 1
+
+    def remove(self, path: str):
+        del self._files[path]
+
+    def files(self, directory: str, suffix: str) -> List[str]:
+        return sorted(
+            (p for p in self._files if p.endswith(suffix) and _under(p, directory)),
+            key=_sort_key,
+        )
+
+    def stamp(self, path: str) -> Optional[Hashable]:
+        return self._versions[path] if path in self._files else None
+
+    def size(self, path: str) -> Optional[int]:
+        return len(self._files[path].encode("utf-8")) if path in self._files else None
+
+    def read_text(self, path: str) -> str:
+        try:
+            return self._files[path]
+        except KeyError:
+            raise FileNotFoundError(path) from None
+
+
+_active: ContentFS = WorkingTreeFS()
+
+
+def get_content_fs() -> ContentFS:
+    return _active
+
+
+def set_content_fs(fs: ContentFS) -> ContentFS:
+    """Make fs the content source; returns the previous one."""
+    global _active
+    previous, _active = _active, fs
+    return previous
+
+
+@contextmanager
+def using_content_fs(fs: ContentFS) -> Iterator[ContentFS]:
+    previous = set_content_fs(fs)
+    try:
+        yield fs
+    finally:
+        set_content_fs(previous)
@@ -0,0 +1,90 @@
+"""
+Per-page demo bundles: the demo code each page loads, and its JS weight.
+
+esbuild splits every demo registered in demos-framework/src/main.ts into its
+own chunk, but main.js only finds a page's demos once it has run, so their
+code arrives in a waterfall behind it. esbuild.config.js writes
+demo-manifest.json next to manifest.json:
+
+    {"main": {"file": "main-X.js", "imports": ["chunk-Y.js"]},
+     "demos": {"pendulum": {"file": "pendulum-Z.js", "imports": ["p5-W.js"]}},
+     "bytes": {"main-X.js": 41230, ...}}
+
+Each demo's imports are the shared chunks it statically imports that main.js
+doesn't already load. The build reads the \\includedemo placeholders in each
+rendered page and emits <link rel="modulepreload"> for exactly that code.
+A page then fetches its demos alongside main.js, and a text-only page
+fetches none. The same records give the module JS bytes of every page.
+"""
+
+import json
+import re
+from pathlib import Path
+from statistics import median
+from typing import Dict, List, Optional
+
+# \includedemo{name}, as the renderer emits it (see PARSING.md)
+DEMO_RE = re.compile(r'class="demo-component" data-demo="([^"]+)"')
+
+MANIFEST_PATH = Path("static/dist/demo-manifest.json")
+
+
+def load_demo_manifest(path=MANIFEST_PATH) -> Optional[dict]:
+    """The esbuild demo manifest, or None before the JS bundle is built."""
+    try:
+        return json.loads(Path(path).read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+
+
+def page_demos(content: str) -> List[str]:
+    """Demo names a rendered page embeds, in order of first use."""
+    return list(dict.fromkeys(DEMO_RE.findall(content)))
+
+
+def _files(bundle: dict) -> List[str]:
+    return [bundle["file"], *bundle["imports"]]
+
+
+def demo_preloads(demos: List[str], manifest: Optional[dict]) -> List[str]:
+    """modulepreload URLs for the demos' chunks, each once."""
+    if not manifest:
+        return []
+    files = {}
+    for name in demos:
+        bundle = manifest["demos"].get(name)
+        if bundle is not None:  # unknown demos fail loudly client-side
+            files.update(dict.fromkeys(_files(bundle)))
+    return [f"/static/dist/{file}" for file in files]
+
+
+def page_js_bytes(demos: List[str], manifest: dict) -> int:
+    """Module JS bytes a page loads: main.js, its imports and its demos' chunks."""
+    files = set(_files(manifest["main"]))
+    for name in demos:
+        bundle = manifest["demos"].get(name)
+        if bundle is not None:
+            files.update(_files(bundle))
+    return sum(manifest["bytes"].get(file, 0) for file in files)
+
+
+def js_report(demos_by_page: Dict[str, List[str]], manifest: dict) -> Dict[str, dict]:
+    """{page path: {"demos": [...], "js_bytes": n}} for every page."""
+    return {
+        path: {"demos": demos, "js_bytes": page_js_bytes(demos, manifest)}
+        for path, demos in sorted(demos_by_page.items())
+    }
+
+
+def summarize(report: Dict[str, dict]) -> str:
+    """One log line: typical and heaviest module JS per page."""
+    if not report:
+        return "Module JS per page: no pages built"
+    sizes = [entry["js_bytes"] for entry in report.values()]
+    heaviest = max(report, key=lambda path: report[path]["js_bytes"])
+    with_demos = sum(1 for entry in report.values() if entry["demos"])
+    return (
+        f"Module JS per page: {median(sizes) / 1024:.1f} KB median, "
+        f"{report[heaviest]['js_bytes'] / 1024:.1f} KB max ({heaviest}); "
+        f"{with_demos} of {len(report)} pages load demo code"
+    )
@@ -0,0 +1,99 @@
+"""
+Deploy manifest: a content hash per published file, for targeted purges.
+
+Every build writes deploy-manifest.json at the root of its output, mapping
+each page's canonical path (Page.get_canonical_path) to its output file and
+the SHA-256 of its bytes, and every other published file (images,
+robots.txt, the favicon, static/dist with its subset fonts, ...) from its
+URL path to its SHA-256. Since the manifest ships with the site, the next
+deploy can fetch the live one and diff against it: only paths whose hash
+changed, appeared or disappeared need purging from caches.
+
+    {"version": 2, "base_url": "https://lacunary.org",
+     "pages": {"/mathnotes/algebra/groups/": {"output": "mathnotes/algebra/groups/index.html",
+                                               "sha256": "..."}},
+     "files": {"/static/dist/latexblocks.css": "..."}}
+"""
+
+import hashlib
+import json
+import os
+import posixpath
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+MANIFEST_NAME = "deploy-manifest.json"
+VERSION = 2
+
+
+def page_entry(output_path: str, html: str) -> Dict[str, str]:
+    # normpath: content page outputs come as "mathnotes/x//index.html" (canonical
+    # URLs end in "/"), and file_entries() must recognize them to skip them
+    return {
+        "output": posixpath.normpath(output_path),
+        "sha256": hashlib.sha256(html.encode("utf-8")).hexdigest(),
+    }
+
+
+def file_entries(root, skip: Iterable[str] = ()) -> Dict[str, str]:
+    """{URL path: SHA-256} for the files under root, except the paths
+    (relative to root) in skip."""
+    root = Path(root)
+    skip = set(skip)
+    entries = {}
+    for dirpath, _, filenames in os.walk(root):
+        for name in filenames:
+            full = Path(dirpath) / name
+            path = full.relative_to(root).as_posix()
+            if path not in skip:
+                entries[f"/{path}"] = hashlib.sha256(full.read_bytes()).hexdigest()
+    return entries
+
+
+def build_manifest(
+    pages: Dict[str, Dict[str, str]], base_url: str, files: Optional[Dict[str, str]] = None
+) -> dict:
+    """The manifest for {canonical path: page_entry(...)} and {URL path: SHA-256}."""
+    return {
+        "version": VERSION,
+        "base_url": base_url,
+        "pages": dict(sorted(pages.items())),
+        "files": dict(sorted((files or {}).items())),
+    }
+
+
+def write_manifest(path, manifest: dict):
+    Path(path).write_text(json.dumps(manifest, indent=1) + "\n", encoding="utf-8")
+
+
+def load_manifest(path) -> Optional[dict]:
+    """The manifest at path, or None when missing or from another version."""
+    try:
+        manifest = json.loads(Path(path).read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+    if not isinstance(manifest, dict) or manifest.get("version") != VERSION:
+        return None
+    return manifest
+
+
+def _hashes(manifest: dict) -> Dict[str, str]:
+    hashes = {path: entry["sha256"] for path, entry in manifest["pages"].items()}
+    hashes.update(manifest["files"])
+    return hashes
+
+
+def changed_paths(previous: Optional[dict], current: dict) -> List[str]:
+    """Paths (pages and files) that changed, appeared or disappeared, sorted.
+
+    Without a usable previous manifest every current path counts as changed.
+    """
+    old = _hashes(previous) if previous else {}
+    new = _hashes(current)
+    changed = {path for path, digest in new.items() if old.get(path) != digest}
+    changed.update(old.keys() - new.keys())
+    return sorted(changed)
+
+
+def public_urls(paths: List[str], base_url: str) -> List[str]:
+    return [f"{base_url}{path}" for path in paths]
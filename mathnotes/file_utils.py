@@ -2,75 +2,47 @@
 File system utilities for the Mathnotes application.
 """
 
-from pathlib import Path
-from typing import List, Dict
-from latexblocks.content_loader import load_content_file
+from typing import Any, List, Dict
+from mathnotes.navigation import visible_subfolders
 
 
-def get_all_content_for_section(section_path: str, file_to_canonical: Dict[str, str]) -> List[Dict]:
+def get_all_content_for_section(section_path: str, url_mapper) -> List[Dict]:
     """
     Recursively get all content files for a section.
 
+    Built from the discovery catalog (url_mapper.get_folder), which already
+    holds every page's URL and title, so this touches no files.
+
     Args:
         section_path: Path to the section directory
-        file_to_canonical: Mapping of file paths to canonical URLs
+        url_mapper: ContentDiscovery holding the content catalog
 
     Returns:
         List of content items with nested structure
     """
-    path = Path(section_path)
-
-    def process_directory(dir_path: Path, depth: int = 0) -> List[Dict]:
-        files = []
-        directories = []
 
-        # First, separate files and directories
-        for item in dir_path.iterdir():
-            if item.is_file() and item.suffix == ".tex":
-                file_path_raw = str(item.relative_to(Path(".")))
-                file_path = file_path_raw.replace("\\", "/")
-                canonical_url = file_to_canonical.get(file_path)
+    def process_directory(node: Dict[str, Any]) -> List[Dict]:
+        # Files first, then directories, each sorted by name
+        items = [
+            {
+                "name": url_mapper.titles[file_path],
                 # canonical_url already has trailing slash from content_discovery
-                url = canonical_url
-
-                # Try to get title from content metadata, fall back to filename
-                try:
-                    metadata, _ = load_content_file(item)
-                    title = (metadata.get("title") or "").strip()
-                    if not title:
-                        # Fall back to filename-based title
-                        title = item.stem.replace("-", " ").title()
-                except Exception:
-                    # If anything goes wrong reading the file, use filename
-                    title = item.stem.replace("-", " ").title()
-
-                files.append({"name": title, "path": url, "is_subdir": False, "_item": item})
-            elif item.is_dir() and not item.name.startswith(".") and not item.name.startswith("__"):
-                # Recursively get files from subdirectories
-                subdir_content = process_directory(item, depth + 1)
-                if subdir_content:
-                    directories.append(
-                        {
-                            "name": item.name.replace("-", " ").title(),
-                            "is_subdir": True,
-                            "files": subdir_content,
-                            "_item": item,
-                        }
-                    )
-
-        # Sort files and directories separately by their item names
-        files.sort(key=lambda x: x["_item"].name.lower())
-        directories.sort(key=lambda x: x["_item"].name.lower())
-
-        # Remove the temporary _item field and combine: files first, then directories
-        items = []
-        for f in files:
-            del f["_item"]
-            items.append(f)
-        for d in directories:
-            del d["_item"]
-            items.append(d)
-
+                "path": url_mapper.file_to_canonical[file_path],
+                "is_subdir": False,
+            }
+            for file_path in node["pages"]
+        ]
+        for name, child in visible_subfolders(node):
+            subdir_content = process_directory(child)
+            if subdir_content:
+                items.append(
+                    {
+                        "name": name.replace("-", " ").title(),
+                        "is_subdir": True,
+                        "files": subdir_content,
+                    }
+                )
         return items
 
-    return process_directory(path)
+    section = url_mapper.get_folder(section_path)
+    return process_directory(section) if section else []
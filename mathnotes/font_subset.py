@@ -0,0 +1,198 @@
+"""
+Subset the latexblocks web fonts to the glyphs the site actually uses.
+
+copy_web_assets ships the full math fonts, but the rendered pages use a
+small fraction of their glyphs. After the pages are rendered, this stage
+collects every code point they contain (text, MathML, and the \\uXXXX
+escapes in tooltip JSON), and rewrites each @font-face in latexblocks.css
+into two subsets with unicode-range:
+
+- core: printable ASCII plus code points used on at least core_share of
+  the pages, which nearly every page loads
+- rare: the rest, which the browser fetches only on pages that need it
+
+The result is cached under FONT_CACHE_DIR by a hash of the glyph sets and
+the original fonts, so a build whose content uses the same glyphs copies
+the previous subsets instead of re-running the subsetter. fontTools (with
+brotli for woff2) is optional: without it the full fonts ship unchanged.
+"""
+
+import hashlib
+import html
+import logging
+import os
+import re
+import shutil
+from collections import Counter
+from pathlib import Path
+from typing import Dict, Iterable, List, Set, Tuple
+
+from .config import FONT_CACHE_DIR
+
+logger = logging.getLogger(__name__)
+
+FONT_FACE_RE = re.compile(r"@font-face\s*{([^}]*)}")
+SRC_URL_RE = re.compile(r"""url\((['"]?)([^'")]+)\1\)""")
+JSON_ESCAPE_RE = re.compile(r"\\u([0-9a-fA-F]{4})")
+
+ASCII = set(range(0x20, 0x7F))
+
+# Editing this module (e.g. the subsetter options) invalidates the cache
+_MODULE_DIGEST = hashlib.sha256(Path(__file__).read_bytes()).hexdigest()[:16]
+
+
+def collect_codepoints(pages: Iterable[str]) -> Tuple[Counter, int]:
+    """(how many pages use each code point, number of pages)."""
+    counts = Counter()
+    n_pages = 0
+    for page in pages:
+        n_pages += 1
+        used = set(map(ord, html.unescape(page)))
+        # Tooltip JSON is ASCII-escaped; join surrogate pairs back up
+        escaped = "".join(chr(int(code, 16)) for code in JSON_ESCAPE_RE.findall(page))
+        used.update(map(ord, escaped.encode("utf-16", "surrogatepass").decode("utf-16", "replace")))
+        counts.update(cp for cp in used if cp >= 0x20)
+    return counts, n_pages
+
+
+def split_codepoints(
+    counts: Counter, n_pages: int, core_share: float = 0.05
+) -> Tuple[Set[int], Set[int]]:
+    """(core, rare) code points: ASCII and anything on core_share of pages is core."""
+    threshold = core_share * n_pages
+    core = set(ASCII)
+    core.update(cp for cp, n in counts.items() if n >= threshold)
+    rare = set(counts) - core
+    return core, rare
+
+
+def unicode_range(codepoints: Set[int]) -> str:
+    """CSS unicode-range for a set of code points, e.g. "U+20-7E,U+3B1"."""
+    ranges: List[str] = []
+    ordered = sorted(codepoints)
+    i = 0
+    while i < len(ordered):
+        j = i
+        while j + 1 < len(ordered) and ordered[j + 1] == ordered[j] + 1:
+            j += 1
+        start, end = ordered[i], ordered[j]
+        ranges.append(f"U+{start:X}" if start == end else f"U+{start:X}-{end:X}")
+        i = j + 1
+    return ",".join(ranges)
+
+
+def _covered(source: Path) -> Set[int]:
+    """Code points a font has glyphs for."""
+    from fontTools.ttLib import TTFont
+
+    with TTFont(str(source), lazy=True) as font:
+        return set(font.getBestCmap())
+
+
+def _subset_file(source: Path, target: Path, codepoints: Set[int]):
+    from fontTools import subset
+
+    options = subset.Options()
+    options.flavor = {".woff2": "woff2", ".woff": "woff"}.get(source.suffix.lower())
+    options.layout_features = ["*"]  # keep ssty, math variants and the MATH table's closure
+    options.name_IDs = ["*"]
+    options.notdef_outline = True
+    font = subset.load_font(str(source), options)
+    subsetter = subset.Subsetter(options)
+    subsetter.populate(unicodes=codepoints)
+    subsetter.subset(font)
+    subset.save_font(font, str(target), options)
+
+
+def _rewrite_faces(css: str, dist: Path, out: Path, chunks: Dict[str, Set[int]]) -> str:
+    """css with each local @font-face split per chunk; subset files go to out."""
+
+    def split_face(match: re.Match) -> str:
+        body = match.group(1)
+        if "unicode-range" in body:
+            return match.group(0)  # already split by its author
+        urls = [
+            url for _, url in SRC_URL_RE.findall(body)
+            if not url.startswith(("data:", "http:", "https:", "/"))
+        ]
+        if not urls:
+            return match.group(0)
+        # unicode-range only claims what the font can draw, so pages using
+        # glyphs from other fonts don't fetch this one's rare chunk
+        covered = _covered(dist / urls[0])
+        faces = []
+        for name, wanted in chunks.items():
+            codepoints = wanted & covered
+            if not codepoints:
+                continue
+            chunk_body = body
+            for url in urls:
+                source = dist / url
+                subset_url = str(Path(url).with_name(f"{Path(url).stem}.{name}{Path(url).suffix}"))
+                target = out / subset_url
+                target.parent.mkdir(parents=True, exist_ok=True)
+                if not target.exists():  # faces can share a file
+                    _subset_file(source, target, codepoints)
+                chunk_body = chunk_body.replace(url, subset_url)
+            faces.append(
+                f"@font-face {{{chunk_body.rstrip().rstrip(';')};\n"
+                f"  unicode-range: {unicode_range(codepoints)};\n}}"
+            )
+        return "\n".join(faces)
+
+    return FONT_FACE_RE.sub(split_face, css)
+
+
+def subset_web_fonts(dist: Path, pages: Iterable[str], core_share: float = 0.05) -> bool:
+    """Subset the fonts latexblocks.css in dist loads; True if it was rewritten."""
+    css_path = dist / "latexblocks.css"
+    if not css_path.is_file():
+        return False
+    try:
+        import fontTools.subset  # noqa: F401
+    except ImportError:
+        logger.warning("fontTools is not installed; shipping the full web fonts")
+        return False
+
+    counts, n_pages = collect_codepoints(pages)
+    core, rare = split_codepoints(counts, n_pages, core_share)
+    chunks = {"core": core, "rare": rare}
+
+    css = css_path.read_text(encoding="utf-8")
+    key = hashlib.sha256(_MODULE_DIGEST.encode("utf-8"))
+    key.update(css.encode("utf-8"))
+    for name, codepoints in chunks.items():
+        key.update(f"{name}:{unicode_range(codepoints)}".encode("utf-8"))
+    for _, url in sorted(SRC_URL_RE.findall(css)):
+        font = dist / url
+        if font.is_file():
+            key.update(url.encode("utf-8") + hashlib.sha256(font.read_bytes()).digest())
+    cached = Path(FONT_CACHE_DIR) / key.hexdigest()[:32]
+
+    if not cached.is_dir():
+        logger.info(f"Subsetting web fonts: {len(core)} core and {len(rare)} rare code points")
+        building = cached.with_name(cached.name + ".tmp")
+        shutil.rmtree(building, ignore_errors=True)
+        building.mkdir(parents=True)
+        (building / "latexblocks.css").write_text(
+            _rewrite_faces(css, dist, building, chunks), encoding="utf-8"
+        )
+        building.rename(cached)
+    else:
+        logger.info(f"Reusing web font subsets for this glyph set ({cached.name})")
+        os.utime(cached)  # most recently used, for _prune
+
+    shutil.copytree(cached, dist, dirs_exist_ok=True)
+    _prune(cached.parent)
+    return True
+
+
+def _prune(cache_dir: Path, keep: int = 4):
+    """Drop all but the keep most recently used glyph-set entries."""
+    entries = sorted(
+        (p for p in cache_dir.iterdir() if p.is_dir()),
+        key=lambda p: p.stat().st_mtime,
+        reverse=True,
+    )
+    for stale in entries[keep:]:
+        shutil.rmtree(stale, ignore_errors=True)
@@ -0,0 +1,440 @@
+"""
+Site-wide memo of TeX -> MathML conversions, persisted between builds.
+
+The same expressions ($x$, $\\mathbb{R}$, $f(x)$) appear thousands of times
+across the site, and each one used to cost a round trip to the MathJax
+worker. MathCache stands in for latexblocks' converter singleton (see
+install_math_cache). Each request is keyed on its normalized TeX (whitespace
+runs collapsed), display mode and alttext, so each unique expression is
+converted once per site rather than once per use. Notation macros are
+substituted before the request reaches the converter, so their expansions
+are part of the key. The macro package, the worker and the mathjax version
+are hashed into a digest; the stored memo is only reused while that digest
+matches.
+
+Misses are sent to the worker in batches. prefetch() scans content files for
+their math and runs it through render_math while the cache collects
+requests instead of converting them. It then pipelines every collected miss
+to the worker at once. Builds prefetch before anything parses, so the parse
+finds its math already converted. An expression the scan can't see still
+converts on its own, and is memoized like the rest.
+
+Entries age by content presence: the scan remembers which expressions each
+content file holds, and a save keeps an entry fresh while some file still
+holds it (or this process looked it up). A long-lived builder that reuses
+unchanged pages, and so never converts their math again, keeps their
+entries. Those per-file key lists are saved with the memo, so a process
+that only rescans the files changed since (see SiteBuilder) still knows
+the rest.
+
+Layout (little-endian):
+    header:  magic b"MNMATH\\0\\0", u32 version, 32-byte macro digest, u32 count
+    record:  32-byte key, u16 age (saves since last seen), u32 MathML length,
+             then the UTF-8 MathML
+    then:    u32 file count; per file u16 path length, u32 key count, the
+             UTF-8 path, then a u32 record index per key
+"""
+
+import hashlib
+import json
+import logging
+import mmap
+import os
+import re
+import struct
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from .config import MATH_CACHE
+from .content_fs import get_content_fs
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"MNMATH\0\0"
+VERSION = 2
+_HEADER = struct.Struct("<8sI32sI")
+_RECORD = struct.Struct("<32sHI")
+_COUNT = struct.Struct("<I")
+_FILE = struct.Struct("<HI")
+
+# Saves an entry survives unseen (e.g. an expression edited away)
+MAX_AGE = 8
+
+# MathConverter internals _pipeline drives (latexblocks v0.1.0); a converter
+# without them gets one convert() per request instead
+_PIPELINE_ATTRS = ("_proc", "_spawn", "_next_id")
+
+# (latex, display, alttext) as the converter receives them
+Request = Tuple[str, bool, Optional[str]]
+
+_WHITESPACE_RE = re.compile(r"\s+")
+_COMMENT_RE = re.compile(r"(?<!\\)%.*")
+# Delimiters the dialect turns into math nodes (see PARSING.md)
+_MATH_RE = re.compile(
+    r"\\\[(?P<display>.+?)\\\]|\$\$(?P<double>.+?)\$\$|(?<![\\$])\$(?P<inline>(?:\\.|[^$\\])+?)\$",
+    re.DOTALL,
+)
+_PRE_EXPANSION_RE = re.compile(
+    r"% BEGIN PRE-EXPANSION MACROS\n(.*?)% END PRE-EXPANSION MACROS", re.DOTALL
+)
+_DEF_RE = re.compile(r"^\\def\\([A-Za-z]+)\{(.*)\}\s*$", re.MULTILINE)
+
+
+def normalize(latex: str) -> str:
+    """latex with whitespace runs collapsed, unless a comment makes newlines matter."""
+    latex = latex.strip()
+    if _COMMENT_RE.search(latex):
+        return latex
+    return _WHITESPACE_RE.sub(" ", latex)
+
+
+def _request(latex: str, display: bool, alttext: Optional[str]) -> Tuple[bytes, Request]:
+    """(memo key, normalized request)."""
+    request = (normalize(latex), display, None if alttext is None else normalize(alttext))
+    return hashlib.sha256(json.dumps(request).encode("utf-8")).digest(), request
+
+
+def _file_digest(digest, path: Optional[str]):
+    if path and os.path.isfile(path):
+        with open(path, "rb") as f:
+            digest.update(hashlib.sha256(f.read()).digest())
+    else:
+        digest.update(b"-")
+
+
+def macro_digest(converter) -> bytes:
+    """Digest of everything besides the request that shapes the worker's output."""
+    digest = hashlib.sha256()
+    _file_digest(digest, converter.sty_path)
+    _file_digest(digest, converter.worker_path)
+    node_modules_dir = converter.node_modules_dir or os.getcwd()
+    _file_digest(digest, os.path.join(node_modules_dir, "node_modules", "mathjax", "package.json"))
+    return digest.digest()
+
+
+def math_spans(source: str, pre_expansion: Dict[str, str]) -> List[Tuple[str, bool]]:
+    """(latex, display) for each math span in a content file's source.
+
+    A regex sweep, not the real parse: prefetch only needs most of the
+    math, and whatever it misses or misreads just converts singly later.
+    """
+    source = _COMMENT_RE.sub("", source)
+    for name, body in pre_expansion.items():
+        source = re.sub(rf"\\{name}(?![A-Za-z])", lambda _: body, source)
+    spans = []
+    for match in _MATH_RE.finditer(source):
+        inline = match.group("inline")
+        if inline is not None:
+            spans.append((inline.strip(), False))
+        else:
+            spans.append(((match.group("display") or match.group("double")).strip(), True))
+    return spans
+
+
+def _pre_expansion_macros(sty_path: Optional[str]) -> Dict[str, str]:
+    """The \\def macros latex_processor expands before parsing."""
+    try:
+        sty = Path(sty_path).read_text(encoding="utf-8")
+    except (OSError, TypeError):
+        return {}
+    section = _PRE_EXPANSION_RE.search(sty)
+    return dict(_DEF_RE.findall(section.group(1))) if section else {}
+
+
+class MathCache:
+    """Memoizing stand-in for latexblocks' MathConverter."""
+
+    def __init__(self, converter):
+        self.converter = converter
+        self.digest = macro_digest(converter)
+        self._entries: Dict[bytes, str] = {}
+        self._ages: Dict[bytes, int] = {}
+        self._used = set()
+        # content path -> keys of the math its last scan requested
+        self._file_keys: Dict[str, Set[bytes]] = {}
+        self._collecting: Optional[Dict[bytes, Request]] = None
+        self._scanning: Optional[Set[bytes]] = None
+        # Whether the memo came from disk, so covers the content it was saved with
+        self.restored = False
+        self.hits = 0
+        self.converted = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __getattr__(self, name):
+        # anything else latexblocks reads off its converter
+        if name == "converter":
+            raise AttributeError(name)
+        return getattr(self.converter, name)
+
+    def attach(self, converter):
+        """Front a new converter (configure() replaces it), keeping the memo
+        unless its output would differ."""
+        self.converter = converter
+        digest = macro_digest(converter)
+        if digest != self.digest:
+            self.digest = digest
+            self._entries.clear()
+            self._ages.clear()
+            self._used.clear()
+            self._file_keys.clear()
+            self.restored = False
+
+    def convert(self, latex: str, display: bool, alttext: Optional[str] = None) -> str:
+        key, request = _request(latex, display, alttext)
+        if self._scanning is not None:
+            self._scanning.add(key)
+        mathml = self._entries.get(key)
+        if mathml is not None:
+            self.hits += 1
+            self._used.add(key)
+            return mathml
+        if self._collecting is not None:
+            self._collecting[key] = request
+            return ""
+        mathml = self._convert_one(request)
+        self._store(key, mathml)
+        return mathml
+
+    def _convert_one(self, request: Request) -> str:
+        latex, display, alttext = request
+        if alttext is None:
+            return self.converter.convert(latex, display)
+        return self.converter.convert(latex, display, alttext=alttext)
+
+    def _store(self, key: bytes, mathml: str):
+        self._entries[key] = mathml
+        self._used.add(key)
+        self.converted += 1
+
+    def convert_many(self, requests: Iterable[Request]) -> int:
+        """Convert the requests not yet memoized in one pipelined batch.
+
+        Requests the worker rejects are skipped: the real parse converts
+        them again and reports the error with file:line. Returns how many
+        were converted.
+        """
+        misses = {}
+        for latex, display, alttext in requests:
+            key, request = _request(latex, display, alttext)
+            if key not in self._entries:
+                misses[key] = request
+        if not misses:
+            return 0
+        if all(hasattr(self.converter, name) for name in _PIPELINE_ATTRS):
+            results = self._pipeline(list(misses.values()))
+        else:
+            results = [self._try_convert(request) for request in misses.values()]
+        for key, mathml in zip(misses, results):
+            if mathml is not None:
+                self._store(key, mathml)
+        return sum(mathml is not None for mathml in results)
+
+    def _try_convert(self, request: Request) -> Optional[str]:
+        try:
+            return self._convert_one(request)
+        except Exception:
+            return None  # reported by the real parse, as in _pipeline
+
+    def _pipeline(self, requests: List[Request]) -> List[Optional[str]]:
+        """Stream requests to the converter's worker while reading its
+        replies, rather than one round trip each. Uses the converter's own
+        process, so its ids stay in sequence."""
+        converter = self.converter
+        if converter._proc is None or converter._proc.poll() is not None:
+            converter._spawn()
+        proc = converter._proc
+
+        payloads = []
+        for latex, display, alttext in requests:
+            converter._next_id += 1
+            payload = {"id": converter._next_id, "latex": latex, "display": display}
+            if alttext is not None:
+                payload["alttext"] = alttext
+            payloads.append(payload)
+
+        def feed():
+            try:
+                for payload in payloads:
+                    proc.stdin.write(json.dumps(payload) + "\n")
+                proc.stdin.flush()
+            except OSError:
+                pass  # worker died; the reader sees stdout close
+
+        # A separate writer: replies fill the pipe while requests are still going in
+        writer = threading.Thread(target=feed, daemon=True)
+        writer.start()
+        results: List[Optional[str]] = []
+        for payload in payloads:
+            line = proc.stdout.readline()
+            if not line:
+                converter._proc = None  # the next convert() respawns it
+                break
+            response = json.loads(line)
+            if response.get("id") != payload["id"]:
+                raise RuntimeError(
+                    f"MathML worker protocol desync: sent id {payload['id']}, "
+                    f"got {response.get('id')!r}"
+                )
+            results.append(response.get("mathml"))
+        writer.join()
+        return results + [None] * (len(payloads) - len(results))
+
+    @contextmanager
+    def _scanning_file(self, path: str):
+        """Record the keys requested meanwhile as the math path holds."""
+        self._scanning = set()
+        try:
+            yield
+            self._file_keys[path] = self._scanning
+        finally:
+            self._scanning = None
+
+    def prefetch(self, paths: Iterable[str]) -> int:
+        """Convert the math in these content files (read through the content
+        filesystem) ahead of parsing, in one batch.
+
+        Each span goes through latexblocks' render_math, so notation
+        wrapping and alttext match what the parse will request; the cache
+        records those requests instead of converting. A path that no longer
+        exists drops its math from the content save() keeps fresh. Returns
+        how many expressions were converted.
+        """
+        from latexblocks import mathml
+        from latexblocks.latex_processor import render_math
+
+        if mathml.get_converter() is not self:
+            return 0  # not installed: render_math would convert each span itself
+        fs = get_content_fs()
+        pre_expansion = _pre_expansion_macros(self.converter.sty_path)
+        self._collecting = {}
+        try:
+            for path in paths:
+                try:
+                    source = fs.read_text(path)
+                except (OSError, UnicodeDecodeError):
+                    self._file_keys.pop(path, None)
+                    continue
+                with self._scanning_file(path):
+                    for latex, display in math_spans(source, pre_expansion):
+                        try:
+                            render_math(latex, display)
+                        except Exception:
+                            pass  # best effort: the real parse reports it with file:line
+            collected = list(self._collecting.values())
+        finally:
+            self._collecting = None
+        converted = self.convert_many(collected)
+        if converted:
+            logger.info(f"Converted {converted} new math expressions in one batch")
+        return converted
+
+    def close(self):
+        self.converter.close()
+
+    def load(self, path) -> bool:
+        """Merge the memo saved at path; False when missing or for other macros."""
+        try:
+            with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+                magic, version, digest, count = _HEADER.unpack_from(buf, 0)
+                if magic != MAGIC or version != VERSION or digest != self.digest:
+                    return False
+                entries, ages = {}, {}
+                offset = _HEADER.size
+                for _ in range(count):
+                    key, age, length = _RECORD.unpack_from(buf, offset)
+                    offset += _RECORD.size
+                    entries[key] = buf[offset:offset + length].decode("utf-8")
+                    ages[key] = age
+                    offset += length
+                keys = list(entries)
+                file_keys = {}
+                (files,) = _COUNT.unpack_from(buf, offset)
+                offset += _COUNT.size
+                for _ in range(files):
+                    path_len, key_count = _FILE.unpack_from(buf, offset)
+                    offset += _FILE.size
+                    file_path = buf[offset:offset + path_len].decode("utf-8")
+                    offset += path_len
+                    indexes = struct.unpack_from(f"<{key_count}I", buf, offset)
+                    offset += 4 * key_count
+                    file_keys[file_path] = {keys[i] for i in indexes}
+        except (OSError, ValueError, IndexError, struct.error, UnicodeDecodeError):
+            return False
+        for key, mathml in entries.items():
+            self._entries.setdefault(key, mathml)
+            self._ages.setdefault(key, ages[key])
+        for file_path, keys in file_keys.items():
+            self._file_keys.setdefault(file_path, keys)
+        self.restored = True
+        return True
+
+    def save(self, path):
+        """Write the memo to path (atomically), aging entries that neither a
+        scanned content file holds nor this process looked up since the last
+        save."""
+        path = Path(path)
+        fs = get_content_fs()
+        self._file_keys = {p: keys for p, keys in self._file_keys.items() if fs.is_file(p)}
+        seen = self._used.union(*self._file_keys.values())
+        parts = [b""]
+        kept = {}
+        for key, mathml in self._entries.items():
+            age = 0 if key in seen else self._ages.get(key, 0) + 1
+            if age > MAX_AGE:
+                continue
+            kept[key] = age
+            encoded = mathml.encode("utf-8")
+            parts.append(_RECORD.pack(key, age, len(encoded)))
+            parts.append(encoded)
+        parts[0] = _HEADER.pack(MAGIC, VERSION, self.digest, len(kept))
+        index = {key: i for i, key in enumerate(kept)}
+        parts.append(_COUNT.pack(len(self._file_keys)))
+        for file_path, keys in self._file_keys.items():
+            encoded = file_path.encode("utf-8")
+            indexes = sorted(index[key] for key in keys if key in index)
+            parts.append(_FILE.pack(len(encoded), len(indexes)))
+            parts.append(encoded)
+            parts.append(struct.pack(f"<{len(indexes)}I", *indexes))
+
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(path.name + ".tmp")
+        tmp.write_bytes(b"".join(parts))
+        os.replace(tmp, path)
+        self._entries = {key: self._entries[key] for key in kept}
+        self._ages = kept
+        self._used.clear()
+
+
+_cache: Optional[MathCache] = None
+
+
+def install_math_cache() -> MathCache:
+    """Put the shared MathCache in front of latexblocks' converter.
+
+    latexblocks.configure() resets its converter singleton, so this runs
+    after each configure (see configure_latexblocks). The memo outlives
+    those resets. A latexblocks without the _converter singleton gets an
+    uninstalled cache, so math converts as if there were none.
+    """
+    global _cache
+    from latexblocks import mathml
+
+    converter = mathml.get_converter()
+    if isinstance(converter, MathCache):
+        return converter
+    if not hasattr(mathml, "_converter"):
+        logger.warning("latexblocks has no converter singleton to front; math is not memoized")
+        return MathCache(converter)
+    if _cache is None:
+        _cache = MathCache(converter)
+        if MATH_CACHE and _cache.load(MATH_CACHE):
+            logger.info(f"Loaded {len(_cache)} memoized math expressions from {MATH_CACHE}")
+    else:
+        _cache.attach(converter)
+    # render_math looks the singleton up through get_converter() on every call
+    mathml._converter = _cache
+    return _cache
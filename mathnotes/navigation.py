@@ -6,74 +6,57 @@ Provides a tree-style navigation structure like Windows Explorer.
 
 from pathlib import Path
 from typing import Dict, List, Any
-from latexblocks.content_loader import load_content_file
 
 # Module-level caches
-_title_cache: Dict[str, str] = {}
 _folder_pages_cache: Dict[str, List[Dict[str, Any]]] = {}
 _nav_tree_cache: Dict[str, Dict[str, Any]] = {}
 
 
 def clear_navigation_cache():
     """Clear all navigation caches. Call when content changes."""
-    _title_cache.clear()
     _folder_pages_cache.clear()
     _nav_tree_cache.clear()
 
 
-def get_page_title(file_path: Path) -> str:
-    """Get the title from a content file's metadata, or derive from filename."""
-    cache_key = str(file_path)
-    if cache_key in _title_cache:
-        return _title_cache[cache_key]
-
-    title = file_path.stem.replace("-", " ").title()
-    try:
-        metadata, _ = load_content_file(file_path)
-        fm_title = (metadata.get("title") or "").strip()
-        if fm_title:
-            title = fm_title
-    except Exception:
-        pass
-
-    _title_cache[cache_key] = title
-    return title
-
-
-def get_pages_in_folder(folder_path: Path, file_to_canonical: Dict[str, str]) -> List[Dict[str, Any]]:
+def get_pages_in_folder(folder_path: Path, url_mapper) -> List[Dict[str, Any]]:
     """
     Get all content pages in a folder, sorted alphabetically by filename.
 
+    Read from the discovery catalog (url_mapper.get_folder), not the disk.
+
     Returns list of dicts with: url, title, filename, file_path
     """
     cache_key = str(folder_path)
     if cache_key in _folder_pages_cache:
         return _folder_pages_cache[cache_key]
 
-    pages = []
-
-    if not folder_path.exists() or not folder_path.is_dir():
-        _folder_pages_cache[cache_key] = pages
-        return pages
+    folder = url_mapper.get_folder(str(folder_path))
+    pages = [
+        {
+            "url": f"/mathnotes/{url_mapper.file_to_canonical[file_path]}",
+            "title": url_mapper.titles[file_path],
+            "filename": file_path.rsplit("/", 1)[-1].lower(),
+            "file_path": file_path,
+        }
+        for file_path in (folder["pages"] if folder else [])
+    ]
 
-    for item in folder_path.iterdir():
-        if item.is_file() and item.suffix == ".tex":
-            file_path_str = str(item.relative_to(Path("."))).replace("\\", "/")
-            canonical_url = file_to_canonical.get(file_path_str)
-
-            if canonical_url:
-                pages.append({
-                    "url": f"/mathnotes/{canonical_url}",
-                    "title": get_page_title(item),
-                    "filename": item.name.lower(),
-                    "file_path": file_path_str,
-                })
-
-    pages.sort(key=lambda x: x["filename"])
     _folder_pages_cache[cache_key] = pages
     return pages
 
 
+def visible_subfolders(folder: Dict[str, Any]) -> List[tuple]:
+    """(name, node) for a catalog folder's subfolders, skipping hidden ones."""
+    return sorted(
+        [
+            (name, node)
+            for name, node in folder["folders"].items()
+            if not name.startswith(".") and not name.startswith("__")
+        ],
+        key=lambda x: x[0].lower(),
+    )
+
+
 def get_content_root(file_path: Path) -> Path:
     """Get the content/ folder."""
     parts = file_path.parts
@@ -83,7 +66,7 @@ def get_content_root(file_path: Path) -> Path:
     return file_path.parent
 
 
-def build_nav_tree(section_path: Path, current_file: Path, file_to_canonical: Dict[str, str]) -> Dict[str, Any]:
+def build_nav_tree(section_path: Path, current_file: Path, url_mapper) -> Dict[str, Any]:
     """
     Build a tree structure for the entire section.
 
@@ -91,11 +74,11 @@ def build_nav_tree(section_path: Path, current_file: Path, file_to_canonical: Di
     """
     current_file_str = str(current_file).replace("\\", "/")
 
-    def build_level(folder: Path) -> List[Dict[str, Any]]:
+    def build_level(folder: Path, node: Dict[str, Any]) -> List[Dict[str, Any]]:
         items = []
 
         # Get pages in this folder
-        for page in get_pages_in_folder(folder, file_to_canonical):
+        for page in get_pages_in_folder(folder, url_mapper):
             items.append({
                 "type": "page",
                 "title": page["title"],
@@ -104,13 +87,9 @@ def build_nav_tree(section_path: Path, current_file: Path, file_to_canonical: Di
             })
 
         # Get subfolders
-        subfolders = sorted(
-            [f for f in folder.iterdir() if f.is_dir() and not f.name.startswith(".") and not f.name.startswith("__")],
-            key=lambda x: x.name.lower()
-        )
-
-        for subfolder in subfolders:
-            children = build_level(subfolder)
+        for name, child in visible_subfolders(node):
+            subfolder = folder / name
+            children = build_level(subfolder, child)
             if children:
                 # Check if current file is inside this subfolder
                 try:
@@ -121,26 +100,27 @@ def build_nav_tree(section_path: Path, current_file: Path, file_to_canonical: Di
 
                 items.append({
                     "type": "folder",
-                    "name": subfolder.name.replace("-", " ").title(),
+                    "name": name.replace("-", " ").title(),
                     "expanded": is_ancestor,
                     "children": children,
                 })
 
         return items
 
+    root = url_mapper.get_folder(str(section_path))
     return {
         "name": section_path.name.replace("-", " ").title(),
-        "children": build_level(section_path),
+        "children": build_level(section_path, root) if root else [],
     }
 
 
-def get_page_navigation(file_path: str, file_to_canonical: Dict[str, str]) -> Dict[str, Any]:
+def get_page_navigation(file_path: str, url_mapper) -> Dict[str, Any]:
     """
     Build navigation context for a content page.
 
     Args:
         file_path: Path to the content file (e.g., "content/algebra/linear/dotproduct.tex")
-        file_to_canonical: Mapping of file paths to canonical URLs
+        url_mapper: ContentDiscovery holding the content catalog
 
     Returns:
         Dict with:
@@ -153,7 +133,7 @@ def get_page_navigation(file_path: str, file_to_canonical: Dict[str, str]) -> Di
     current_filename = path.name.lower()
 
     # Get all pages in the current folder for prev/next
-    pages_in_folder = get_pages_in_folder(current_folder, file_to_canonical)
+    pages_in_folder = get_pages_in_folder(current_folder, url_mapper)
 
     # Find current page index
     current_index = -1
@@ -176,7 +156,7 @@ def get_page_navigation(file_path: str, file_to_canonical: Dict[str, str]) -> Di
 
     # Build tree from content root (shows all sections)
     content_root = get_content_root(path)
-    tree = build_nav_tree(content_root, path, file_to_canonical)
+    tree = build_nav_tree(content_root, path, url_mapper)
 
     return {
         "prev_page": prev_page,
@@ -0,0 +1,104 @@
+"""
+Reverse reference graph shared by the block index pages.
+
+The block index's reverse index answers "who references this label?" one
+label at a time. The listing pages need that answer, plus its transitive
+closure, for every labeled block, so the graph is compiled once per build
+into integer-indexed CSR arrays and every depth of the closure is swept
+for all blocks at once using int bitsets (bit i = block i).
+"""
+
+from array import array
+from typing import Any, Dict, List, Tuple
+
+
+class ReferenceGraph:
+    """Who-references-whom over labeled blocks, with closures to max_depth.
+
+    Compiled lazily on first use; call invalidate() after the block index
+    is rebuilt.
+    """
+
+    def __init__(self, block_index, max_depth: int = 2):
+        self.block_index = block_index
+        self.max_depth = max_depth
+        self._compiled = False
+
+    def invalidate(self):
+        self._compiled = False
+
+    def _compile(self):
+        # Synonyms map extra keys to the same BlockReference; index each
+        # block once, under its own label
+        refs = {}
+        for ref in self.block_index.index.values():
+            if ref.block.label:
+                refs.setdefault(ref.block.label, ref)
+        self.labels: List[str] = sorted(refs)
+        self.block_refs = [refs[label] for label in self.labels]
+        ids = {label: i for i, label in enumerate(self.labels)}
+
+        # CSR: referrers of block i are indices[indptr[i]:indptr[i + 1]].
+        # Page-level references have no source block and stay direct-only.
+        self.direct: List[List[Any]] = []
+        indptr = array("i", [0])
+        indices = array("i")
+        for label in self.labels:
+            entry = self.block_index.reverse_index.get_references_for_label(label)
+            self.direct.append(entry.direct_references)
+            referrers = {ids[r.source_label] for r in entry.direct_references
+                         if getattr(r, "source_label", None) in ids}
+            indices.extend(sorted(referrers))
+            indptr.append(len(indices))
+        self.indptr, self.indices = indptr, indices
+
+        # levels[d][i]: bitset of blocks exactly d hops upstream of block i
+        # (first reached at that depth, never i itself)
+        n = len(self.labels)
+        seen = [1 << i for i in range(n)]
+        frontier = [0] * n
+        for i in range(n):
+            for j in indices[indptr[i]:indptr[i + 1]]:
+                frontier[i] |= 1 << j
+        self.levels: Dict[int, List[int]] = {}
+        for depth in range(1, self.max_depth + 1):
+            new = [frontier[i] & ~seen[i] for i in range(n)]
+            self.levels[depth] = new
+            for i in range(n):
+                seen[i] |= new[i]
+            if depth == self.max_depth:
+                break
+            # one sweep over the edges: referrers-of-referrers
+            frontier = [0] * n
+            for i in range(n):
+                for j in indices[indptr[i]:indptr[i + 1]]:
+                    frontier[i] |= new[j]
+
+        self._ids = ids
+        self._compiled = True
+
+    def _members(self, bits: int) -> List[Any]:
+        out = []
+        while bits:
+            low = bits & -bits
+            out.append(self.block_refs[low.bit_length() - 1])
+            bits ^= low
+        return out
+
+    def references_for(self, label: str) -> Tuple[List[Any], Dict[int, List[Any]]]:
+        """(direct references, {depth: [BlockReference, ...]}) for label.
+
+        Direct references are the reverse index's own records (blocks and
+        pages); transitive ones, depth 2 and up, are the referring blocks.
+        """
+        if not self._compiled:
+            self._compile()
+        i = self._ids.get(label)
+        if i is None:
+            return [], {}
+        transitive = {}
+        for depth in range(2, self.max_depth + 1):
+            members = self._members(self.levels[depth][i])
+            if members:
+                transitive[depth] = members
+        return self.direct[i], transitive
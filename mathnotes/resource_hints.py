@@ -0,0 +1,109 @@
+"""
+Build-time resource hints for content pages.
+
+Each content page gets a short, ranked list of what a reader is likely to
+need next, emitted by page.html as <link rel="preload"> (this page's first
+figure) and <link rel="prefetch"> (pages a reader tends to go to):
+
+1. the page's first image, needed to finish painting this page
+2. the next page in its folder (the nav arrow)
+3. pages this page references blocks from, most-referenced first
+4. the previous page
+
+Hints are taken in that order, skipping any that would push the page past
+its byte budget (PREFETCH_BUDGET_BYTES), so no visit downloads more than
+the budget in the background. A page's size is estimated without
+rendering it: its content and tooltip JSON plus a fixed allowance for the
+templates around them, which keeps hints (and so the pages that carry
+them) stable from build to build. Image sizes come from the content
+filesystem.
+"""
+
+import re
+from collections import Counter
+from typing import Any, Dict, Iterable, List, Optional
+
+from .config import PREFETCH_BUDGET_BYTES
+from .content_fs import get_content_fs
+
+# Content images, as the renderer emits them (served from content/ copies)
+IMG_SRC_RE = re.compile(r'<img\b[^>]*?\bsrc="/mathnotes/([^"#?]+)"')
+
+MAX_HINTS = 6
+
+# What base.html and page.html add around a page's content and tooltip JSON
+# (head, sidebar navigation, footer), roughly, as rendered
+PAGE_OVERHEAD_BYTES = 12_000
+
+
+def referenced_pages(labels: Iterable[str], block_index, own_url: str) -> Counter:
+    """How many of labels live on each other page, by page URL."""
+    counts = Counter()
+    for label in labels:
+        ref = block_index.index.get(label)
+        full_url = getattr(ref, "full_url", "") if ref is not None else ""
+        page_url = full_url.split("#", 1)[0]
+        if page_url and page_url != own_url:
+            counts[page_url] += 1
+    return counts
+
+
+def estimated_page_size(content: str, tooltip_data: str) -> int:
+    """Bytes a content page's HTML comes to, from its content and tooltip JSON."""
+    return len(content.encode("utf-8")) + len(tooltip_data.encode("utf-8")) + PAGE_OVERHEAD_BYTES
+
+
+def _image_size(relative_path: str) -> Optional[int]:
+    return get_content_fs().size(f"content/{relative_path}")
+
+
+def page_resource_hints(
+    url: str,
+    content: str,
+    navigation: Dict[str, Any],
+    references: Counter,
+    page_sizes: Dict[str, int],
+    budget: int = PREFETCH_BUDGET_BYTES,
+) -> List[Dict[str, str]]:
+    """Ranked hints for one page: [{"rel", "href", "as"}], within budget.
+
+    Args:
+        url: The page's own URL ("/mathnotes/algebra/groups/")
+        content: The page's rendered content HTML
+        navigation: get_page_navigation() result (prev_page/next_page)
+        references: referenced_pages() for this page
+        page_sizes: estimated_page_size() of every content page, by URL
+        budget: Total bytes the hints may ask the browser to fetch
+    """
+    candidates = []  # (rel, href, as, size)
+
+    image = IMG_SRC_RE.search(content)
+    if image:
+        size = _image_size(image.group(1))
+        if size is not None:
+            candidates.append(("preload", f"/mathnotes/{image.group(1)}", "image", size))
+
+    ranked = []
+    if navigation.get("next_page"):
+        ranked.append(navigation["next_page"]["url"])
+    ranked.extend(
+        page for page, _ in sorted(references.items(), key=lambda item: (-item[1], item[0]))
+    )
+    if navigation.get("prev_page"):
+        ranked.append(navigation["prev_page"]["url"])
+    for page in ranked:
+        if page in page_sizes:
+            candidates.append(("prefetch", page, "document", page_sizes[page]))
+
+    hints = []
+    seen = {url}
+    spent = 0
+    for rel, href, as_, size in candidates:
+        if href in seen or spent + size > budget:
+            continue
+        seen.add(href)
+        spent += size
+        hints.append({"rel": rel, "href": href, "as": as_})
+        if len(hints) == MAX_HINTS:
+            break
+    return hints
@@ -0,0 +1,82 @@
+"""
+Service worker and precache manifest, generated from the build outputs.
+
+After the pages and static assets are in place, the build writes:
+
+- sw-manifest.json: what the worker precaches at install (the hashed
+  bundles from static/dist/manifest.json, less the per-demo chunks only
+  pages embedding that demo load, plus the unhashed latexblocks assets,
+  revisioned by content hash) and the revision of every page, from the
+  deploy manifest's hashes
+- sw.js: the worker (templates/sw.js), which embeds the manifest's own
+  revision so browsers install a new worker whenever anything changed
+
+The worker serves a page from its cache with no network request while the
+cached revision matches, and stale-while-revalidate otherwise.
+"""
+
+import hashlib
+import json
+from pathlib import Path
+from typing import Dict, List
+
+from .config import SW_CORE_PAGES
+from .demo_bundles import load_demo_manifest
+
+MANIFEST_NAME = "sw-manifest.json"
+WORKER_NAME = "sw.js"
+
+# Loaded by every page (templates/base.html) but not content-hashed by esbuild
+UNHASHED_ASSETS = ("latexblocks.css", "latexblocks.js")
+
+
+def _revision(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()[:16]
+
+
+def precache_manifest(
+    output_dir: Path, deploy_manifest: dict, core_pages: List[str] = SW_CORE_PAGES
+) -> dict:
+    """The precache manifest for a finished build in output_dir."""
+    dist = output_dir / "static" / "dist"
+    precache: List[Dict[str, str]] = []
+
+    asset_manifest = json.loads((dist / "manifest.json").read_text(encoding="utf-8"))
+    # Demo chunks load on the pages that embed them (see demo_bundles)
+    demo_manifest = load_demo_manifest(dist / "demo-manifest.json") or {"demos": {}}
+    demo_files = {bundle["file"] for bundle in demo_manifest["demos"].values()}
+    for hashed in sorted(set(asset_manifest.values()) - demo_files):
+        # the filename carries the hash; no separate revision needed
+        precache.append({"url": f"/static/dist/{hashed}", "revision": None})
+    for name in UNHASHED_ASSETS:
+        path = dist / name
+        if path.is_file():
+            precache.append(
+                {"url": f"/static/dist/{name}", "revision": _revision(path.read_bytes())}
+            )
+
+    pages = {
+        path: entry["sha256"][:16]
+        for path, entry in deploy_manifest["pages"].items()
+        if entry["output"].endswith("index.html")
+    }
+    manifest = {
+        "precache": precache,
+        "core_pages": [path for path in core_pages if path in pages],
+        "pages": pages,
+    }
+    manifest["revision"] = _revision(json.dumps(manifest, sort_keys=True).encode("utf-8"))
+    return manifest
+
+
+def write_service_worker(output_dir: Path, generator, deploy_manifest: dict) -> dict:
+    """Write sw-manifest.json and sw.js at the root of output_dir."""
+    manifest = precache_manifest(output_dir, deploy_manifest)
+    (output_dir / MANIFEST_NAME).write_text(
+        json.dumps(manifest, separators=(",", ":")), encoding="utf-8"
+    )
+    worker = generator.render_template(
+        WORKER_NAME, revision=manifest["revision"], manifest_url=f"/{MANIFEST_NAME}"
+    )
+    (output_dir / WORKER_NAME).write_text(worker, encoding="utf-8")
+    return manifest
@@ -0,0 +1,101 @@
+"""Single-file site archive output.
+
+Instead of thousands of small files, SiteBuilder(archive_path=...) writes
+the whole site into one indexed file that server/site_archive.py serves
+with mmap. Swapping a deploy is one rename, and copying it is one inode.
+
+Layout (little-endian), shared with server/site_archive.py:
+    header:  magic b"MNSITE\\0\\0", u32 version, u32 entry count, u64 index offset
+    blobs:   each file's bytes, then its gzip encoding when that is smaller
+    index:   per entry, sorted by path: u16 path len, u64 offset, u64 length,
+             u64 gzip offset, u64 gzip length (0 = no gzip variant),
+             then the UTF-8 path relative to the site root
+"""
+
+import gzip
+import hashlib
+import os
+import posixpath
+import struct
+from pathlib import Path
+
+MAGIC = b"MNSITE\0\0"
+VERSION = 1
+_HEADER = struct.Struct("<8sIIQ")
+_ENTRY = struct.Struct("<HQQQQ")
+
+# Worth storing precompressed; images and fonts are compressed already
+COMPRESSIBLE = {".html", ".xml", ".txt", ".css", ".js", ".mjs", ".json", ".map", ".svg"}
+_MIN_COMPRESS = 256
+
+
+def site_path(path: str) -> str:
+    """The archive key for a path: relative to the site root, with no empty
+    or "." segments (content page outputs come as "mathnotes/x//index.html")."""
+    return posixpath.normpath("/" + path.replace("\\", "/")).lstrip("/")
+
+
+class ArchiveWriter:
+    """Streams files into an archive; the index is written by close()."""
+
+    def __init__(self, path, compress: bool = True):
+        self.path = Path(path)
+        self.compress = compress
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = open(self.path, "wb")
+        self._file.write(_HEADER.pack(MAGIC, VERSION, 0, 0))  # rewritten by close()
+        self._entries = {}  # site path -> (offset, length, gzip offset, gzip length)
+        self.digests = {}  # site path -> SHA-256 of its bytes, for the deploy manifest
+        self.size = 0  # uncompressed bytes, for the build report
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def add(self, path: str, data: bytes):
+        """Store data at path (relative to the site root); a later add wins."""
+        path = site_path(path)
+        previous = self._entries.get(path)
+        if previous is not None:
+            self.size -= previous[1]
+
+        offset = self._file.tell()
+        self._file.write(data)
+        gz_offset = gz_length = 0
+        if (
+            self.compress
+            and len(data) >= _MIN_COMPRESS
+            and Path(path).suffix.lower() in COMPRESSIBLE
+        ):
+            # mtime=0 keeps identical builds byte-identical
+            packed = gzip.compress(data, compresslevel=9, mtime=0)
+            if len(packed) < len(data):
+                gz_offset, gz_length = self._file.tell(), len(packed)
+                self._file.write(packed)
+        self._entries[path] = (offset, len(data), gz_offset, gz_length)
+        self.digests[path] = hashlib.sha256(data).hexdigest()
+        self.size += len(data)
+
+    def add_tree(self, root):
+        """Add every file under root, keeping its path relative to root."""
+        root = Path(root)
+        for dirpath, dirnames, filenames in os.walk(root):
+            dirnames.sort()
+            for name in sorted(filenames):
+                full = Path(dirpath) / name
+                self.add(full.relative_to(root).as_posix(), full.read_bytes())
+
+    def close(self):
+        """Write the index and header; the archive is complete afterwards."""
+        index_offset = self._file.tell()
+        for path in sorted(self._entries):
+            encoded = path.encode("utf-8")
+            self._file.write(_ENTRY.pack(len(encoded), *self._entries[path]))
+            self._file.write(encoded)
+        self._file.seek(0)
+        self._file.write(_HEADER.pack(MAGIC, VERSION, len(self._entries), index_offset))
+        self._file.close()
+
+    def abort(self):
+        """Discard a partly written archive."""
+        self._file.close()
+        self.path.unlink(missing_ok=True)
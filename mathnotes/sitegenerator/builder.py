@@ -1,6 +1,11 @@
 """Refactored builder using page-centric architecture."""
 
+import ctypes
+import errno
+import hashlib
+import json
 import logging
+import os
 import shutil
 from pathlib import Path
 
@@ -8,50 +13,132 @@ from .core import StaticSiteGenerator
 from .router import Router
 from .context import build_global_context
 from .pages import PageRegistry
+from .archive import ArchiveWriter
 
 from mathnotes.content_discovery import ContentDiscovery
+from mathnotes.navigation import clear_navigation_cache
+from mathnotes.reference_graph import ReferenceGraph
+from mathnotes.sources import Bibliography
 from latexblocks.page_renderer import PageRenderer
 from latexblocks.block_index import BlockIndex
 from latexblocks.assets import copy_web_assets
-from mathnotes.config import BASE_URL
+from mathnotes.config import BASE_URL, CATALOG_SNAPSHOT, FONT_SUBSETTING, MATH_CACHE, SERVICE_WORKER
+from mathnotes.catalog_snapshot import changed_since_snapshot, restore_catalog, save_catalog
+from mathnotes.content_fs import get_content_fs, set_content_fs
+from mathnotes.demo_bundles import js_report, load_demo_manifest, summarize
+from mathnotes.deploy_manifest import (
+    MANIFEST_NAME, build_manifest, file_entries, page_entry, write_manifest,
+)
+from mathnotes.font_subset import subset_web_fonts
+from mathnotes.service_worker import write_service_worker
 
 logger = logging.getLogger(__name__)
 
 
+# renameat2(2): swap two paths in one step (Linux 3.15+, glibc 2.28+)
+_AT_FDCWD = -100
+_RENAME_EXCHANGE = 2
+
+
+def _exchange(a: Path, b: Path) -> bool:
+    """Atomically swap two existing paths; False where the platform or
+    filesystem can't, OSError when the swap itself fails."""
+    try:
+        renameat2 = ctypes.CDLL(None, use_errno=True).renameat2
+    except (AttributeError, OSError, TypeError):
+        return False
+    if renameat2(_AT_FDCWD, os.fsencode(a), _AT_FDCWD, os.fsencode(b), _RENAME_EXCHANGE) == 0:
+        return True
+    err = ctypes.get_errno()
+    if err in (errno.ENOSYS, errno.EINVAL):
+        return False
+    raise OSError(err, os.strerror(err), str(a), None, str(b))
+
+
+class BuildCancelled(Exception):
+    """Raised inside build() once its cancel event is set (a newer build supersedes it)."""
+
+
 class SiteBuilder:
     """Simplified site builder using page registry pattern."""
 
-    def __init__(self, output_dir: str = "static-build"):
+    def __init__(
+        self,
+        output_dir: str = "static-build",
+        page_store=None,
+        archive_path: str = None,
+        content_fs=None,
+    ):
         """Initialize the site builder.
 
         Args:
             output_dir: Directory for output files
+            page_store: Optional PageStore that every build also publishes
+                its rendered pages to (see render_to_store)
+            archive_path: Write the site as one archive file here (see
+                archive.py) instead of a tree under output_dir
+            content_fs: ContentFS to read content from (see content_fs);
+                defaults to the working tree. It must be on disk:
+                latexblocks loads pages from the disk regardless, so any
+                other revision would be mixed with the working tree's.
         """
         from mathnotes.config import configure_latexblocks
+        from mathnotes.math_cache import install_math_cache
+        self.content_fs = content_fs if content_fs is not None else get_content_fs()
+        if not self.content_fs.on_disk:
+            raise ValueError(
+                f"SiteBuilder needs content on disk, not {type(self.content_fs).__name__}; "
+                "latexblocks renders pages from the working tree"
+            )
         configure_latexblocks()
+        if content_fs is not None:
+            set_content_fs(content_fs)
 
         self.output_dir = Path(output_dir)
         self.base_url = BASE_URL
+        self.page_store = page_store
+        self.archive_path = Path(archive_path) if archive_path else None
 
         # Initialize core generator
         self.generator = StaticSiteGenerator(
             template_dir="templates", output_dir=str(self.output_dir), base_url=self.base_url
         )
 
+        # Convert the site's math in one batch before anything parses it.
+        # A memo restored alongside the catalog snapshot already holds the
+        # math of every file unchanged since, so only the rest is scanned.
+        self.math_cache = install_math_cache()
+        changed = None
+        if self.math_cache.restored and CATALOG_SNAPSHOT:
+            changed = changed_since_snapshot(CATALOG_SNAPSHOT)
+        if changed is None:
+            self.math_cache.prefetch(self.content_fs.files("content", ".tex"))
+        else:
+            self.math_cache.prefetch(path for path in changed if path.endswith(".tex"))
+
         # Initialize data components first
         self.url_mapper = ContentDiscovery()
-        self.url_mapper.build_url_mappings()
+        if not (CATALOG_SNAPSHOT and restore_catalog(self.url_mapper, CATALOG_SNAPSHOT)):
+            self.url_mapper.build_url_mappings()
 
         self.block_index = BlockIndex(self.url_mapper)
         self.block_index.build_index()
 
         self.page_renderer = PageRenderer(self.url_mapper, self.block_index)
 
+        # Reverse reference closure shared by the definition/theorem indexes
+        self.reference_graph = ReferenceGraph(self.block_index, max_depth=2)
+
+        # Per-page source records, merged incrementally across rebuilds
+        self.bibliography = Bibliography()
+
         # Build site context for pages
         site_context = {
             "url_mapper": self.url_mapper,
             "block_index": self.block_index,
             "page_renderer": self.page_renderer,
+            "reference_graph": self.reference_graph,
+            "bibliography": self.bibliography,
             "base_url": self.base_url,
             "generator": self.generator,
         }
@@ -66,6 +153,20 @@ class SiteBuilder:
         # Add url_for to template globals
         self.generator.add_global("url_for", self._url_for)
 
+        # output_path -> (render key, html) from the last build
+        self._render_cache = {}
+
+        # threading.Event checked between pages while build() runs
+        self._cancel = None
+
+        # Page hashes of the last render_all_pages, plus every other
+        # published file's once build() finishes (see deploy_manifest)
+        self.deploy_manifest = None
+
+        # Demos and module JS bytes per page of the last render_all_pages
+        # (see demo_bundles); None without a built JS bundle
+        self.js_report = None
+
         logger.info(f"Initialized site builder: output={output_dir}")
 
     def _url_for(self, endpoint: str, **kwargs) -> str:
@@ -94,6 +195,52 @@ class SiteBuilder:
         # Unknown endpoint
         raise ValueError(f"Unknown endpoint: {endpoint}")
 
+    def _check_cancelled(self):
+        if self._cancel is not None and self._cancel.is_set():
+            raise BuildCancelled()
+
+    def _set_output_dir(self, path: Path):
+        self.output_dir = path
+        self.generator.output_dir = path
+
+    def _publish(self, staging: Path, final: Path):
+        """Swap the finished staging tree in for the live one.
+
+        On Linux the swap is a single renameat2(RENAME_EXCHANGE), so a
+        reader of final sees the old tree or the new one and never a gap.
+        Elsewhere it takes two renames, and final is briefly missing between
+        them. When final can't be renamed at all (e.g. it is a mount point),
+        its contents are replaced in place, which is not atomic: readers can
+        see a partial tree while files move.
+        """
+        if not final.exists():
+            os.rename(staging, final)
+            return
+        try:
+            if _exchange(staging, final):
+                shutil.rmtree(staging)  # now the previous tree
+                return
+            old = final.with_name(final.name + ".old")
+            if old.exists():
+                shutil.rmtree(old)
+            os.rename(final, old)
+            try:
+                os.rename(staging, final)
+            except OSError:
+                os.rename(old, final)
+                raise
+            shutil.rmtree(old, ignore_errors=True)
+        except OSError as e:
+            logger.warning(f"Could not swap {staging} into place ({e}); copying, not atomically")
+            for child in final.iterdir():
+                if child.is_dir() and not child.is_symlink():
+                    shutil.rmtree(child)
+                else:
+                    child.unlink()
+            for child in staging.iterdir():
+                shutil.move(str(child), str(final / child.name))
+            shutil.rmtree(staging)
+
     def clean_output_dir(self):
         """Clean the output directory."""
         if self.output_dir.exists():
@@ -114,35 +261,232 @@ class SiteBuilder:
             for label, ref in self.block_index.index.items()
         }
 
-        global_context = build_global_context(base_url=self.base_url, tooltip_data=tooltip_data, is_development=False)
+        global_context = build_global_context(
+            base_url=self.base_url, tooltip_data=tooltip_data, is_development=False
+        )
 
         # Add global context to generator
         for key, value in global_context.items():
             self.generator.add_global(key, value)
+        self.generator.add_global("service_worker", SERVICE_WORKER)
+
+    def _globals_fingerprint(self) -> dict:
+        """Digest of each template global, so reuse notices e.g. new asset URLs."""
+        return {
+            key: hashlib.sha256(repr(value).encode("utf-8")).hexdigest()
+            for key, value in self.generator.global_context.items()
+            if not callable(value)
+        }
+
+    def _templates_fingerprint(self, template_name: str) -> str:
+        """Digest of the templates a page's template extends, includes or imports."""
+        digest = hashlib.sha256()
+        for name in sorted(self.generator.template_dependencies(template_name)):
+            path = self.generator.template_dir / name
+            digest.update(f"{name}:{path.stat().st_mtime_ns}".encode("utf-8"))
+        return digest.hexdigest()
+
+    @staticmethod
+    def _context_hash(spec) -> str:
+        """Content hash for specs that don't set one, when their context is
+        plain data (content pages, sitemap, static pages); "" otherwise."""
+        try:
+            payload = json.dumps(
+                [spec.title, spec.description, spec.context], sort_keys=True, ensure_ascii=False
+            )
+        except (TypeError, ValueError):
+            return ""
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def render_all_pages(self, write: bool = True) -> dict:
+        """Render all pages using the page registry.
+
+        A spec reuses the HTML rendered for the same output path last build
+        when neither its content hash (its own, or one derived from a
+        plain-data context), the templates its template depends on, nor the
+        globals it doesn't shadow have changed. So editing one template only
+        re-renders the pages built from it.
 
-    def render_all_pages(self):
-        """Render all pages using the page registry."""
+        Args:
+            write: Write each page under output_dir (False: render only)
+
+        Returns:
+            {output_path: html} for every page
+        """
         # Get all page specifications
         all_specs = self.page_registry.get_all_specs()
 
         logger.info(f"Rendering {len(all_specs)} pages...")
 
+        global_digests = self._globals_fingerprint()
+        template_digests = {}
+        reused = 0
+        pages = {}
+        manifest_pages = {}
+        demos_by_page = {}
+
         for page, spec in all_specs:
-            # Build context for rendering
-            context = {"title": spec.title, "description": spec.description, **spec.context}
+            self._check_cancelled()
+            html, was_reused = self._render_spec(spec, global_digests, template_digests)
+            if write:
+                self.generator.write_page(spec.output_path, html)
+            pages[spec.output_path] = html
+            manifest_pages[page.get_canonical_path(spec)] = page_entry(spec.output_path, html)
+            demos_by_page[page.get_canonical_path(spec)] = spec.context.get("demos", [])
+            reused += was_reused
+
+        # forget outputs that no longer exist (e.g. a letter's last block went away)
+        live = {spec.output_path for _, spec in all_specs}
+        for output_path in list(self._render_cache):
+            if output_path not in live:
+                del self._render_cache[output_path]
+
+        if reused:
+            logger.info(f"Reused {reused} unchanged pages from the previous build")
+        self.deploy_manifest = build_manifest(manifest_pages, self.base_url)
+        demo_manifest = load_demo_manifest()
+        if demo_manifest is not None:
+            self.js_report = js_report(demos_by_page, demo_manifest)
+            logger.info(summarize(self.js_report))
+        return pages
+
+    def _render_spec(self, spec, global_digests: dict, template_digests: dict) -> tuple:
+        """(html, reused) for one spec, from the render cache when still valid."""
+        # Build context for rendering
+        context = {"title": spec.title, "description": spec.description, **spec.context}
+
+        render_key = None
+        content_hash = spec.content_hash or self._context_hash(spec)
+        if content_hash:
+            if spec.template not in template_digests:
+                template_digests[spec.template] = self._templates_fingerprint(spec.template)
+            render_key = (
+                content_hash,
+                spec.template,
+                template_digests[spec.template],
+                tuple(sorted((k, v) for k, v in global_digests.items() if k not in context)),
+            )
+            cached = self._render_cache.get(spec.output_path)
+            if cached and cached[0] == render_key:
+                return cached[1], True
+
+        html = self.generator.render_template(spec.template, **context)
+        if render_key is not None:
+            self._render_cache[spec.output_path] = (render_key, html)
+        logger.debug(f"Rendered {spec.template} -> {spec.output_path}")
+        return html, False
+
+    def refresh(self, changed=None):
+        """Bring discovery, the block index and page specs up to date.
+
+        Args:
+            changed: Paths changed since the last build, or None to
+                rediscover everything. Template-only changes keep it all:
+                templates feed none of these, and render reuse re-renders
+                just the specs that depend on them.
+        """
+        if changed and all(path.startswith("templates/") for path in changed):
+            return
+
+        # Refresh notation macros before anything parses content: the URL
+        # mapper parses pages before block_index's own refresh runs, so a
+        # macro newly declared in one file but used in an alphabetically-
+        # earlier file would fail against the stale in-memory registry.
+        from latexblocks import notation
+
+        notation.refresh_registry()
+        if changed is None:
+            self.math_cache.prefetch(self.content_fs.files("content", ".tex"))
+        else:
+            self.math_cache.prefetch(path for path in changed if path.endswith(".tex"))
+        clear_navigation_cache()
+        # Update URL mappings (required for new/moved/deleted files)
+        if changed is None:
+            self.url_mapper.build_url_mappings()
+        else:
+            self.url_mapper.apply_changes(changed)
+        # Rebuild block index (required - rendered HTML is stored here)
+        self.block_index.build_index()
+        self.reference_graph.invalidate()
+        # Recompute specs (the page renderer's own cache is mtime-based, so
+        # only changed files re-render)
+        for page in self.page_registry.pages:
+            page._specs_cache = None
+
+    def find_spec(self, url: str):
+        """The spec whose canonical path is url (e.g. "/mathnotes/algebra/groups/"), if any."""
+        wanted = "/" + url.strip("/") + "/" if url.strip("/") else "/"
+        for page, spec in self.page_registry.get_all_specs():
+            if page.get_canonical_path(spec) == wanted:
+                return spec
+        return None
+
+    def render_url(self, url: str):
+        """HTML for one URL as the current build would write it, or None."""
+        spec = self.find_spec(url)
+        if spec is None:
+            return None
+        self.setup_global_context()
+        html, _ = self._render_spec(spec, self._globals_fingerprint(), {})
+        return html
+
+    def build_pages(self, urls) -> list:
+        """Re-render just the given URLs into the live output directory.
 
-            # Render template and write to file
-            html = self.generator.render_template(spec.template, **context)
+        A quick partial update for iterating on a few pages; it neither
+        cleans nor republishes the rest of the site. Returns the output
+        paths written (unknown URLs are skipped).
+        """
+        if self.archive_path:
+            raise ValueError("Partial builds need directory output, not an archive")
+        self.setup_global_context()
+        global_digests = self._globals_fingerprint()
+        template_digests = {}
+        written = {}
+        for url in urls:
+            spec = self.find_spec(url)
+            if spec is None:
+                logger.warning(f"No page for {url}")
+                continue
+            html, _ = self._render_spec(spec, global_digests, template_digests)
             self.generator.write_page(spec.output_path, html)
-            logger.debug(f"Rendered {spec.template} -> {spec.output_path}")
+            written[spec.output_path] = html
+        if self.page_store is not None:
+            self.page_store.update(written)
+        return list(written)
+
+    def _copy_asset(self, source: Path, rel_path: str, staged: bool = False):
+        """Publish one file at rel_path: straight into the archive when
+        building one, else (or when staged, for files later steps rework in
+        place) copied under output_dir."""
+        archive = self.generator.archive
+        if archive is not None and not staged:
+            archive.add(rel_path, source.read_bytes())
+            return
+        target = self.output_dir / rel_path
+        target.parent.mkdir(parents=True, exist_ok=True)
+        shutil.copy2(source, target)
 
     def copy_static_assets(self):
-        """Copy all static assets to output directory."""
+        """Copy all static assets to output directory.
+
+        An archive build adds them to the archive directly, except
+        static/dist: font subsetting and the service worker rework that on
+        disk, so it still goes through the staging tree.
+        """
         logger.info("Copying static assets...")
 
         # Copy static directory
         static_src = Path("static")
-        if static_src.exists():
+        if static_src.exists() and self.generator.archive is not None:
+            for dirpath, dirnames, filenames in os.walk(static_src):
+                dirnames.sort()
+                for name in sorted(filenames):
+                    source = Path(dirpath) / name
+                    rel_path = source.as_posix()
+                    self._copy_asset(source, rel_path, staged=rel_path.startswith("static/dist/"))
+            logger.info("Added static directory to the archive")
+        elif static_src.exists():
             static_dst = self.output_dir / "static"
             if static_dst.exists():
                 shutil.rmtree(static_dst)
@@ -158,12 +502,12 @@ class SiteBuilder:
         # Copy favicon if exists
         favicon = Path("favicon.ico")
         if favicon.exists():
-            shutil.copy(favicon, self.output_dir / "favicon.ico")
+            self._copy_asset(favicon, "favicon.ico")
 
         # Copy robots.txt if exists
         robots = Path("robots.txt")
         if robots.exists():
-            shutil.copy(robots, self.output_dir / "robots.txt")
+            self._copy_asset(robots, "robots.txt")
 
         # Copy images from content directories
         self._copy_content_images()
@@ -179,26 +523,14 @@ class SiteBuilder:
             if image_file.is_file() and image_file.suffix.lower() in image_extensions:
                 # Maintain directory structure
                 relative_path = image_file.relative_to(content_dir)
-                output_path = self.output_dir / "mathnotes" / relative_path
-
-                # Create parent directory if needed
-                output_path.parent.mkdir(parents=True, exist_ok=True)
-
-                # Copy the image
-                shutil.copy2(image_file, output_path)
+                self._copy_asset(image_file, f"mathnotes/{relative_path.as_posix()}")
                 image_count += 1
 
         logger.info(f"Copied {image_count} images from content directories")
 
-    def build(self):
-        """Execute the complete build process."""
-        logger.info("Starting static site build...")
-
-        # 1. Clean output directory
-        self.clean_output_dir()
-
-        # Regenerate the pdflatex notation package (checked in like a
-        # lockfile; harmless no-op when nothing changed)
+    def _write_notation_sty(self):
+        """Regenerate the pdflatex notation package (checked in like a
+        lockfile; harmless no-op when nothing changed)."""
         from latexblocks.notation import write_notation_sty
 
         try:
@@ -207,18 +539,133 @@ class SiteBuilder:
         except OSError as e:
             logger.warning(f"Could not write latex/mathnotes-notation.sty: {e}")
 
-        # 2. Set up global template context
-        self.setup_global_context()
+    def render_to_store(self, cancel=None) -> int:
+        """Re-render every page into the page store only, leaving disk alone.
 
-        # 3. Render all pages
-        self.render_all_pages()
+        The watcher's fast path for edits that change nothing but page HTML:
+        unchanged pages come from the render cache and the store swaps in
+        just the outputs that differ. Static assets and the on-disk tree are
+        left as the last full build() wrote them.
 
-        # 4. Copy static assets
-        self.copy_static_assets()
+        Returns:
+            Number of outputs that changed in the store.
+        """
+        self._cancel = cancel
+        try:
+            self._write_notation_sty()
+            self.setup_global_context()
+            pages = self.render_all_pages(write=False)
+        finally:
+            self._cancel = None
+        changed = self.page_store.publish(pages)
+        logger.info(f"Published {changed} changed outputs to the page store")
+        return changed
+
+    def build(self, cancel=None):
+        """Execute the complete build process.
+
+        The site is built into a sibling staging directory (or a temporary
+        archive) and swapped in only once complete, so readers never see a
+        half-written tree.
 
-        # Report statistics
-        total_files = sum(1 for _ in self.output_dir.rglob("*") if _.is_file())
-        total_size = sum(f.stat().st_size for f in self.output_dir.rglob("*") if f.is_file())
+        Args:
+            cancel: Optional threading.Event; once set, the build stops at
+                the next page boundary with BuildCancelled and the live
+                output is left as it was.
+        """
+        logger.info("Starting static site build...")
 
-        logger.info(f"Build complete! Output in {self.output_dir}")
+        final_dir = self.output_dir
+        staging_dir = final_dir.with_name(final_dir.name + ".staging")
+        archive = None
+        if self.archive_path:
+            archive = ArchiveWriter(self.archive_path.with_name(self.archive_path.name + ".tmp"))
+            self.generator.archive = archive
+        self._cancel = cancel
+        self._set_output_dir(staging_dir)
+        try:
+            # 1. Clean output directory
+            self.clean_output_dir()
+
+            self._write_notation_sty()
+
+            # 2. Set up global template context
+            self.setup_global_context()
+
+            # 3. Render all pages
+            pages = self.render_all_pages()
+            self._check_cancelled()
+
+            # 4. Copy static assets
+            self.copy_static_assets()
+            self._check_cancelled()
+
+            if FONT_SUBSETTING:
+                subset_web_fonts(staging_dir / "static" / "dist", pages.values())
+
+            # The worker precaches the assets just copied
+            if SERVICE_WORKER:
+                write_service_worker(staging_dir, self.generator, self.deploy_manifest)
+
+            # Record every published file's hash for the next deploy
+            page_outputs = {entry["output"] for entry in self.deploy_manifest["pages"].values()}
+            if archive is not None:
+                archive.add_tree(staging_dir)
+                files = {
+                    f"/{path}": digest for path, digest in archive.digests.items()
+                    if path not in page_outputs
+                }
+            else:
+                files = file_entries(staging_dir, skip=page_outputs)
+            self.deploy_manifest = build_manifest(
+                self.deploy_manifest["pages"], self.base_url, files
+            )
+            write_manifest(staging_dir / MANIFEST_NAME, self.deploy_manifest)
+            if archive is not None:
+                archive.add(MANIFEST_NAME, (staging_dir / MANIFEST_NAME).read_bytes())
+                archive.close()
+        except BaseException:
+            if archive is not None:
+                archive.abort()
+            raise
+        finally:
+            self._cancel = None
+            self.generator.archive = None
+            self._set_output_dir(final_dir)
+
+        # 5. Publish the finished tree (or archive)
+        if archive is not None:
+            os.replace(archive.path, self.archive_path)
+            shutil.rmtree(staging_dir)
+            total_files, total_size = len(archive), archive.size
+            output = self.archive_path
+        else:
+            self._publish(staging_dir, final_dir)
+            total_files = total_size = 0
+            for f in self.output_dir.rglob("*"):
+                if f.is_file():
+                    total_files += 1
+                    total_size += f.stat().st_size
+            output = self.output_dir
+        if self.page_store is not None:
+            self.page_store.publish(pages)
+
+        # 6. Snapshot the content catalog and math memo for the next process
+        if CATALOG_SNAPSHOT:
+            try:
+                save_catalog(self.url_mapper, CATALOG_SNAPSHOT)
+            except OSError as e:
+                logger.warning(f"Could not write catalog snapshot {CATALOG_SNAPSHOT}: {e}")
+        if MATH_CACHE:
+            try:
+                self.math_cache.save(MATH_CACHE)
+            except OSError as e:
+                logger.warning(f"Could not write math cache {MATH_CACHE}: {e}")
+        logger.info(
+            f"Math: {self.math_cache.hits} memo hits, "
+            f"{self.math_cache.converted} conversions this process"
+        )
+
+        # Report statistics
+        logger.info(f"Build complete! Output in {output}")
         logger.info(f"Generated {total_files} files, total size: {total_size / 1024 / 1024:.2f} MB")
@@ -1,7 +1,7 @@
 """Core static site generator class using Jinja2 directly."""
 
 from pathlib import Path
-from jinja2 import Environment, FileSystemLoader, select_autoescape
+from jinja2 import Environment, FileSystemLoader, meta, select_autoescape
 import logging
 
 logger = logging.getLogger(__name__)
@@ -36,6 +36,9 @@ class StaticSiteGenerator:
         # Routes registry
         self.routes = {}
 
+        # ArchiveWriter that write_page stores into instead of output_dir
+        self.archive = None
+
         logger.info(f"Initialized generator: templates={template_dir}, output={output_dir}")
 
     def add_global(self, key, value):
@@ -43,6 +46,25 @@ class StaticSiteGenerator:
         self.global_context[key] = value
         self.env.globals[key] = value
 
+    def template_dependencies(self, template_name, _seen=None):
+        """Every template a render of template_name can load, itself included.
+
+        Follows {% extends %}, {% include %}, {% import %} and {% from %}
+        transitively. A reference computed at render time can't be resolved
+        statically, so it counts as depending on every template.
+        """
+        seen = set() if _seen is None else _seen
+        if template_name in seen:
+            return seen
+        seen.add(template_name)
+        source, _, _ = self.env.loader.get_source(self.env, template_name)
+        for name in meta.find_referenced_templates(self.env.parse(source)):
+            if name is None:
+                seen.update(self.env.list_templates())
+                return seen
+            self.template_dependencies(name, seen)
+        return seen
+
     def render_template(self, template_name, **context):
         """Render a template with context.
 
@@ -64,6 +86,10 @@ class StaticSiteGenerator:
             output_path: Path relative to output_dir
             html_content: HTML string to write
         """
+        if self.archive is not None:
+            self.archive.add(str(output_path), html_content.encode("utf-8"))
+            return
+
         full_path = self.output_dir / output_path
         full_path.parent.mkdir(parents=True, exist_ok=True)
 
@@ -0,0 +1,261 @@
+"""Warm build service on a local Unix socket.
+
+Building from a cold process pays for imports, discovery, block indexing
+and the page renderer's caches every time. A BuildService keeps one
+SiteBuilder warm and serves it over a Unix socket, one JSON request and one
+JSON response per line:
+
+    {"cmd": "build", "output": "static-build"}            -> {"ok": true, "seconds": ...}
+    {"cmd": "build", "pages": ["/mathnotes/algebra/groups/"]} -> {"ok": true, "written": [...]}
+    {"cmd": "render", "url": "/mathnotes/algebra/groups/"}    -> {"ok": true, "html": "..."}
+    {"cmd": "stats"}                                          -> {"ok": true, ...}
+    {"cmd": "page", "path": "mathnotes/algebra/groups/"}      -> {"ok": true, "body": "..."}
+    {"cmd": "published"}                                      -> {"ok": true, "timestamp": ...}
+
+scripts/build_daemon.py runs a standalone service; the watcher hosts one
+around its own builder, so its rebuilds and socket clients share the same
+warm caches. Clients use request() and fall back to an in-process build
+when it raises DaemonUnavailable.
+
+"page" and "published" read the service's PageStore, when it has one (the
+watcher's in-memory mode): the dev server fetches pages through them
+instead of from disk. They never wait on the build lock, so requests made
+mid-build get the last published build.
+"""
+
+import json
+import logging
+import os
+import socket
+import socketserver
+import stat
+import threading
+import time
+from pathlib import Path
+
+from mathnotes.config import BUILD_SOCKET
+
+logger = logging.getLogger(__name__)
+
+
+# What a warm builder must notice changing between requests
+WATCHED_DIRS = ("content", "templates", "latex", "mathnotes")
+
+
+class DaemonUnavailable(Exception):
+    """No build service is listening on the socket."""
+
+
+class StaleService(RuntimeError):
+    """Build code changed under a running service; it needs a restart."""
+
+
+def _mtimes() -> dict:
+    mtimes = {}
+    for directory in WATCHED_DIRS:
+        for path in Path(directory).rglob("*"):
+            name = path.name
+            # bytecode churn, and the notation package the build itself writes
+            if (
+                "__pycache__" in path.parts
+                or name.endswith(".pyc")
+                or name == "mathnotes-notation.sty"
+            ):
+                continue
+            try:
+                st = path.stat()
+            except OSError:
+                continue
+            if stat.S_ISREG(st.st_mode):
+                mtimes[str(path)] = st.st_mtime_ns
+    return mtimes
+
+
+class BuildService:
+    """A warm SiteBuilder behind a lock, shared by every client.
+
+    Before each request the service diffs file mtimes against the previous
+    request and hands the changed paths to SiteBuilder.refresh, so repeated
+    builds only redo what changed. Python or .sty changes can't be applied
+    to already-imported code; the service then refuses to build and clients
+    fall back to a fresh process.
+
+    With watched=True the host (the watcher) already refreshes the builder
+    for every change it sees, and restarts on code changes; the service
+    then uses the builder as it is.
+    """
+
+    def __init__(
+        self,
+        builder=None,
+        output_dir: str = "static-build",
+        page_store=None,
+        watched: bool = False,
+    ):
+        self.watched = watched
+        # Snapshot before the builder exists so edits made while it is
+        # constructed still count as changes on the first request
+        self._mtimes = {} if watched else _mtimes()
+        self._stale = False
+        self.builder = builder
+        self.output_dir = output_dir
+        self.page_store = page_store
+        # Builds and renders mutate shared builder state: one at a time
+        self.lock = threading.Lock()
+        self.started = time.time()
+        self.builds = 0
+        self.last_build_seconds = None
+
+    def _fresh_builder(self):
+        """The builder, brought up to date with the files on disk."""
+        if self.watched:
+            return self.builder
+        current = _mtimes()
+        changed = sorted(
+            path for path in current.keys() | self._mtimes.keys()
+            if current.get(path) != self._mtimes.get(path)
+        )
+        self._mtimes = current
+        if any(path.endswith((".py", ".sty")) for path in changed):
+            self._stale = True
+        if self._stale:
+            raise StaleService("build code changed since the service started; restart it")
+
+        if self.builder is None:
+            from latexblocks import notation
+            from mathnotes.sitegenerator.builder import SiteBuilder
+
+            notation.refresh_registry()
+            self.builder = SiteBuilder(output_dir=self.output_dir, page_store=self.page_store)
+        elif changed:
+            self.builder.refresh(changed)
+        return self.builder
+
+    def build(self, pages=None, output=None, cancel=None) -> dict:
+        with self.lock:
+            builder = self._fresh_builder()
+            if pages:
+                return {"written": builder.build_pages(pages)}
+            home = builder.output_dir
+            target = Path(output) if output else home
+            builder._set_output_dir(target)
+            start = time.time()
+            try:
+                builder.build(cancel=cancel)
+            finally:
+                # a client's --output is for this build only
+                builder._set_output_dir(home)
+            self.builds += 1
+            self.last_build_seconds = time.time() - start
+            return {"seconds": round(self.last_build_seconds, 3), "output": str(target)}
+
+    def render(self, url: str) -> dict:
+        with self.lock:
+            html = self._fresh_builder().render_url(url)
+        if html is None:
+            raise KeyError(url)
+        return {"html": html}
+
+    def page(self, path: str) -> dict:
+        body = self.page_store.get(path) if self.page_store is not None else None
+        if body is None:
+            raise KeyError(path)
+        return {"body": body}
+
+    def published(self) -> dict:
+        if self.page_store is None or not self.page_store.published:
+            raise KeyError("no pages published")
+        return {"timestamp": self.page_store.published, "generation": self.page_store.generation}
+
+    def stats(self) -> dict:
+        builder = self.builder
+        return {
+            "uptime": round(time.time() - self.started, 1),
+            "builds": self.builds,
+            "last_build_seconds": self.last_build_seconds,
+            "busy": self.lock.locked(),
+            "pages": len(builder.url_mapper.url_mappings) if builder else 0,
+            "cached_renders": len(builder._render_cache) if builder else 0,
+            "output": str(builder.output_dir) if builder else self.output_dir,
+            "stored_pages": len(self.page_store) if self.page_store is not None else None,
+        }
+
+    def handle(self, request: dict) -> dict:
+        cmd = request.get("cmd")
+        try:
+            if cmd == "build":
+                result = self.build(pages=request.get("pages"), output=request.get("output"))
+            elif cmd == "render":
+                result = self.render(request["url"])
+            elif cmd == "page":
+                result = self.page(request["path"])
+            elif cmd == "published":
+                result = self.published()
+            elif cmd == "stats":
+                result = self.stats()
+            else:
+                return {"ok": False, "error": f"unknown command: {cmd!r}"}
+        except KeyError as e:
+            return {"ok": False, "error": f"not found: {e.args[0]}"}
+        except StaleService as e:
+            return {"ok": False, "error": str(e), "stale": True}
+        except Exception as e:
+            logger.exception(f"Build service request failed: {request}")
+            return {"ok": False, "error": f"{type(e).__name__}: {e}"}
+        return {"ok": True, **result}
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    def handle(self):
+        line = self.rfile.readline()
+        try:
+            request = json.loads(line)
+        except ValueError:
+            response = {"ok": False, "error": "malformed request"}
+        else:
+            response = self.server.service.handle(request)
+        self.wfile.write(json.dumps(response).encode("utf-8") + b"\n")
+
+
+class _Server(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+def serve(service: BuildService, socket_path: str = BUILD_SOCKET, background: bool = False):
+    """Listen on socket_path; returns the server when background, else blocks."""
+    if os.path.exists(socket_path):
+        try:
+            request({"cmd": "stats"}, socket_path=socket_path, timeout=1)
+        except DaemonUnavailable:
+            os.unlink(socket_path)  # stale socket from a dead daemon
+        else:
+            raise RuntimeError(f"A build service is already listening on {socket_path}")
+
+    server = _Server(socket_path, _Handler)
+    server.service = service
+    os.chmod(socket_path, 0o600)
+    logger.info(f"Build service listening on {socket_path}")
+    if background:
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        return server
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+        os.unlink(socket_path)
+
+
+def request(payload: dict, socket_path: str = BUILD_SOCKET, timeout: float = None) -> dict:
+    """Send one request to the build service and return its response."""
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(timeout)
+            sock.connect(socket_path)
+            sock.sendall(json.dumps(payload).encode("utf-8") + b"\n")
+            with sock.makefile("rb") as f:
+                line = f.readline()
+    except (FileNotFoundError, ConnectionRefusedError) as e:
+        raise DaemonUnavailable(str(e)) from e
+    if not line:
+        raise DaemonUnavailable("build service closed the connection")
+    return json.loads(line)
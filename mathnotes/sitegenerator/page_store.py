@@ -0,0 +1,69 @@
+"""In-memory store of rendered pages, for serving dev builds without disk.
+
+The watcher normally writes every page to static-build/ and the dev server
+reads it back through a Docker volume. With a PageStore attached, the
+builder also publishes its rendered HTML here, and the build service
+answers the dev server's "page" requests from it, so an edit reaches the
+browser without the disk round trip or volume sync.
+
+Publishing swaps in a new mapping in one assignment: readers (service
+threads) see either the previous build or the next one, never a mix.
+"""
+
+import posixpath
+import time
+from typing import Dict, Optional
+
+
+def _key(path: str) -> str:
+    # Content page outputs come as "mathnotes/x//index.html" (canonical URLs
+    # end in "/"); store and look up one spelling
+    return posixpath.normpath("/" + path).lstrip("/")
+
+
+class PageStore:
+    """Output path -> rendered output (HTML, sitemap) of the last published build."""
+
+    def __init__(self):
+        self._pages: Dict[str, str] = {}
+        self.generation = 0
+        self.published = 0  # unix time of the last publish (the dev auto-reload stamp)
+
+    def __len__(self) -> int:
+        return len(self._pages)
+
+    def publish(self, pages: Dict[str, str]) -> int:
+        """Make pages the whole current build; returns how many outputs changed.
+
+        Paths missing from pages are dropped (their source went away).
+        """
+        pages = {_key(path): html for path, html in pages.items()}
+        return self._swap(pages, self._pages.keys() - pages.keys())
+
+    def update(self, pages: Dict[str, str]) -> int:
+        """Swap in just these outputs (a partial rebuild), keeping the rest."""
+        return self._swap({_key(path): html for path, html in pages.items()}, ())
+
+    def _swap(self, pages: Dict[str, str], removed) -> int:
+        current = self._pages
+        changed = {path: html for path, html in pages.items() if current.get(path) != html}
+        if changed or removed:
+            updated = dict(current)
+            updated.update(changed)
+            for path in removed:
+                del updated[path]
+            self._pages = updated
+            self.generation += 1
+        # stamped even when no page changed (an assets-only build must still
+        # reload the browser), and only once the new pages are visible
+        self.published = int(time.time())
+        return len(changed) + len(removed)
+
+    def get(self, path: str) -> Optional[str]:
+        """Output for a request path like "mathnotes/algebra/groups/" or
+        "sitemap.xml", if stored."""
+        pages = self._pages
+        key = _key(path)
+        if "." in key.rsplit("/", 1)[-1]:
+            return pages.get(key)
+        return pages.get(f"{key}/index.html" if key else "index.html")
@@ -4,17 +4,24 @@ Each page is a self-contained unit with its own rendering logic,
 similar to views in Flask or Django.
 """
 
+import hashlib
 import json
 import logging
+import re
 from typing import Dict, Any, List
 from dataclasses import dataclass, field
 from abc import ABC, abstractmethod
 
+from mathnotes.demo_bundles import demo_preloads, load_demo_manifest, page_demos
 from mathnotes.navigation import get_page_navigation
+from mathnotes.resource_hints import estimated_page_size, page_resource_hints, referenced_pages
 from mathnotes.sources import get_sources_for_page
 
 logger = logging.getLogger(__name__)
 
+# Labels referenced from rendered block HTML (block-reference links)
+REF_LABEL_RE = re.compile(r'data-ref-label="([^"]+)"')
+
 
 @dataclass
 class PageSpec:
@@ -26,6 +33,7 @@ class PageSpec:
     description: str = ""  # Meta description
     priority: float = 0.5  # Sitemap priority (0.0-1.0)
     context: Dict[str, Any] = field(default_factory=dict)  # Additional context
+    content_hash: str = ""  # Lets the builder reuse last build's HTML if unchanged
 
 
 class Page(ABC):
@@ -130,7 +138,7 @@ class MathnotesIndexPage(Page):
                 continue
 
             # Get all content for this section
-            content = get_all_content_for_section(section, self.url_mapper.file_to_canonical)
+            content = get_all_content_for_section(section, self.url_mapper)
             display_name = display_names.get(section_name, section_name.title())
             sections.append({"name": display_name, "path": section, "content": content})
 
@@ -155,24 +163,59 @@ class ContentPages(Page):
     def _compute_specs(self) -> List[PageSpec]:
         specs = []
 
+        # Render every page first: resource hints rank other pages by their
+        # estimated size
+        results = {
+            canonical_url: self.page_renderer.render_page(
+                self.url_mapper.get_file_path(canonical_url)
+            )
+            for canonical_url in self.url_mapper.url_mappings.keys()
+        }
+        # shadow the site-wide tooltip JSON global with just each page's
+        # referenced blocks (same client shape, ~2% the size)
+        tooltip_data = {
+            canonical_url: json.dumps([
+                {"label": label, **entry}
+                for label, entry in sorted(result.get("tooltip_data", {}).items())
+            ])
+            for canonical_url, result in results.items()
+        }
+        page_sizes = {
+            f"/mathnotes/{canonical_url}": estimated_page_size(
+                result.get("content", ""), tooltip_data[canonical_url]
+            )
+            for canonical_url, result in results.items()
+        }
+        demo_manifest = load_demo_manifest()
+
         # Generate a spec for each content page
-        for canonical_url in self.url_mapper.url_mappings.keys():
+        for canonical_url, result in results.items():
             content_path = self.url_mapper.get_file_path(canonical_url)
 
-            # Render the page content
-            result = self.page_renderer.render_page(content_path)
-
             # Build output path
             output_path = f"mathnotes/{canonical_url}/index.html"
 
             # Build navigation data for sidebar and prev/next
-            navigation = get_page_navigation(content_path, self.url_mapper.file_to_canonical)
+            navigation = get_page_navigation(content_path, self.url_mapper)
 
             # Collect sources from directory hierarchy and page metadata
             # (LaTeX frontmatter or \source commands)
             metadata = result.get("metadata", {})
             sources = get_sources_for_page(content_path, metadata.get("sources"))
 
+            # Likely next pages and this page's critical figure
+            page_url = f"/mathnotes/{canonical_url}"
+            resource_hints = page_resource_hints(
+                page_url,
+                result.get("content", ""),
+                navigation,
+                referenced_pages(result.get("tooltip_data", {}), self.block_index, page_url),
+                page_sizes,
+            )
+
+            # Only the demo code this page embeds, fetched alongside main.js
+            demos = page_demos(result.get("content", ""))
+
             # Build context
             context = {
                 "content": result.get("content", ""),
@@ -181,15 +224,13 @@ class ContentPages(Page):
                 "canonical_url": result.get("canonical_url", ""),
                 "navigation": navigation,
                 "sources": sources,
+                "resource_hints": resource_hints,
+                "demos": demos,
+                "demo_preloads": demo_preloads(demos, demo_manifest),
                 "page_description": result.get("page_description", ""),
                 # footer links to the page's .tex source on GitHub
                 "source_path": result.get("source_path", ""),
-                # shadow the site-wide tooltip JSON global with just this
-                # page's referenced blocks (same client shape, ~2% the size)
-                "tooltip_data": json.dumps([
-                    {"label": label, **entry}
-                    for label, entry in sorted(result.get("tooltip_data", {}).items())
-                ]),
+                "tooltip_data": tooltip_data[canonical_url],
             }
 
             specs.append(
@@ -234,6 +275,7 @@ class BlockIndexPage(Page):
     page_title: str = ""  # Page title
     page_description: str = ""  # Page description
     context_key: str = "blocks"  # Key for blocks in template context
+    max_shard_blocks: int = 150  # Split a letter's page beyond this many blocks
 
     def _compute_specs(self) -> List[PageSpec]:
         # Collect all blocks of the specified types
@@ -242,53 +284,128 @@ class BlockIndexPage(Page):
             blocks.extend(self.block_index.find_blocks_by_type(block_type))
 
         # Sort blocks alphabetically by title or label
-        blocks.sort(key=lambda ref: (ref.block.title or ref.block.label or "").lower())
-        
-        # Enhance blocks with reverse index information
+        blocks.sort(key=self._sort_key)
+
+        # Enhance blocks with reverse index information. The shared graph
+        # compiles every block's direct and transitive referrers in one
+        # pass, which both listing pages then reuse.
+        reference_graph = self.site_context["reference_graph"]
         enhanced_blocks = []
         for ref in blocks:
             if ref.block.label:
-                # Get all references for this block
-                reverse_entry = self.block_index.reverse_index.get_references_for_label(
-                    ref.block.label
-                )
-                
-                # Create enhanced block info
-                enhanced_block = {
-                    'block': ref,
-                    'direct_references': reverse_entry.direct_references,
-                    'transitive_references': reverse_entry.transitive_references
-                }
+                direct, transitive = reference_graph.references_for(ref.block.label)
             else:
                 # Block without label - no references possible
-                enhanced_block = {
-                    'block': ref,
-                    'direct_references': [],
-                    'transitive_references': {}
-                }
-            
-            enhanced_blocks.append(enhanced_block)
-
-        # Build context
-        context = {
-            'blocks': enhanced_blocks,
-            'reference_depth': 2  # Configurable depth for transitive references
-        }
-        
-        # Add any additional context processing
-        context = self.process_context(context, enhanced_blocks)
+                direct, transitive = [], {}
+
+            enhanced_blocks.append({
+                'block': ref,
+                'direct_references': direct,
+                'transitive_references': transitive,
+            })
+
+        # One small page per initial letter (split further past
+        # max_shard_blocks) instead of one page holding every block
+        shards = self._shard(enhanced_blocks)
+        base_path = self.output_path[: -len("index.html")]
+        letters = [
+            {"name": name, "url": f"/{base_path}{slug}/", "count": len(items)}
+            for slug, name, items in shards
+        ]
 
-        return [
+        landing = self.process_context({
+            'blocks': [],
+            'letters': letters,
+            'total_count': len(enhanced_blocks),
+            'reference_depth': reference_graph.max_depth,
+            # no blocks listed: shadow the site-wide tooltip JSON global
+            'tooltip_data': '[]',
+        }, [])
+        specs = [
             PageSpec(
                 output_path=self.output_path,
                 template=self.template,
                 title=self.page_title,
                 description=self.page_description,
                 priority=0.6,
-                context=context,
+                context=landing,
             )
         ]
 
+        for slug, name, items in shards:
+            context = self.process_context({
+                'blocks': items,
+                'letters': letters,
+                'current_letter': name,
+                'total_count': len(enhanced_blocks),
+                'reference_depth': reference_graph.max_depth,
+                'tooltip_data': self._shard_tooltip_data(items),
+            }, items)
+            specs.append(
+                PageSpec(
+                    output_path=f"{base_path}{slug}/index.html",
+                    template=self.template,
+                    title=f"{self.page_title} ({name})",
+                    description=self.page_description,
+                    priority=0.6,
+                    context=context,
+                    content_hash=self._shard_hash(context),
+                )
+            )
+
+        return specs
+
+    @staticmethod
+    def _sort_key(ref) -> str:
+        return (ref.block.title or ref.block.label or "").lower()
+
+    def _shard(self, enhanced_blocks: List[Dict[str, Any]]) -> List[tuple]:
+        """Group sorted blocks into (slug, display name, items) shards."""
+        by_letter: Dict[str, List[Dict[str, Any]]] = {}
+        for item in enhanced_blocks:
+            key = self._sort_key(item['block'])
+            letter = key[0] if key and key[0].isalpha() else "#"
+            by_letter.setdefault(letter, []).append(item)
+
+        shards = []
+        for letter, items in by_letter.items():
+            slug = letter if letter != "#" else "other"
+            size = self.max_shard_blocks
+            for part, start in enumerate(range(0, len(items), size), 1):
+                suffix = f"-{part}" if part > 1 else ""
+                name = letter.upper() + (f" ({part})" if part > 1 else "")
+                shards.append((slug + suffix, name, items[start:start + size]))
+        return shards
+
+    def _shard_tooltip_data(self, items: List[Dict[str, Any]]) -> str:
+        """Tooltip JSON for just the blocks a shard's cards reference.
+
+        Shadows the site-wide global (as content pages do), which also keeps
+        an edit on an unrelated page from changing this shard's output.
+        """
+        from latexblocks.ref_resolver import tooltip_entry
+
+        labels = set()
+        for item in items:
+            labels.update(REF_LABEL_RE.findall(item['block'].block.rendered_html or ""))
+        index = self.block_index.index
+        return json.dumps([
+            {"label": label, **tooltip_entry(index[label])}
+            for label in sorted(labels) if label in index
+        ])
+
+    def _shard_hash(self, context: Dict[str, Any]) -> str:
+        """Hash of everything block_index.html renders for a shard."""
+        digest = hashlib.sha256()
+        for item in context['blocks']:
+            ref = item['block']
+            for part in (ref.block.label, ref.block.rendered_html, ref.full_url, ref.page_title):
+                digest.update(str(part or "").encode("utf-8"))
+                digest.update(b"\0")
+        rest = {k: v for k, v in context.items() if k != 'blocks'}
+        digest.update(json.dumps(rest, sort_keys=True, default=str).encode("utf-8"))
+        return digest.hexdigest()
+
     def process_context(self, context: Dict[str, Any], blocks: List) -> Dict[str, Any]:
         """Override this to add custom context processing."""
         return context
@@ -304,7 +421,7 @@ class DefinitionIndexPage(BlockIndexPage):
     page_title = "Definition Index - Mathnotes"
     page_description = "Index of all mathematical definitions"
     context_key = "blocks"
-    
+
     def process_context(self, context: Dict[str, Any], blocks: List) -> Dict[str, Any]:
         """Add template-specific context."""
         context['index_title'] = 'Definition Index'
@@ -324,7 +441,7 @@ class TheoremIndexPage(BlockIndexPage):
     page_title = "Theorem Index - Mathnotes"
     page_description = "Index of all mathematical theorems, lemmas, and corollaries"
     context_key = "blocks"
-    
+
     def process_context(self, context: Dict[str, Any], blocks: List) -> Dict[str, Any]:
         """Add additional context for theorem index page."""
         context['index_title'] = 'Theorem Index'
@@ -340,9 +457,12 @@ class BibliographyPage(Page):
     endpoint_name = "bibliography"
 
     def _compute_specs(self) -> List[PageSpec]:
-        from mathnotes.sources import build_bibliography
+        bibliography = self.site_context.get("bibliography")
+        if bibliography is None:
+            from mathnotes.sources import Bibliography
 
-        entries = build_bibliography(self.url_mapper)
+            bibliography = Bibliography()
+        entries = bibliography.update(self.url_mapper)
         logger.info(f"Generated bibliography with {len(entries)} sources")
 
         return [
@@ -353,6 +473,7 @@ class BibliographyPage(Page):
                 description="All books and sources referenced across the site",
                 priority=0.6,
                 context={"entries": entries},
+                content_hash=bibliography.digest,
             )
         ]
 
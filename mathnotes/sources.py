@@ -1,10 +1,14 @@
 """Sources collection and merging for content pages."""
 
+import hashlib
+import json
 import logging
 from pathlib import Path
 from typing import Any
 import yaml
 
+from .content_fs import get_content_fs
+
 logger = logging.getLogger(__name__)
 
 
@@ -34,15 +38,15 @@ def collect_directory_sources(content_path: str) -> list[dict[str, Any]]:
     directories.reverse()
 
     # Collect sources from each directory
+    fs = get_content_fs()
     all_sources = []
     for directory in directories:
-        sources_file = directory / "sources.yaml"
-        if sources_file.exists():
+        sources_file = (directory / "sources.yaml").as_posix()
+        if fs.is_file(sources_file):
             try:
-                with open(sources_file, "r", encoding="utf-8") as f:
-                    data = yaml.safe_load(f)
-                    if data and "sources" in data:
-                        all_sources.extend(data["sources"])
+                data = yaml.safe_load(fs.read_text(sources_file))
+                if data and "sources" in data:
+                    all_sources.extend(data["sources"])
             except (yaml.YAMLError, OSError) as e:
                 logger.warning(f"Could not read sources from {sources_file}: {e}")
 
@@ -85,55 +89,159 @@ def get_sources_for_page(
     return merge_sources(directory_sources, frontmatter_sources)
 
 
-def build_bibliography(url_mapper) -> list[dict[str, Any]]:
-    """Aggregate sources from every content page into a site-wide bibliography.
+def _source_key(source: dict[str, Any]) -> tuple[str, str]:
+    return (
+        str(source.get("title", "")).strip().lower(),
+        str(source.get("author", "")).strip().lower(),
+    )
 
-    Sources are deduplicated by (title, author). Each entry is the source dict
-    plus a ``cited_by`` list of ``{title, url, section?}`` for every page the
-    source applies to; ``section`` is included only when a citation's section
-    differs from the entry's own.
 
-    Args:
-        url_mapper: URLMapper with url_mappings and get_file_path()
+def _stamp(path: Path):
+    return get_content_fs().stamp(path.as_posix())
 
-    Returns:
-        Bibliography entries sorted by title.
+
+class Bibliography:
+    """Site-wide bibliography kept up to date from per-page contributions.
+
+    Each content page contributes a record: its title, URL and the
+    deduplicated sources that apply to it, stamped with the content
+    filesystem's stamps (mtimes, for the working tree) of the page and of
+    every sources.yaml from the content root down to it. On
+    update() only pages whose stamp changed are re-read, and only the
+    entries those pages cite (or used to cite) are re-merged. One long-lived
+    instance lives on the SiteBuilder so watcher rebuilds start warm.
     """
-    from latexblocks.content_loader import load_content_file
 
-    entries: dict[tuple[str, str], dict[str, Any]] = {}
+    def __init__(self):
+        # canonical_url -> {"stamp", "title", "url", "sources": {key: source}}
+        self._pages: dict[str, dict[str, Any]] = {}
+        self._cited_by: dict[tuple[str, str], set[str]] = {}
+        self._entries: dict[tuple[str, str], dict[str, Any]] = {}
+        self._sorted: list[dict[str, Any]] = []
+        self.digest = ""
+
+    def _dir_stamp(self, directory: Path, dir_stamps: dict[Path, tuple]) -> tuple:
+        """sources.yaml stamps from the root down to directory (memoized per update)."""
+        if directory == Path(".") or directory.parent == directory:
+            return ()
+        if directory not in dir_stamps:
+            dir_stamps[directory] = self._dir_stamp(directory.parent, dir_stamps) + (
+                _stamp(directory / "sources.yaml"),
+            )
+        return dir_stamps[directory]
 
-    for canonical_url in url_mapper.url_mappings.keys():
-        md_path = url_mapper.get_file_path(canonical_url)
+    def _read_page(self, canonical_url: str, md_path: str, stamp: tuple) -> dict[str, Any] | None:
         try:
-            metadata, _ = load_content_file(md_path)
+            metadata, _ = get_content_fs().load_content(md_path)
         except (OSError, yaml.YAMLError) as e:
             logger.warning(f"Could not read metadata from {md_path}: {e}")
-            continue
-
-        page_title = metadata.get("title") or canonical_url
-        page_url = f"/mathnotes/{canonical_url}/"
-        sources = get_sources_for_page(md_path, metadata.get("sources"))
-
-        seen_keys = set()
-        for source in sources:
-            key = (
-                str(source.get("title", "")).strip().lower(),
-                str(source.get("author", "")).strip().lower(),
-            )
-            if key in seen_keys:
-                continue
-            seen_keys.add(key)
-
-            entry = entries.setdefault(key, {**source, "cited_by": []})
+            return None
+
+        sources: dict[tuple[str, str], dict[str, Any]] = {}
+        for source in get_sources_for_page(md_path, metadata.get("sources")):
+            sources.setdefault(_source_key(source), source)
+        return {
+            "stamp": stamp,
+            "title": metadata.get("title") or canonical_url,
+            "url": f"/mathnotes/{canonical_url}/",
+            "sources": sources,
+        }
+
+    def _merge_entry(self, key: tuple[str, str], order: dict[str, int]):
+        """Rebuild one entry from the pages citing it, in site URL order."""
+        citers = sorted(self._cited_by.get(key, ()), key=order.__getitem__)
+        if not citers:
+            self._cited_by.pop(key, None)
+            self._entries.pop(key, None)
+            return
+
+        entry: dict[str, Any] = {}
+        for canonical_url in citers:
+            page = self._pages[canonical_url]
+            source = page["sources"][key]
+            if not entry:
+                entry = {**source, "cited_by": []}
             # Fill in fields a sparser citation of the same source omitted
             for field_name, value in source.items():
                 entry.setdefault(field_name, value)
 
-            citation = {"title": page_title, "url": page_url}
+            citation = {"title": page["title"], "url": page["url"]}
             section = source.get("section")
             if section and section != entry.get("section"):
                 citation["section"] = section
             entry["cited_by"].append(citation)
+        self._entries[key] = entry
+
+    def update(self, url_mapper) -> list[dict[str, Any]]:
+        """Bring the bibliography in line with the current content tree.
+
+        Args:
+            url_mapper: URLMapper with url_mappings and get_file_path()
+
+        Returns:
+            Bibliography entries sorted by title.
+        """
+        order = {url: i for i, url in enumerate(url_mapper.url_mappings.keys())}
+        dir_stamps: dict[Path, tuple] = {}
+        dirty: set[tuple[str, str]] = set()
+
+        for canonical_url in order:
+            md_path = url_mapper.get_file_path(canonical_url)
+            stamp = (
+                md_path,
+                _stamp(Path(md_path)),
+                self._dir_stamp(Path(md_path).parent, dir_stamps),
+            )
+            old = self._pages.get(canonical_url)
+            if old is not None and old["stamp"] == stamp:
+                continue
+
+            new = self._read_page(canonical_url, md_path, stamp)
+            if old is not None:
+                for key in old["sources"]:
+                    self._cited_by[key].discard(canonical_url)
+                dirty.update(old["sources"])
+                del self._pages[canonical_url]
+            if new is not None:
+                self._pages[canonical_url] = new
+                for key in new["sources"]:
+                    self._cited_by.setdefault(key, set()).add(canonical_url)
+                dirty.update(new["sources"])
+
+        for canonical_url in [url for url in self._pages if url not in order]:
+            old = self._pages.pop(canonical_url)
+            for key in old["sources"]:
+                self._cited_by[key].discard(canonical_url)
+            dirty.update(old["sources"])
+
+        if dirty or not self.digest:
+            for key in dirty:
+                self._merge_entry(key, order)
+            self._sorted = sorted(
+                self._entries.values(), key=lambda e: str(e.get("title", "")).lower()
+            )
+            self.digest = hashlib.sha256(
+                json.dumps(self._sorted, sort_keys=True, default=str).encode("utf-8")
+            ).hexdigest()
+            logger.info(f"Bibliography: re-merged {len(dirty)} sources")
+        return self._sorted
+
+
+def build_bibliography(url_mapper) -> list[dict[str, Any]]:
+    """Aggregate sources from every content page into a site-wide bibliography.
 
-    return sorted(entries.values(), key=lambda e: str(e.get("title", "")).lower())
+    Sources are deduplicated by (title, author). Each entry is the source dict
+    plus a ``cited_by`` list of ``{title, url, section?}`` for every page the
+    source applies to; ``section`` is included only when a citation's section
+    differs from the entry's own.
+
+    One-shot form of Bibliography.update(); long-lived builds should keep a
+    Bibliography instead.
+
+    Args:
+        url_mapper: URLMapper with url_mappings and get_file_path()
+
+    Returns:
+        Bibliography entries sorted by title.
+    """
+    return Bibliography().update(url_mapper)
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Warm build service and its command-line client.
+
+    python scripts/build_daemon.py serve [--output static-build]
+    python scripts/build_daemon.py build [--output DIR] [--pages URL ...]
+    python scripts/build_daemon.py render /mathnotes/algebra/groups/
+    python scripts/build_daemon.py stats
+
+`serve` keeps a SiteBuilder warm behind a Unix socket (MATHNOTES_BUILD_SOCKET,
+default /tmp/mathnotes-build.sock); the watcher serves the same API around
+its own builder. The client commands talk to whichever is running.
+"""
+
+import argparse
+import json
+import logging
+import os
+import sys
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from mathnotes.config import BUILD_SOCKET  # noqa: E402
+from mathnotes.sitegenerator.daemon import (  # noqa: E402
+    BuildService, DaemonUnavailable, request, serve,
+)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Warm build service')
+    parser.add_argument('--socket', default=BUILD_SOCKET, help='Unix socket path')
+    sub = parser.add_subparsers(dest='cmd', required=True)
+    p_serve = sub.add_parser('serve', help='run the service')
+    p_serve.add_argument('--output', default='static-build', help='Output directory')
+    p_build = sub.add_parser('build', help='build the site (or just --pages)')
+    p_build.add_argument('--output', help='Output directory (default: the service\'s)')
+    p_build.add_argument('--pages', nargs='+', metavar='URL', help='re-render only these URLs')
+    p_render = sub.add_parser('render', help='print one page\'s HTML')
+    p_render.add_argument('url')
+    sub.add_parser('stats', help='show service statistics')
+    args = parser.parse_args()
+
+    if args.cmd == 'serve':
+        logging.basicConfig(
+            level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+        )
+        from mathnotes.config import configure_latexblocks
+        configure_latexblocks()
+        serve(BuildService(output_dir=args.output), socket_path=args.socket)
+        return 0
+
+    payload = {'cmd': args.cmd}
+    if args.cmd == 'build':
+        output = os.path.abspath(args.output) if args.output else None
+        payload.update(output=output, pages=args.pages)
+    elif args.cmd == 'render':
+        payload['url'] = args.url
+
+    try:
+        response = request(payload, socket_path=args.socket)
+    except DaemonUnavailable:
+        print(
+            f"No build service on {args.socket} (start one with: build_daemon.py serve)",
+            file=sys.stderr,
+        )
+        return 2
+    if not response.pop('ok'):
+        print(f"Error: {response['error']}", file=sys.stderr)
+        return 1
+    if args.cmd == 'render':
+        sys.stdout.write(response['html'])
+    else:
+        print(json.dumps(response, indent=2))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
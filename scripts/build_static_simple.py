@@ -1,17 +1,24 @@
 #!/usr/bin/env python3
 """
 Minimal static site build script.
+
+With --daemon, hands the build to the warm build service (scripts/build_daemon.py
+serve, or the watcher) when one is listening, and builds in-process otherwise.
+The service builds with its own environment (e.g. the dev container's
+SERVICE_WORKER=0 FONT_SUBSET=0), so delegating is opt-in.
 """
 
 import sys
 import os
 import argparse
+import json
 import logging
 
 # Add parent directory to path
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from mathnotes.sitegenerator.builder import SiteBuilder
+from mathnotes.deploy_manifest import MANIFEST_NAME, changed_paths, load_manifest, public_urls
+from mathnotes.sitegenerator.daemon import DaemonUnavailable, request
 
 # Configure logging
 logging.basicConfig(
@@ -20,24 +27,91 @@ logging.basicConfig(
 )
 
 
+def report_changes(args, manifest):
+    """Write the paths that differ from the previous deploy, for cache purges."""
+    if not args.changed_urls:
+        return
+    if manifest is None:
+        logging.error("The build wrote no usable deploy manifest; not writing changed URLs")
+        return
+    previous = load_manifest(args.previous_manifest) if args.previous_manifest else None
+    if previous is None:
+        logging.warning("No usable previous manifest; every page counts as changed")
+    paths = changed_paths(previous, manifest)
+    changes = [
+        {'path': path, 'url': url}
+        for path, url in zip(paths, public_urls(paths, manifest['base_url']))
+    ]
+    with open(args.changed_urls, 'w') as f:
+        json.dump(changes, f, indent=1)
+    logging.info(
+        f"{len(changes)} of {len(manifest['pages']) + len(manifest['files'])} pages and files "
+        f"changed since the previous deploy: "
+        f"{args.changed_urls}"
+    )
+
+
 def main():
     """Main entry point."""
     parser = argparse.ArgumentParser(description='Build static site')
     parser.add_argument('--output', default='static-build', help='Output directory')
     parser.add_argument('--verbose', action='store_true', help='Enable verbose logging')
+    parser.add_argument('--daemon', action='store_true',
+                        help='Hand the build to a running build service')
+    parser.add_argument('--archive',
+                        help='Write the site as one archive file (served with STATIC_ARCHIVE)')
+    parser.add_argument('--previous-manifest',
+                        help="The live deploy's deploy-manifest.json, to diff against")
+    parser.add_argument('--changed-urls',
+                        help='Write the pages changed since --previous-manifest here (JSON)')
+    parser.add_argument('--js-report',
+                        help='Write the demos and module JS bytes of every page here (JSON)')
     
     args = parser.parse_args()
     
     if args.verbose:
         logging.getLogger().setLevel(logging.DEBUG)
 
+    # the build service writes directory trees only, and keeps its reports
+    if args.daemon and (args.archive or args.js_report):
+        logging.warning("--archive and --js-report need an in-process build; ignoring --daemon")
+    elif args.daemon:
+        try:
+            response = request({'cmd': 'build', 'output': os.path.abspath(args.output)})
+        except DaemonUnavailable:
+            logging.info("No build service listening; building in-process")
+        else:
+            if response['ok']:
+                logging.info(
+                    f"Built by the build service (with its own environment) "
+                    f"in {response['seconds']}s: {response['output']}"
+                )
+                report_changes(args, load_manifest(os.path.join(args.output, MANIFEST_NAME)))
+                return 0
+            if not response.get('stale'):
+                logging.error(f"Build service failed: {response['error']}")
+                return 1
+            logging.warning(f"{response['error']}; building in-process instead")
+
     from mathnotes.config import configure_latexblocks
     configure_latexblocks()
 
     # Build the site
-    builder = SiteBuilder(output_dir=args.output)
+    from mathnotes.sitegenerator.builder import SiteBuilder
+
+    builder = SiteBuilder(output_dir=args.output, archive_path=args.archive)
     
     builder.build()
+    report_changes(args, builder.deploy_manifest)
+    if args.js_report:
+        if builder.js_report is None:
+            logging.warning(
+                "No static/dist/demo-manifest.json (run the JS build first); no JS report"
+            )
+        else:
+            with open(args.js_report, 'w') as f:
+                json.dump(builder.js_report, f, indent=1)
+            logging.info(f"Module JS bytes per page: {args.js_report}")
     return 0
 
 
@@ -14,27 +14,33 @@ Outputs a report file with all findings for later review. Run inside the
 builder container:
 
     docker exec -w /app mathnotes-static-builder python3 scripts/find_unstructured_definitions.py
+
+As a pre-commit check, scan only what changed and fail on findings:
+
+    python3 scripts/find_unstructured_definitions.py --changed-since HEAD --strict
 """
 
+import argparse
 import os
 import re
+import subprocess
 import sys
+from bisect import bisect_right
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from typing import List, Tuple, Dict
+from typing import List, Tuple, Dict, Optional
 from datetime import datetime
 
 sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
 
-# Pattern for structured definition blocks
-STRUCTURED_DEF_PATTERN = re.compile(r'\\begin\{definition\}', re.IGNORECASE)
-
 # Patterns that might indicate unstructured definitions
 DEFINITION_PATTERNS = [
     # Bold text followed by "is" or "are" (e.g., "A \textbf{group} is...")
     (re.compile(r'\\textbf\{([^}]+)\}\s+(is|are)\s+', re.IGNORECASE), 'bold_is'),
 
     # "is/are called" pattern (e.g., "...is called a \textbf{homomorphism}")
-    (re.compile(r'(is|are)\s+called\s+(a|an|the)?\s*\\textbf\{([^}]+)\}', re.IGNORECASE), 'is_called_bold'),
+    (re.compile(r'(is|are)\s+called\s+(a|an|the)?\s*\\textbf\{([^}]+)\}', re.IGNORECASE),
+     'is_called_bold'),
 
     # "defined as/by" patterns
     (re.compile(r'(is|are)?\s*(defined|define)\s+(as|by|to be)\s+', re.IGNORECASE), 'defined_as'),
@@ -43,7 +49,8 @@ DEFINITION_PATTERNS = [
     (re.compile(r'denoted\s+(by|as)\s+', re.IGNORECASE), 'denoted_by'),
 
     # Definition with dash or colon (e.g., "Definition: A foo is...")
-    (re.compile(r'^(Definition|Def\.?)\s*[-:]?\s*', re.IGNORECASE | re.MULTILINE), 'definition_label'),
+    (re.compile(r'^(Definition|Def\.?)\s*[-:]?\s*', re.IGNORECASE | re.MULTILINE),
+     'definition_label'),
 
     # "We say that" or "We call" patterns
     (re.compile(r'(We\s+say\s+that|We\s+call)\s+', re.IGNORECASE), 'we_say_call'),
@@ -52,79 +59,113 @@ DEFINITION_PATTERNS = [
     (re.compile(r'Let\s+\$[^$]+\$\s+be\s+(a|an)\s+', re.IGNORECASE), 'let_be'),
 ]
 
+# Environments whose contents are already structured (or not prose at all)
+DEFINITION_ENVS = ('definition',)
+CODE_ENVS = ('verbatim', 'lstlisting')
+
+
+def _env_depths(lines: List[str], envs: Tuple[str, ...]) -> List[int]:
+    """Nesting depth of envs after each line (begins/ends on the line count)."""
+    depths = []
+    depth = 0
+    for line in lines:
+        if '\\' in line:
+            for env in envs:
+                depth += line.count(f'\\begin{{{env}}}')
+                depth -= line.count(f'\\end{{{env}}}')
+        depths.append(depth)
+    return depths
+
+
+def analyze_text(content: str, relative_file: str) -> List[Dict]:
+    """Findings for one file's text, in pattern order.
+
+    One pass over the lines computes the environment nesting for every line;
+    each pattern then runs as a single C-level finditer over the file, and a
+    match's line is found by bisecting the line-start offsets, so the whole
+    file costs O(size + matches) instead of rescanning from the top per match.
+    Patterns stay separate scans: they can overlap one another (a "bold_is"
+    phrase may also be "defined_as"), and the report lists both.
+    """
+    lines = content.split('\n')
+    line_starts = [0]
+    for line in lines[:-1]:
+        line_starts.append(line_starts[-1] + len(line) + 1)
+    in_definition = _env_depths(lines, DEFINITION_ENVS)
+    in_code = _env_depths(lines, CODE_ENVS)
+
+    findings = []
+    for pattern, pattern_type in DEFINITION_PATTERNS:
+        for match in pattern.finditer(content):
+            line_num = bisect_right(line_starts, match.start())
+
+            # Skip if already in a definition block or in a code block
+            if in_definition[line_num - 1] > 0 or in_code[line_num - 1] > 0:
+                continue
+
+            # Get context (3 lines before and after)
+            start_line = max(0, line_num - 4)
+            end_line = min(len(lines), line_num + 3)
+
+            findings.append({
+                'file': relative_file,
+                'line': line_num,
+                'pattern_type': pattern_type,
+                'matched_text': match.group(0),
+                'context': lines[start_line:end_line],
+                'context_start_line': start_line + 1
+            })
+    return findings
+
+
+def _analyze_path(args: Tuple[str, str]) -> List[Dict]:
+    """Pool worker: findings for (file path, path relative to content dir)."""
+    file_path, relative_file = args
+    try:
+        with open(file_path, 'r', encoding='utf-8') as f:
+            return analyze_text(f.read(), relative_file)
+    except Exception as e:
+        print(f"Error analyzing {file_path}: {e}")
+        return []
+
+
+def changed_files(content_dir: Path, rev: str) -> List[Path]:
+    """.tex files under content_dir that differ from rev (or are untracked)."""
+    commands = [
+        ['git', 'diff', '--name-only', '--diff-filter=d', rev, '--', str(content_dir)],
+        ['git', 'ls-files', '--others', '--exclude-standard', '--', str(content_dir)],
+    ]
+    top = subprocess.run(['git', 'rev-parse', '--show-toplevel'], check=True,
+                         capture_output=True, text=True).stdout.strip()
+    names = set()
+    for command in commands:
+        out = subprocess.run(command, check=True, capture_output=True, text=True).stdout
+        prefix = top if command[1] == 'diff' else '.'  # diff paths are repo-relative
+        names.update(os.path.relpath(os.path.join(prefix, n)) for n in out.splitlines() if n)
+    return sorted(Path(n) for n in names if n.endswith('.tex') and Path(n).is_file())
+
+
 class DefinitionFinder:
-    def __init__(self, content_dir: str):
+    def __init__(self, content_dir: str, jobs: Optional[int] = None):
         self.content_dir = Path(content_dir)
+        self.jobs = jobs
         self.findings: List[Dict] = []
 
-    def find_unstructured_definitions(self):
-        """Search all content files for potential unstructured definitions."""
-        for content_file in sorted(self.content_dir.rglob('*.tex')):
-            self._analyze_file(content_file)
-
-    def _analyze_file(self, file_path: Path):
-        """Analyze a single content file for potential definitions."""
-        try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                content = f.read()
-
-            # Skip if file uses structured definitions
-            if STRUCTURED_DEF_PATTERN.search(content):
-                # Still check - might have both structured and unstructured
-                pass
-
-            # Split into lines for context
-            lines = content.split('\n')
-
-            # Check each pattern
-            for pattern, pattern_type in DEFINITION_PATTERNS:
-                for match in pattern.finditer(content):
-                    # Find line number
-                    line_num = content[:match.start()].count('\n') + 1
-
-                    # Get context (3 lines before and after)
-                    start_line = max(0, line_num - 4)
-                    end_line = min(len(lines), line_num + 3)
-                    context_lines = lines[start_line:end_line]
-
-                    # Skip if already in a definition block
-                    if self._is_in_definition_block(lines, line_num - 1):
-                        continue
-
-                    # Skip if in a code block
-                    if self._is_in_code_block(lines, line_num - 1):
-                        continue
-
-                    finding = {
-                        'file': str(file_path.relative_to(self.content_dir)),
-                        'line': line_num,
-                        'pattern_type': pattern_type,
-                        'matched_text': match.group(0),
-                        'context': context_lines,
-                        'context_start_line': start_line + 1
-                    }
-
-                    self.findings.append(finding)
-
-        except Exception as e:
-            print(f"Error analyzing {file_path}: {e}")
-
-    def _is_in_definition_block(self, lines: List[str], line_idx: int) -> bool:
-        """Check if a line is already inside a definition block."""
-        depth = 0
-        for i in range(line_idx + 1):
-            depth += lines[i].count(r'\begin{definition}')
-            depth -= lines[i].count(r'\end{definition}')
-        return depth > 0
-
-    def _is_in_code_block(self, lines: List[str], line_idx: int) -> bool:
-        """Check if a line is inside a code block."""
-        depth = 0
-        for i in range(line_idx + 1):
-            for env in ('verbatim', 'lstlisting'):
-                depth += lines[i].count(f'\\begin{{{env}}}')
-                depth -= lines[i].count(f'\\end{{{env}}}')
-        return depth > 0
+    def find_unstructured_definitions(self, files: Optional[List[Path]] = None):
+        """Search content files (default: all of them) for potential unstructured definitions."""
+        if files is None:
+            files = sorted(self.content_dir.rglob('*.tex'))
+        work = [
+            (str(path), str(path.resolve().relative_to(self.content_dir.resolve())))
+            for path in files
+        ]
+        if self.jobs == 1 or len(work) < 2:
+            results = list(map(_analyze_path, work))
+        else:
+            with ProcessPoolExecutor(max_workers=self.jobs) as pool:
+                results = list(pool.map(_analyze_path, work, chunksize=8))
+        for findings in results:
+            self.findings.extend(findings)
 
     def generate_report(self, output_file: str):
         """Generate a markdown report of all findings."""
@@ -170,24 +211,42 @@ class DefinitionFinder:
             print(f"\n{pattern_type}: {len(findings)} occurrences")
             # Show a few examples
             for finding in findings[:3]:
-                print(f"  - {finding['file']}:{finding['line']} - {finding['matched_text'][:50]}...")
+                print(
+                    f"  - {finding['file']}:{finding['line']} - "
+                    f"{finding['matched_text'][:50]}..."
+                )
+
 
 def main():
-    content_dir = "content"
-    output_file = "/tmp/unstructured_definitions_report.md"
+    parser = argparse.ArgumentParser(description="Find definitions not using definition blocks")
+    parser.add_argument('--content-dir', default='content')
+    parser.add_argument('--output', default='/tmp/unstructured_definitions_report.md')
+    parser.add_argument('--jobs', type=int, default=None,
+                        help='worker processes (default: CPU count; 1 = no pool)')
+    parser.add_argument('--changed-since', metavar='GIT_REV',
+                        help='only scan .tex files changed since this revision '
+                             '(plus untracked ones)')
+    parser.add_argument('--strict', action='store_true',
+                        help='exit 1 when anything is found (for pre-commit hooks)')
+    args = parser.parse_args()
 
     print("Searching for unstructured definitions...")
-    finder = DefinitionFinder(content_dir)
-    finder.find_unstructured_definitions()
+    finder = DefinitionFinder(args.content_dir, jobs=args.jobs)
+    files = None
+    if args.changed_since:
+        files = changed_files(Path(args.content_dir), args.changed_since)
+    finder.find_unstructured_definitions(files)
 
     print(f"\nFound {len(finder.findings)} potential unstructured definitions.")
 
-    print(f"\nGenerating report to {output_file}...")
-    finder.generate_report(output_file)
+    print(f"\nGenerating report to {args.output}...")
+    finder.generate_report(args.output)
 
     finder.generate_summary()
 
-    print(f"\nReport saved to: {output_file}")
+    print(f"\nReport saved to: {args.output}")
+    return 1 if args.strict and finder.findings else 0
+
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
@@ -7,13 +7,24 @@ reference targets, link hrefs, image sources, demo names, and normalized
 visible text. Whitespace, tag choice, attribute order, heading ids, and
 demo element ids are invisible.
 
-Usage: python3 scripts/semantic_diff.py site-baseline site-new
+Usage: python3 scripts/semantic_diff.py site-baseline site-new [site-new2 ...]
+           [--jobs N] [--cache summaries.sqlite]
+
+Byte-identical page pairs are skipped without parsing. The rest are
+summarized once per distinct file content, in a process pool, and with
+--cache the summaries persist (keyed by content hash and this script's own
+source) so comparing a baseline against many builds only re-summarizes
+pages that changed.
 """
 
-import html
+import argparse
+import hashlib
 import json
+import os
 import re
+import sqlite3
 import sys
+from concurrent.futures import ProcessPoolExecutor
 from html.parser import HTMLParser
 from pathlib import Path
 
@@ -105,7 +116,10 @@ class Extractor(HTMLParser):
 
 
 def summarize(path: Path) -> dict:
-    src = path.read_text(encoding="utf-8")
+    return summarize_text(path.read_text(encoding="utf-8"))
+
+
+def summarize_text(src: str) -> dict:
     ex = Extractor()
     ex.feed(src)
     text = " ".join("".join(ex.text_parts).split())
@@ -128,27 +142,129 @@ def summarize(path: Path) -> dict:
     }
 
 
-def main(old_root, new_root):
-    old_root, new_root = Path(old_root), Path(new_root)
+def _summarize_file(path: str) -> str:
+    """Pool worker: the summary as JSON (tuples become lists either way, so
+    fresh and cached summaries compare alike)."""
+    return json.dumps(summarize(Path(path)))
+
+
+class SummaryCache:
+    """Persistent content-hash -> summary store (SQLite).
+
+    Keys include a digest of this script, so editing the extractor
+    invalidates every stored summary.
+    """
+
+    SCRIPT_DIGEST = hashlib.sha256(Path(__file__).read_bytes()).hexdigest()[:16]
+
+    def __init__(self, path):
+        self.db = sqlite3.connect(path)
+        self.db.execute("CREATE TABLE IF NOT EXISTS summaries (key TEXT PRIMARY KEY, summary TEXT)")
+
+    def _key(self, digest):
+        return f"{self.SCRIPT_DIGEST}:{digest}"
+
+    def get_many(self, digests):
+        found = {}
+        digests = list(digests)
+        for i in range(0, len(digests), 500):
+            chunk = {self._key(d): d for d in digests[i:i + 500]}
+            marks = ",".join("?" * len(chunk))
+            for key, summary in self.db.execute(
+                    f"SELECT key, summary FROM summaries WHERE key IN ({marks})", list(chunk)):
+                found[chunk[key]] = summary
+        return found
+
+    def put_many(self, summaries):
+        with self.db:
+            self.db.executemany("INSERT OR REPLACE INTO summaries VALUES (?, ?)",
+                                [(self._key(d), s) for d, s in summaries.items()])
+
+
+def _digest(path: Path) -> str:
+    return hashlib.sha256(path.read_bytes()).hexdigest()
+
+
+def summaries_for(paths_by_digest, jobs=None, cache=None):
+    """{digest: summary dict} for each distinct content, summarizing misses
+    in a process pool (jobs=1 runs inline)."""
+    raw = cache.get_many(paths_by_digest) if cache else {}
+    missing = [d for d in paths_by_digest if d not in raw]
+    if missing:
+        paths = [str(paths_by_digest[d]) for d in missing]
+        if jobs == 1 or len(missing) < 2:
+            fresh = map(_summarize_file, paths)
+            raw.update(zip(missing, fresh))
+        else:
+            with ProcessPoolExecutor(max_workers=jobs) as pool:
+                chunksize = max(1, len(paths) // ((jobs or os.cpu_count() or 1) * 4))
+                raw.update(zip(missing, pool.map(_summarize_file, paths, chunksize=chunksize)))
+        if cache:
+            cache.put_many({d: raw[d] for d in missing})
+    return {d: json.loads(s) for d, s in raw.items()}
+
+
+def compare(old_root, new_roots, jobs=None, cache=None):
+    """Diff every new root against the baseline; returns {new root: diff count}."""
+    old_root = Path(old_root)
     old_pages = {p.relative_to(old_root) for p in old_root.rglob("index.html")}
-    new_pages = {p.relative_to(new_root) for p in new_root.rglob("index.html")}
-    diffs = 0
-    for missing in sorted(old_pages - new_pages):
-        print(f"MISSING in new: {missing}"); diffs += 1
-    for extra in sorted(new_pages - old_pages):
-        print(f"EXTRA in new: {extra}"); diffs += 1
-    for page in sorted(old_pages & new_pages):
-        a, b = summarize(old_root / page), summarize(new_root / page)
-        for key in a:
-            if a[key] != b[key]:
-                diffs += 1
-                print(f"\n=== {page} :: {key} ===")
-                print(f"  old: {json.dumps(a[key])[:800]}")
-                print(f"  new: {json.dumps(b[key])[:800]}")
-    print(f"\n{'CLEAN' if not diffs else str(diffs) + ' differences'} "
-          f"across {len(old_pages & new_pages)} shared pages")
-    return 1 if diffs else 0
+    old_digests = {page: _digest(old_root / page) for page in old_pages}
+
+    # Hash everything first so only pairs whose bytes differ get summarized,
+    # and each distinct file content is summarized once across all roots
+    trees = []
+    to_summarize = {}
+    for new_root in map(Path, new_roots):
+        new_pages = {p.relative_to(new_root) for p in new_root.rglob("index.html")}
+        changed = {}
+        for page in sorted(old_pages & new_pages):
+            digest = _digest(new_root / page)
+            if digest != old_digests[page]:
+                changed[page] = digest
+                to_summarize.setdefault(digest, new_root / page)
+                to_summarize.setdefault(old_digests[page], old_root / page)
+        trees.append((new_root, new_pages, changed))
+
+    summaries = summaries_for(to_summarize, jobs=jobs, cache=cache)
+
+    results = {}
+    for new_root, new_pages, changed in trees:
+        if len(new_roots) > 1:
+            print(f"\n##### {new_root}")
+        diffs = 0
+        for missing in sorted(old_pages - new_pages):
+            print(f"MISSING in new: {missing}")
+            diffs += 1
+        for extra in sorted(new_pages - old_pages):
+            print(f"EXTRA in new: {extra}")
+            diffs += 1
+        for page, digest in changed.items():
+            a, b = summaries[old_digests[page]], summaries[digest]
+            for key in a:
+                if a[key] != b[key]:
+                    diffs += 1
+                    print(f"\n=== {page} :: {key} ===")
+                    print(f"  old: {json.dumps(a[key])[:800]}")
+                    print(f"  new: {json.dumps(b[key])[:800]}")
+        shared = len(old_pages & new_pages)
+        print(f"\n{'CLEAN' if not diffs else str(diffs) + ' differences'} "
+              f"across {shared} shared pages ({shared - len(changed)} byte-identical)")
+        results[new_root] = diffs
+    return results
+
+
+def main(old_root, *new_roots, jobs=None, cache_path=None):
+    cache = SummaryCache(cache_path) if cache_path else None
+    results = compare(old_root, new_roots, jobs=jobs, cache=cache)
+    return 1 if any(results.values()) else 0
 
 
 if __name__ == "__main__":
-    sys.exit(main(sys.argv[1], sys.argv[2]))
+    parser = argparse.ArgumentParser(description="Semantic diff of generated site trees")
+    parser.add_argument("baseline")
+    parser.add_argument("candidates", nargs="+")
+    parser.add_argument("--jobs", type=int, default=None,
+                        help="worker processes (default: CPU count; 1 = no pool)")
+    parser.add_argument("--cache", help="SQLite file of per-file summaries to reuse")
+    args = parser.parse_args()
+    sys.exit(main(args.baseline, *args.candidates, jobs=args.jobs, cache_path=args.cache))
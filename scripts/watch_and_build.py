@@ -9,6 +9,7 @@ import os
 import time
 import logging
 import random
+import threading
 from pathlib import Path
 
 # Add parent directory to path
@@ -66,16 +67,21 @@ def get_mtimes(dirs: list) -> dict:
 # believing it is current (the 2026-07-10 checkout/merge race).
 STARTUP_MTIMES = get_mtimes(CONTENT_DIRS)
 
-from mathnotes.sitegenerator.builder import SiteBuilder
-from mathnotes.navigation import clear_navigation_cache
-from latexblocks.page_renderer import clear_page_cache
+from mathnotes.sitegenerator.builder import BuildCancelled, SiteBuilder  # noqa: E402
+from mathnotes.sitegenerator.daemon import BuildService, serve  # noqa: E402
+from mathnotes.sitegenerator.page_store import PageStore  # noqa: E402
 
-from mathnotes.config import configure_latexblocks
+from mathnotes.config import MEMORY_PAGES, configure_latexblocks  # noqa: E402
 configure_latexblocks()
 
+# Rendered pages the build service hands to the dev server (in-memory mode)
+PAGE_STORE = PageStore() if MEMORY_PAGES else None
+
 # Configure logging with microsecond precision to debug duplicate output
 handler = logging.StreamHandler(sys.stdout)
-handler.setFormatter(logging.Formatter('%(asctime)s.%(msecs)03d - %(name)s - %(levelname)s - %(message)s', datefmt='%H:%M:%S'))
+handler.setFormatter(logging.Formatter(
+    '%(asctime)s.%(msecs)03d - %(name)s - %(levelname)s - %(message)s', datefmt='%H:%M:%S'
+))
 logging.root.addHandler(handler)
 logging.root.setLevel(logging.INFO)
 logger = logging.getLogger(__name__)
@@ -102,38 +108,79 @@ def find_changes(old_mtimes: dict, new_mtimes: dict) -> list:
     return changed
 
 
-def build_site(output_dir: str, builder: SiteBuilder = None) -> SiteBuilder:
-    """Build the site, optionally reusing an existing builder."""
-    # Refresh notation macros before anything parses content: the URL mapper
-    # below parses pages before block_index's own refresh runs, so a macro
-    # newly declared in one file but used in an alphabetically-earlier file
-    # would fail the build against the stale in-memory registry.
-    from latexblocks import notation
+def renders_in_memory(changed: list) -> bool:
+    """Whether these changes only alter page HTML, so an in-memory-mode
+    rebuild can skip disk: edited .tex files and templates. Deletions,
+    images and JS/CSS bundles still need a full build."""
+    return bool(changed) and all(
+        (path.endswith('.tex') and os.path.isfile(path)) or path.startswith('templates/')
+        for path in changed
+    )
+
+
+def build_site(output_dir: str, builder: SiteBuilder = None, changed: list = None,
+               cancel: threading.Event = None) -> SiteBuilder:
+    """Build the site, optionally reusing an existing builder.
 
-    notation.refresh_registry()
+    With changed paths, a reused builder updates its URL mappings for just
+    those files instead of rediscovering the whole corpus. Setting cancel
+    abandons the build (BuildCancelled) between pages. In in-memory mode,
+    page-only changes are published to the page store without touching
+    disk."""
     if builder is None:
-        # First build - create fresh builder
+        # First build - create fresh builder. Refresh notation macros
+        # before discovery parses anything (see SiteBuilder.refresh).
+        from latexblocks import notation
+
+        notation.refresh_registry()
         logger.info("Creating new SiteBuilder...")
-        builder = SiteBuilder(output_dir=output_dir)
+        builder = SiteBuilder(output_dir=output_dir, page_store=PAGE_STORE)
     else:
-        # Subsequent builds - clear some caches but keep builder
-        logger.info("Reusing SiteBuilder, clearing caches...")
-        # Clear navigation cache (will be rebuilt quickly)
-        clear_navigation_cache()
-        # Rebuild URL mappings (required for new/moved/deleted files)
-        builder.url_mapper.build_url_mappings()
-        # Rebuild block index (required - rendered HTML is stored here)
-        builder.block_index.build_index()
-        # Clear page specs cache so specs are recomputed
-        # (page rendering cache uses mtime, so only changed files re-render)
-        for page in builder.page_registry.pages:
-            page._specs_cache = None
-        # DON'T clear page cache - mtime-based invalidation handles it
-
-    builder.build()
+        # Subsequent builds - keep the builder and its caches; update only
+        # what the changed paths affect
+        logger.info("Reusing SiteBuilder, refreshing changed content...")
+        builder.refresh(changed)
+        if builder.page_store is not None and renders_in_memory(changed):
+            builder.render_to_store(cancel=cancel)
+            return builder
+
+    builder.build(cancel=cancel)
     return builder
 
 
+class BuildWorker(threading.Thread):
+    """Runs one rebuild off the watch loop so newer edits can supersede it.
+
+    The loop sets `cancel` when files change mid-build; the build then stops
+    at the next page and the loop starts a fresh one that re-applies this
+    build's changes along with the new ones. Only a finished build is
+    published (SiteBuilder.build swaps its staging tree in)."""
+
+    def __init__(self, output_dir: str, builder: SiteBuilder, changes: list, lock=None):
+        super().__init__(daemon=True)
+        # shared with the build service, whose clients use the same builder
+        self.lock = lock or threading.Lock()
+        self.output_dir = output_dir
+        self.builder = builder
+        self.changes = changes
+        self.cancel = threading.Event()
+        self.cancelled = False
+        self.error = None
+        self.started = time.time()
+
+    def run(self):
+        try:
+            with self.lock:
+                self.builder = build_site(
+                    self.output_dir, self.builder, self.changes, cancel=self.cancel
+                )
+        except BuildCancelled:
+            self.cancelled = True
+        except Exception as e:
+            logger.exception(f"Build failed: {e}")
+            self.error = e
+
+
 def _reexec():
     """Replace this process with a fresh one (same PID, so
     smart-rebuild.sh's liveness check and exit trap keep working)."""
@@ -164,17 +211,6 @@ def initial_build_with_retry(output_dir: str) -> SiteBuilder:
                 _reexec()
 
 
-def snapshot_then_build(output_dir: str, builder: SiteBuilder = None):
-    """Snapshot file state BEFORE building, and return (builder, snapshot).
-
-    Changes that land while the build runs then surface as diffs on the
-    next poll (at worst one redundant rebuild) instead of being silently
-    absorbed into a post-build snapshot and lost."""
-    mtimes = get_mtimes(CONTENT_DIRS)
-    builder = build_site(output_dir, builder)
-    return builder, mtimes
-
-
 def main():
     output_dir = '/app/static-build/website'
     if len(sys.argv) > 2 and sys.argv[1] == '--output':
@@ -191,6 +227,19 @@ def main():
 
     logger.info("Initial build complete, watching for changes...")
 
+    # Serve the warm builder to CLI builds and other local clients. The
+    # loop below refreshes it for every change, so the service must not
+    # diff mtimes and refresh the same changes again.
+    service = BuildService(builder, output_dir=output_dir, page_store=PAGE_STORE, watched=True)
+    try:
+        serve(service, background=True)
+    except (OSError, RuntimeError) as e:
+        logger.warning(f"Build service not started: {e}")
+        if PAGE_STORE is not None:
+            # nobody could fetch in-memory pages: keep writing them to disk
+            logger.warning("In-memory pages disabled; rebuilds write to disk")
+            builder.page_store = None
+
     # Baseline = the pre-import snapshot, so anything that changed during
     # the imports or the initial build registers on the first poll
     last_mtimes = STARTUP_MTIMES
@@ -201,8 +250,13 @@ def main():
     if js_signal_path.exists():
         last_js_signal_mtime = js_signal_path.stat().st_mtime
 
-    # Watch loop with debounce
+    # Watch loop with debounce; builds run in a BuildWorker so the loop
+    # keeps polling and can supersede a build that's already stale
     pending_changes = []
+    # changes a cancelled or failed build never finished applying; they
+    # ride along with the next build
+    unapplied_changes = []
+    worker = None
     last_change_time = 0
     DEBOUNCE_SECONDS = 0.3  # Wait 300ms after last change before building
 
@@ -223,45 +277,69 @@ def main():
 
         if changed or js_rebuild_needed:
             if changed:
-                pending_changes = changed
+                pending_changes = pending_changes + changed
             if js_rebuild_needed:
                 pending_changes = pending_changes or ['(JS/CSS rebuild)']
                 # Random delay to detect duplicate processes
                 delay = random.uniform(0.01, 0.05)
                 time.sleep(delay)
-                logger.info(f"[ID:{PROCESS_ID}] JS/CSS rebuild signal received (delay={delay:.3f}s)")
+                logger.info(
+                    f"[ID:{PROCESS_ID}] JS/CSS rebuild signal received (delay={delay:.3f}s)"
+                )
             last_change_time = time.time()
             last_mtimes = current_mtimes
 
-        # If we have pending changes and enough time has passed, build
-        if pending_changes and (time.time() - last_change_time) >= DEBOUNCE_SECONDS:
+            # Whatever is building now is already stale
+            if worker is not None and worker.is_alive() and not worker.cancel.is_set():
+                logger.info(f"[ID:{PROCESS_ID}] New changes; cancelling in-flight build")
+                worker.cancel.set()
+
+        # Collect a finished build
+        if worker is not None and not worker.is_alive():
+            builder = service.builder = worker.builder
+            if worker.cancelled:
+                elapsed = time.time() - worker.started
+                logger.info(f"[ID:{PROCESS_ID}] Build superseded after {elapsed:.2f}s")
+                unapplied_changes = worker.changes
+            elif worker.error is not None:
+                # accept the broken state as seen: retry on the next edit,
+                # not in a tight loop against the same broken file
+                unapplied_changes = worker.changes
+            else:
+                # Write timestamp for browser refresh (survives clean since
+                # outside website dir)
+                Path(TIMESTAMP_FILE).write_text(str(int(time.time())))
+                elapsed = time.time() - worker.started
+                logger.info(f"[ID:{PROCESS_ID}] Rebuild complete in {elapsed:.2f}s")
+            worker = None
+
+        # If we have pending changes, enough time has passed, and no build
+        # is still winding down, start one
+        debounced = (time.time() - last_change_time) >= DEBOUNCE_SECONDS
+        if worker is None and pending_changes and debounced:
             delay = random.uniform(0.01, 0.05)
             time.sleep(delay)
-            logger.info(f"[ID:{PROCESS_ID}] Changes detected: {len(pending_changes)} item(s) (delay={delay:.3f}s)")
+            logger.info(
+                f"[ID:{PROCESS_ID}] Changes detected: {len(pending_changes)} item(s) "
+                f"(delay={delay:.3f}s)"
+            )
             for f in pending_changes[:5]:  # Show first 5
                 logger.info(f"  {f}")
             if len(pending_changes) > 5:
                 logger.info(f"  ... and {len(pending_changes) - 5} more")
 
             if requires_restart(pending_changes):
-                logger.info(f"[ID:{PROCESS_ID}] Python source changed, restarting watcher to load new code...")
+                logger.info(
+                    f"[ID:{PROCESS_ID}] Python source changed, "
+                    "restarting watcher to load new code..."
+                )
                 _reexec()
 
-            try:
-                build_start = time.time()
-                builder, last_mtimes = snapshot_then_build(output_dir, builder)
-                build_time = time.time() - build_start
-
-                # Write timestamp for browser refresh (survives clean since outside website dir)
-                Path(TIMESTAMP_FILE).write_text(str(int(time.time())))
-
-                logger.info(f"[ID:{PROCESS_ID}] Rebuild complete in {build_time:.2f}s")
-            except Exception as e:
-                logger.exception(f"Build failed: {e}")
-                # accept the broken state as seen: retry on the next edit,
-                # not in a tight loop against the same broken file
-                last_mtimes = get_mtimes(CONTENT_DIRS)
-
+            worker = BuildWorker(
+                output_dir, builder, unapplied_changes + pending_changes, service.lock
+            )
+            worker.start()
+            unapplied_changes = []
             pending_changes = []
 
 
@@ -1,10 +1,151 @@
-from flask import Blueprint, request, jsonify
+import json
+import logging
+import os
+
+from concurrent.futures.process import BrokenProcessPool
+
+from flask import Blueprint, Response, jsonify, request, stream_with_context
+
+from .cache import ResultCache, canonical_key
+from .dynamics import bifurcation_diagram, parse_bifurcation_request
+from .fourier import epicycles, parse_fft_request
+from .heat import FRAMES_PER_JOB, FRAME_DTYPE, advance, initial_state, parse_heat_request
+from .pool import ComputePool, DeadlineExceeded, PoolSaturated
+
+logger = logging.getLogger(__name__)
 
 api = Blueprint('api', __name__, url_prefix='/api')
 
+# Per gunicorn worker process; shared by that worker's threads, which is
+# what lets concurrent identical requests coalesce.
+_cache = ResultCache(
+    max_entries=int(os.environ.get('COMPUTE_CACHE_ENTRIES', 256)),
+    max_bytes=int(os.environ.get('COMPUTE_CACHE_BYTES', 64 * 1024 * 1024)),
+)
+
+# Also per gunicorn worker: COMPUTE_WORKERS bounds concurrent jobs, and
+# COMPUTE_QUEUE_DEPTH how many more may wait before requests get a 429.
+_pool = ComputePool(
+    workers=int(os.environ.get('COMPUTE_WORKERS', 2)),
+    queue_depth=int(os.environ.get('COMPUTE_QUEUE_DEPTH', 8)),
+    time_budget=float(os.environ.get('COMPUTE_TIME_BUDGET', 10)),
+)
+
+
+def _error(status, message, retry_after=None):
+    response = jsonify({'error': message})
+    response.status_code = status
+    if retry_after is not None:
+        response.headers['Retry-After'] = str(retry_after)
+    return response
+
+
+@api.errorhandler(PoolSaturated)
+def pool_saturated(e):
+    return _error(429, str(e), e.retry_after)
+
+
+@api.errorhandler(DeadlineExceeded)
+def deadline_exceeded(e):
+    return _error(503, str(e), e.retry_after)
+
+
+@api.errorhandler(BrokenProcessPool)
+def pool_broken(e):
+    return _error(503, 'compute worker crashed', 1)
+
+
+def _run_compute(data):
+    # Placeholder for dynamical systems computation
+    return {'result': 'placeholder', 'input': data}
+
+
+def _cached_json(compute, data):
+    """Serve compute(data) through the result cache with a strong ETag.
+
+    Cache misses run compute in the process pool; concurrent identical
+    requests share that one job (and its 429/503 if it can't run).
+
+    Demos revalidate with fetch() and If-None-Match; a matching tag gets a
+    bodiless 304 without touching the computation.
+    """
+    entry = _cache.get_or_compute(
+        canonical_key([compute.__name__, data]),
+        lambda: json.dumps(_pool.run(compute, data), separators=(',', ':')).encode('utf-8'),
+    )
+    if entry.etag in request.if_none_match:
+        response = Response(status=304)
+    else:
+        response = Response(entry.body, mimetype='application/json')
+    response.set_etag(entry.etag)
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
 
 @api.route('/compute', methods=['POST'])
 def compute():
-    # Placeholder for dynamical systems computation
     data = request.get_json() or {}
-    return jsonify({'result': 'placeholder', 'input': data})
+    return _cached_json(_run_compute, data)
+
+
+@api.route('/bifurcation', methods=['POST'])
+def bifurcation():
+    """Orbit-density image for a 1-D map family over a parameter range."""
+    try:
+        params = parse_bifurcation_request(request.get_json() or {})
+    except ValueError as e:
+        return _error(400, str(e))
+    return _cached_json(bifurcation_diagram, params)
+
+
+@api.route('/fft', methods=['POST'])
+def fft():
+    """Top-K epicycle coefficients for one drawn path or a batch of them."""
+    try:
+        params = parse_fft_request(request.get_json() or {})
+    except ValueError as e:
+        return _error(400, str(e))
+    return _cached_json(epicycles, params)
+
+
+@api.route('/heat', methods=['POST'])
+def heat():
+    """Stream Crank–Nicolson frames of the 1-D heat equation.
+
+    The body is `frames` rows of `grid` little-endian float32 temperatures,
+    the first being the initial state. Frames are computed in pool jobs of
+    FRAMES_PER_JOB and sent as each job finishes. The first job runs before
+    the response starts so saturation still gets a proper 429/503; if a
+    later job fails, the stream just ends early, so clients should compare
+    the rows received against X-Heat-Frames.
+    """
+    try:
+        params = parse_heat_request(request.get_json() or {})
+    except ValueError as e:
+        return _error(400, str(e))
+
+    step = {k: params[k] for k in ('grid', 'bc', 'alpha', 'dt', 'steps_per_frame')}
+    u0 = initial_state(params)
+    remaining = params['frames'] - 1
+    count = min(FRAMES_PER_JOB, remaining)
+    head, u = _pool.run(advance, u=u0, count=count, **step) if count else (b'', u0)
+
+    def frames(u, remaining):
+        yield u0.astype(FRAME_DTYPE).tobytes()
+        yield head
+        while remaining > 0:
+            count = min(FRAMES_PER_JOB, remaining)
+            try:
+                chunk, u = _pool.run(advance, u=u, count=count, **step)
+            except (PoolSaturated, DeadlineExceeded, BrokenProcessPool) as e:
+                logger.warning(f"Heat stream stopped with {remaining} frames left: {e}")
+                return
+            remaining -= count
+            yield chunk
+
+    response = Response(stream_with_context(frames(u, remaining - count)),
+                        mimetype='application/octet-stream')
+    response.headers['X-Heat-Grid'] = str(params['grid'])
+    response.headers['X-Heat-Frames'] = str(params['frames'])
+    response.headers['X-Heat-Dtype'] = 'float32-le'
+    return response
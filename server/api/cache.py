@@ -0,0 +1,117 @@
+"""Result cache for the compute API.
+
+Responses are keyed by a canonical hash of the request payload, kept in an
+LRU bounded by both entry count and total body bytes, and computed at most
+once at a time per key: concurrent identical requests wait for the first
+one instead of repeating the work.
+"""
+
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable, Dict
+
+
+def canonical_key(payload: Any) -> str:
+    """Hash a JSON payload independently of key order and whitespace."""
+    canonical = json.dumps(payload, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+@dataclass(frozen=True)
+class CachedResult:
+    body: bytes
+    etag: str  # strong validator: hash of the exact body bytes
+
+
+class _InFlight:
+    """A computation other threads can wait on."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: CachedResult | None = None
+        self.error: BaseException | None = None
+
+
+class ResultCache:
+    """Thread-safe LRU of serialized results with request coalescing."""
+
+    def __init__(self, max_entries: int = 256, max_bytes: int = 64 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[str, CachedResult]" = OrderedDict()
+        self._bytes = 0
+        self._in_flight: Dict[str, _InFlight] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    @property
+    def total_bytes(self) -> int:
+        return self._bytes
+
+    def get(self, key: str) -> CachedResult | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def put(self, key: str, body: bytes) -> CachedResult:
+        entry = CachedResult(body=body, etag=hashlib.sha256(body).hexdigest())
+        # A body larger than the whole budget would evict everything and
+        # then itself; hand it back uncached instead.
+        if len(body) > self.max_bytes:
+            return entry
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= len(old.body)
+            self._entries[key] = entry
+            self._bytes += len(body)
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= len(evicted.body)
+        return entry
+
+    def get_or_compute(self, key: str, compute: Callable[[], bytes]) -> CachedResult:
+        """Return the cached result for key, computing it at most once.
+
+        The first caller for a missing key runs compute(); callers arriving
+        while it runs block until it finishes and share its result (or its
+        exception — failures are not cached, so the next request retries).
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                return entry
+            flight = self._in_flight.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._in_flight[key] = _InFlight()
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.result
+
+        try:
+            flight.result = self.put(key, compute())
+            return flight.result
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._in_flight[key]
+            flight.done.set()
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
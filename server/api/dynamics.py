@@ -0,0 +1,146 @@
+"""Orbit (bifurcation) diagrams for 1-D map families.
+
+Every parameter column and every seed is iterated at once as one NumPy
+array, so a dense diagram is a few hundred vectorized steps rather than
+millions of scalar ones. After the transient is discarded, visited
+states are binned into a per-column histogram and returned as a compact
+uint8 image.
+"""
+
+import base64
+
+import numpy as np
+
+from .pool import check_deadline
+
+# name -> (map, default r range, default x window, seed range)
+FAMILIES = {
+    'logistic': (lambda x, r: r * x * (1 - x), (2.5, 4.0), (0.0, 1.0), (0.0, 1.0)),
+    'sine': (lambda x, r: r * np.sin(np.pi * x), (0.6, 1.0), (0.0, 1.0), (0.0, 1.0)),
+    'tent': (lambda x, r: r * np.minimum(x, 1 - x), (1.0, 2.0), (0.0, 1.0), (0.0, 1.0)),
+    'ricker': (lambda x, r: x * np.exp(r * (1 - x)), (1.5, 4.0), (0.0, 8.0), (0.1, 2.0)),
+}
+
+MAX_WIDTH = 2000
+MAX_HEIGHT = 1200
+MAX_SEEDS = 256
+MAX_STEPS = 10000
+# width * seeds * (transient + iterations): bounds a single request's work
+MAX_EVALUATIONS = 200_000_000
+# iterations binned per bincount call, at most
+CHUNK = 64
+# bytes of orbit states buffered per bincount call; the binning makes a few
+# temporaries of the same size, so this bounds a job's peak memory at
+# max(MAX_SEEDS * MAX_WIDTH) well below what a CHUNK-deep buffer would need
+CHUNK_BYTES = 16 * 1024 * 1024
+
+
+def _chunk(seeds: int, width: int) -> int:
+    """Iterations per bincount call that fit in CHUNK_BYTES (at least one)."""
+    return max(1, min(CHUNK, CHUNK_BYTES // (seeds * width * 8)))
+
+
+def _number(data, key, default, lo=None, hi=None, cast=float):
+    value = data.get(key, default)
+    try:
+        value = cast(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"{key} must be a number")
+    if not np.isfinite(value):
+        raise ValueError(f"{key} must be finite")
+    if (lo is not None and value < lo) or (hi is not None and value > hi):
+        raise ValueError(f"{key} must be between {lo} and {hi}")
+    return value
+
+
+def parse_bifurcation_request(data: dict) -> dict:
+    """Validate a request body and fill in defaults.
+
+    Raises ValueError with a client-facing message on bad input.
+    """
+    if not isinstance(data, dict):
+        raise ValueError("request body must be a JSON object")
+    family = data.get('family', 'logistic')
+    if family not in FAMILIES:
+        raise ValueError(f"family must be one of {', '.join(sorted(FAMILIES))}")
+    _, (r_lo, r_hi), (x_lo, x_hi), _ = FAMILIES[family]
+
+    params = {
+        'family': family,
+        'r_min': _number(data, 'r_min', r_lo),
+        'r_max': _number(data, 'r_max', r_hi),
+        'x_min': _number(data, 'x_min', x_lo),
+        'x_max': _number(data, 'x_max', x_hi),
+        'width': _number(data, 'width', 800, 1, MAX_WIDTH, int),
+        'height': _number(data, 'height', 600, 1, MAX_HEIGHT, int),
+        'seeds': _number(data, 'seeds', 16, 1, MAX_SEEDS, int),
+        'transient': _number(data, 'transient', 500, 0, MAX_STEPS, int),
+        'iterations': _number(data, 'iterations', 500, 1, MAX_STEPS, int),
+    }
+    if params['r_max'] <= params['r_min']:
+        raise ValueError("r_max must be greater than r_min")
+    if params['x_max'] <= params['x_min']:
+        raise ValueError("x_max must be greater than x_min")
+    work = params['width'] * params['seeds'] * (params['transient'] + params['iterations'])
+    if work > MAX_EVALUATIONS:
+        raise ValueError(f"request needs {work} map evaluations; the limit is {MAX_EVALUATIONS}")
+    return params
+
+
+def attractor_density(family, r_min, r_max, x_min, x_max, width, height, seeds,
+                      transient, iterations):
+    """Histogram of post-transient orbit points, one column per r value.
+
+    Returns a (height, width) int64 array of visit counts; row 0 is x_max
+    so the array reads like an image.
+    """
+    f, _, _, (seed_lo, seed_hi) = FAMILIES[family]
+    r = np.linspace(r_min, r_max, width)
+    rng = np.random.default_rng(0)
+    x = rng.uniform(seed_lo, seed_hi, size=(seeds, width))
+
+    counts = np.zeros(height * width, dtype=np.int64)
+    columns = np.arange(width)
+    scale = height / (x_max - x_min)
+
+    # diverging orbits overflow to inf/nan and simply drop out of the bins
+    with np.errstate(over='ignore', invalid='ignore'):
+        for start in range(0, transient, CHUNK):
+            for _ in range(min(CHUNK, transient - start)):
+                x = f(x, r)
+            check_deadline()
+
+        chunk = _chunk(seeds, width)
+        buf = np.empty((chunk, seeds, width))
+        for start in range(0, iterations, chunk):
+            n = min(chunk, iterations - start)
+            for i in range(n):
+                x = f(x, r)
+                buf[i] = x
+            rows = np.floor((buf[:n] - x_min) * scale)
+            valid = (rows >= 0) & (rows < height)
+            cols = np.broadcast_to(columns, rows.shape)[valid]
+            flat = rows[valid].astype(np.int64) * width + cols
+            counts += np.bincount(flat, minlength=height * width)
+            check_deadline()
+
+    return counts.reshape(height, width)[::-1]
+
+
+def bifurcation_diagram(params: dict) -> dict:
+    """Job entry point: density image as base64 uint8, log-scaled per column."""
+    counts = attractor_density(**params)
+    column_max = counts.max(axis=0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        density = np.where(column_max > 0, np.log1p(counts) / np.log1p(column_max), 0.0)
+    pixels = np.round(density * 255).astype(np.uint8)
+
+    return {
+        'family': params['family'],
+        'r_range': [params['r_min'], params['r_max']],
+        'x_range': [params['x_min'], params['x_max']],
+        'width': params['width'],
+        'height': params['height'],
+        'encoding': 'uint8-base64',
+        'data': base64.b64encode(pixels.tobytes()).decode('ascii'),
+    }
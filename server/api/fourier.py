@@ -0,0 +1,128 @@
+"""Epicycle (Fourier) coefficients for drawn paths.
+
+A path is resampled to evenly spaced points by arc length, so the
+coefficients describe its shape rather than how fast it was drawn, and
+then transformed with one FFT. Coefficients use the same convention as
+calculateFourierCoefficients in demos/complex-analysis/contour-shared.ts:
+c_f = (1/N) * sum_k z_k * exp(-2*pi*i*f*k/N), with signed integer f.
+"""
+
+import numpy as np
+
+MAX_POINTS = 100_000
+MAX_SAMPLES = 8192
+MAX_PATHS = 32
+
+
+def _is_number(value):
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def _parse_points(points):
+    if not isinstance(points, list) or len(points) < 2:
+        raise ValueError("points must be a list of at least two points")
+    if len(points) > MAX_POINTS:
+        raise ValueError(f"at most {MAX_POINTS} points per path")
+    if all(isinstance(p, dict) for p in points):
+        points = [[p.get('x'), p.get('y')] for p in points]
+    if not all(
+        isinstance(p, list) and len(p) == 2 and _is_number(p[0]) and _is_number(p[1])
+        for p in points
+    ):
+        raise ValueError("points must be all [x, y] pairs or all {x, y} objects, of numbers")
+    try:
+        xy = np.asarray(points, dtype=float)
+    except OverflowError:
+        raise ValueError("points must be finite [x, y] pairs")
+    if not np.isfinite(xy).all():
+        raise ValueError("points must be finite [x, y] pairs")
+    return xy.tolist()
+
+
+def _parse_int(options, key, default, lo, hi):
+    value = options.get(key, default)
+    if not isinstance(value, int) or isinstance(value, bool) or not lo <= value <= hi:
+        raise ValueError(f"{key} must be an integer between {lo} and {hi}")
+    return value
+
+
+def _parse_bool(options, key, default):
+    value = options.get(key, default)
+    if not isinstance(value, bool):
+        raise ValueError(f"{key} must be true or false")
+    return value
+
+
+def _parse_path(path, defaults):
+    if not isinstance(path, dict):
+        raise ValueError("each path must be an object with a points list")
+    options = {**defaults, **path}
+    samples = _parse_int(options, 'samples', 512, 2, MAX_SAMPLES)
+    return {
+        'points': _parse_points(path.get('points')),
+        'samples': samples,
+        'k': _parse_int(options, 'k', samples, 1, samples),
+        'closed': _parse_bool(options, 'closed', True),
+    }
+
+
+def parse_fft_request(data: dict) -> dict:
+    """Validate a single-path or batch request.
+
+    A single path is ``{points, samples?, k?, closed?}``; a batch is
+    ``{paths: [...], samples?, k?, closed?}`` where top-level options are
+    defaults for every path. Raises ValueError on bad input.
+    """
+    if 'paths' not in data:
+        return {'batch': False, 'paths': [_parse_path(data, {})]}
+
+    paths = data['paths']
+    if not isinstance(paths, list) or not paths:
+        raise ValueError("paths must be a non-empty list")
+    if len(paths) > MAX_PATHS:
+        raise ValueError(f"at most {MAX_PATHS} paths per request")
+    defaults = {key: data[key] for key in ('samples', 'k', 'closed') if key in data}
+    return {'batch': True, 'paths': [_parse_path(p, defaults) for p in paths]}
+
+
+def resample_by_arc_length(xy: np.ndarray, samples: int, closed: bool) -> np.ndarray:
+    """Evenly spaced points along the polyline, as complex x + iy.
+
+    A closed path includes the segment back to its start, and its samples
+    stop one step short of it (the DFT treats the sequence as periodic);
+    an open path is sampled end to end.
+    """
+    if closed:
+        xy = np.vstack([xy, xy[:1]])
+    s = np.concatenate([[0.0], np.cumsum(np.hypot(*np.diff(xy, axis=0).T))])
+    if s[-1] == 0:
+        return np.full(samples, complex(xy[0, 0], xy[0, 1]))
+    t = np.linspace(0.0, s[-1], samples, endpoint=not closed)
+    return np.interp(t, s, xy[:, 0]) + 1j * np.interp(t, s, xy[:, 1])
+
+
+def path_coefficients(points, samples, k, closed) -> dict:
+    """Top-k coefficients of one path, largest amplitude first."""
+    z = resample_by_arc_length(np.asarray(points, dtype=float), samples, closed)
+    coeffs = np.fft.fft(z) / samples
+    freqs = np.fft.fftfreq(samples, d=1.0 / samples).astype(int)
+
+    amp = np.abs(coeffs)
+    # stable sort so equal amplitudes keep FFT order (deterministic output)
+    top = np.argsort(-amp, kind='stable')[:k]
+    return {
+        'samples': samples,
+        'freq': freqs[top].tolist(),
+        're': coeffs.real[top].tolist(),
+        'im': coeffs.imag[top].tolist(),
+        'amp': amp[top].tolist(),
+        'phase': np.angle(coeffs[top]).tolist(),
+    }
+
+
+def epicycles(params: dict) -> dict:
+    """Job entry point for parse_fft_request() output."""
+    results = [path_coefficients(**path) for path in params['paths']]
+    if params['batch']:
+        return {'results': results}
+    return results[0]
@@ -0,0 +1,151 @@
+"""Implicit 1-D heat equation solver for the heat-equation demo.
+
+Crank–Nicolson on [0, 1] is unconditionally stable, so the time step is
+chosen for accuracy instead of the dt <= dx^2 / (2 alpha) limit that
+pins explicit stepping to tiny steps on fine grids. Each step is one
+solve against the same tridiagonal (cyclic, for periodic ends) matrix,
+so it is factored once per (grid, BC, alpha * dt / dx^2) and the sparse
+LU is kept per worker process; every later step is a back-substitution.
+"""
+
+from functools import lru_cache
+
+import numpy as np
+from scipy.sparse import diags, identity
+from scipy.sparse.linalg import splu
+
+from .pool import check_deadline
+
+BOUNDARY_CONDITIONS = ('dirichlet', 'neumann', 'periodic')
+
+MAX_GRID = 20_000
+MAX_FRAMES = 5_000
+MAX_STEPS_PER_FRAME = 1_000
+# grid * frames * steps_per_frame: bounds a single request's work
+MAX_WORK = 1_000_000_000
+# frames computed per pool job while streaming
+FRAMES_PER_JOB = 25
+
+FRAME_DTYPE = '<f4'
+
+
+def _number(data, key, default, lo, hi, cast=float):
+    value = data.get(key, default)
+    try:
+        value = cast(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"{key} must be a number")
+    if not (np.isfinite(value) and lo <= value <= hi):
+        raise ValueError(f"{key} must be between {lo} and {hi}")
+    return value
+
+
+def parse_heat_request(data: dict) -> dict:
+    """Validate a solve request and fill in defaults.
+
+    ``initial`` is an optional list of ``grid`` temperatures; without it
+    the wire starts as a Gaussian bump at x = 0.5. For Dirichlet ends the
+    first and last values are replaced by ``left`` and ``right``. Raises
+    ValueError on bad input.
+    """
+    if not isinstance(data, dict):
+        raise ValueError("request body must be a JSON object")
+    bc = data.get('bc', 'dirichlet')
+    if bc not in BOUNDARY_CONDITIONS:
+        raise ValueError(f"bc must be one of {', '.join(BOUNDARY_CONDITIONS)}")
+
+    params = {
+        'bc': bc,
+        'grid': _number(data, 'grid', 400, 3, MAX_GRID, int),
+        'alpha': _number(data, 'alpha', 1.0, 0.0, 100.0),
+        'dt': _number(data, 'dt', 1e-4, 1e-9, 1.0),
+        'frames': _number(data, 'frames', 200, 1, MAX_FRAMES, int),
+        'steps_per_frame': _number(data, 'steps_per_frame', 10, 1, MAX_STEPS_PER_FRAME, int),
+        'left': _number(data, 'left', 0.0, -1e6, 1e6),
+        'right': _number(data, 'right', 0.0, -1e6, 1e6),
+    }
+    work = params['grid'] * params['frames'] * params['steps_per_frame']
+    if work > MAX_WORK:
+        raise ValueError(f"request needs {work} grid-point updates; the limit is {MAX_WORK}")
+
+    initial = data.get('initial')
+    if initial is not None:
+        try:
+            u0 = np.asarray(initial, dtype=float)
+        except (TypeError, ValueError):
+            raise ValueError("initial must be a list of numbers")
+        if u0.shape != (params['grid'],) or not np.isfinite(u0).all():
+            raise ValueError(f"initial must be {params['grid']} finite numbers")
+        params['initial'] = u0.tolist()
+    return params
+
+
+def grid_spacing(grid: int, bc: str) -> float:
+    # periodic ends are the same point, so only one of them is a node
+    return 1.0 / grid if bc == 'periodic' else 1.0 / (grid - 1)
+
+
+def initial_state(params: dict) -> np.ndarray:
+    grid, bc = params['grid'], params['bc']
+    if 'initial' in params:
+        u = np.array(params['initial'], dtype=float)
+    else:
+        x = np.arange(grid) * grid_spacing(grid, bc)
+        u = np.exp(-((x - 0.5) ** 2) / (2 * 0.05 ** 2))
+    if bc == 'dirichlet':
+        u[0], u[-1] = params['left'], params['right']
+    return u
+
+
+def _laplacian(grid: int, bc: str):
+    """Second-difference operator (without the 1/dx^2) for each BC."""
+    main = np.full(grid, -2.0)
+    upper = np.ones(grid - 1)
+    lower = np.ones(grid - 1)
+    if bc == 'dirichlet':
+        # boundary rows are zero: the end temperatures never change
+        main[[0, -1]] = 0.0
+        upper[0] = 0.0
+        lower[-1] = 0.0
+    elif bc == 'neumann':
+        # ghost nodes mirrored across each end (u_{-1} = u_1)
+        upper[0] = 2.0
+        lower[-1] = 2.0
+    offsets = [0, 1, -1]
+    bands = [main, upper, lower]
+    if bc == 'periodic':
+        offsets += [grid - 1, -(grid - 1)]
+        bands += [[1.0], [1.0]]
+    return diags(bands, offsets, shape=(grid, grid), format='csc')
+
+
+@lru_cache(maxsize=16)
+def crank_nicolson_operators(grid: int, bc: str, r: float):
+    """Factored left-hand matrix and explicit right-hand matrix for one step.
+
+    r = alpha * dt / dx^2. Cached per worker process, so a stream of jobs
+    for the same wire pays for the factorization once.
+    """
+    lap = _laplacian(grid, bc)
+    eye = identity(grid, format='csc')
+    lhs = splu((eye - 0.5 * r * lap).tocsc())
+    rhs = (eye + 0.5 * r * lap).tocsr()
+    return lhs, rhs
+
+
+def advance(grid, bc, alpha, dt, u, steps_per_frame, count):
+    """Job entry point: step u forward and emit `count` float32 frames.
+
+    Returns (frame bytes, final float64 state) so the caller can resume
+    with full precision for the next batch.
+    """
+    r = alpha * dt / grid_spacing(grid, bc) ** 2
+    lhs, rhs = crank_nicolson_operators(grid, bc, r)
+    u = np.asarray(u, dtype=float)
+    frames = np.empty((count, grid), dtype=FRAME_DTYPE)
+    for i in range(count):
+        for _ in range(steps_per_frame):
+            u = lhs.solve(rhs @ u)
+        frames[i] = u
+        check_deadline()
+    return frames.tobytes(), u
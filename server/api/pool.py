@@ -0,0 +1,134 @@
+"""Bounded process pool for compute jobs.
+
+Heavy numerical work runs in worker processes instead of the gunicorn
+worker that received the request, so one expensive job can't starve the
+rest. Admission is bounded (running + queued jobs); a request that can't
+get a slot is rejected immediately rather than piling up, and every job
+runs against a time budget after which the request gives up on it.
+
+Jobs are plain module-level functions (they must pickle). A job that can
+run long should call check_deadline() between chunks of work so an
+abandoned job frees its worker instead of finishing for nobody.
+"""
+
+import logging
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeout
+from concurrent.futures.process import BrokenProcessPool
+
+logger = logging.getLogger(__name__)
+
+
+class PoolSaturated(Exception):
+    """Every worker is busy and the queue is full."""
+
+    def __init__(self, retry_after: int):
+        # retry_after is the only arg so the exception survives pickling
+        super().__init__(retry_after)
+        self.retry_after = retry_after
+
+    def __str__(self):
+        return "compute pool saturated"
+
+
+class DeadlineExceeded(Exception):
+    """The job did not finish within its time budget."""
+
+    def __init__(self, retry_after: int):
+        super().__init__(retry_after)
+        self.retry_after = retry_after
+
+    def __str__(self):
+        return "compute time budget exceeded"
+
+
+# Set in the worker process for the duration of each job
+_deadline: float | None = None
+
+
+def check_deadline():
+    """Abort the current job if its requester has stopped waiting for it."""
+    if _deadline is not None and time.time() > _deadline:
+        raise DeadlineExceeded(retry_after=1)
+
+
+def _run_job(fn, deadline, args, kwargs):
+    global _deadline
+    _deadline = deadline
+    try:
+        return fn(*args, **kwargs)
+    finally:
+        _deadline = None
+
+
+class ComputePool:
+    """Process pool with admission control and per-job deadlines."""
+
+    def __init__(self, workers: int = 2, queue_depth: int = 8, time_budget: float = 10.0):
+        self.workers = workers
+        self.queue_depth = queue_depth
+        self.time_budget = time_budget
+        # one slot per running or queued job; released when the job actually
+        # ends (not when its requester stops waiting), so an abandoned job
+        # still counts against capacity until its worker is free again
+        self._slots = threading.BoundedSemaphore(workers + queue_depth)
+        self._executor: ProcessPoolExecutor | None = None
+        self._lock = threading.Lock()
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        # Created lazily so each gunicorn worker forks its own pool after
+        # startup rather than inheriting one from the master.
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(max_workers=self.workers)
+            return self._executor
+
+    def _reset_executor(self, broken: ProcessPoolExecutor):
+        with self._lock:
+            if self._executor is broken:
+                self._executor = None
+        broken.shutdown(wait=False, cancel_futures=True)
+
+    def _retry_after(self) -> int:
+        # Roughly how long until the queue drains by one budget's worth
+        return max(1, int(self.time_budget))
+
+    def run(self, fn, *args, budget: float | None = None, **kwargs):
+        """Run fn(*args, **kwargs) in a worker and wait for the result.
+
+        Raises PoolSaturated when no slot is free and DeadlineExceeded when
+        the job outlives its budget; a job still queued at that point is
+        cancelled, and a running one stops at its next check_deadline().
+        """
+        budget = self.time_budget if budget is None else min(budget, self.time_budget)
+        if not self._slots.acquire(blocking=False):
+            raise PoolSaturated(retry_after=self._retry_after())
+
+        executor = self._get_executor()
+        try:
+            future = executor.submit(_run_job, fn, time.time() + budget, args, kwargs)
+        except BrokenProcessPool:
+            self._slots.release()
+            self._reset_executor(executor)
+            raise
+        except BaseException:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+
+        try:
+            return future.result(timeout=budget)
+        except FutureTimeout:
+            future.cancel()
+            raise DeadlineExceeded(retry_after=self._retry_after())
+        except BrokenProcessPool:
+            logger.exception("Compute worker died; restarting pool")
+            self._reset_executor(executor)
+            raise
+
+    def shutdown(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
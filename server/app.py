@@ -1,7 +1,12 @@
 # Dev server for mathnotes
-from flask import Flask, send_from_directory, send_file
+from flask import Flask, Response, request, send_from_directory, send_file
 from pathlib import Path
+import json
+import mimetypes
 import os
+import socket
+
+from site_archive import open_archive
 
 app = Flask(__name__, static_folder=None)
 
@@ -13,11 +18,37 @@ app.register_blueprint(api)
 STATIC_BUILD = Path(os.environ.get('STATIC_BUILD_DIR', 'static-build'))
 # Timestamp file is one level up from website dir (survives clean)
 TIMESTAMP_FILE = STATIC_BUILD.parent / 'rebuild-timestamp.txt'
+# The watcher's build service (MATHNOTES_MEMORY_PAGES mode) hands out pages
+# straight from memory; when it's unset or not answering, read the disk
+BUILD_SOCKET = os.environ.get('MATHNOTES_BUILD_SOCKET')
+# Serve from a single-file site archive (build_static_simple.py --archive)
+# instead of the STATIC_BUILD tree
+STATIC_ARCHIVE = os.environ.get('STATIC_ARCHIVE')
+
+
+def ask_build_service(payload):
+    """The build service's answer to payload, or None if it has none."""
+    if not BUILD_SOCKET:
+        return None
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(5)
+            sock.connect(BUILD_SOCKET)
+            sock.sendall(json.dumps(payload).encode('utf-8') + b'\n')
+            with sock.makefile('rb') as f:
+                line = f.readline()
+    except OSError:
+        return None
+    response = json.loads(line) if line else {}
+    return response if response.get('ok') else None
 
 
 @app.route('/rebuild-timestamp.txt')
 def rebuild_timestamp():
     """Serve the rebuild timestamp for dev auto-reload."""
+    published = ask_build_service({'cmd': 'published'})
+    if published:
+        return str(published['timestamp']), 200, {'Content-Type': 'text/plain'}
     if TIMESTAMP_FILE.exists():
         return send_file(TIMESTAMP_FILE, mimetype='text/plain')
     return '', 404
@@ -26,6 +57,16 @@ def rebuild_timestamp():
 @app.route('/', defaults={'path': ''})
 @app.route('/<path:path>')
 def serve_static(path):
+    name = path.rsplit('/', 1)[-1]
+    if '.' not in name or name.endswith(('.html', '.xml')):
+        page = ask_build_service({'cmd': 'page', 'path': path})
+        if page:
+            mimetype = mimetypes.guess_type(name)[0] if '.' in name else 'text/html'
+            return Response(page['body'], mimetype=mimetype or 'text/html')
+
+    if STATIC_ARCHIVE:
+        return serve_archived(path)
+
     file_path = STATIC_BUILD / path
     if file_path.is_file():
         return send_from_directory(STATIC_BUILD, path)
@@ -36,3 +77,34 @@ def serve_static(path):
         return send_from_directory(STATIC_BUILD, subpath)
 
     return 'Not found', 404
+
+
+# gunicorn only writes bytes, so mapped bodies go out in copies this big
+ARCHIVE_CHUNK = 64 * 1024
+
+
+def stream_view(view):
+    """A memoryview's bytes in ARCHIVE_CHUNK pieces; holding the view keeps
+    its map alive until the last piece is sent."""
+    for start in range(0, len(view), ARCHIVE_CHUNK):
+        yield bytes(view[start:start + ARCHIVE_CHUNK])
+
+
+def serve_archived(path):
+    """Serve path from the mapped archive, precompressed when the client accepts gzip."""
+    archive = open_archive(STATIC_ARCHIVE)
+    stored = archive.find(path)
+    if stored is None:
+        return 'Not found', 404
+    gzip_ok = 'gzip' in request.headers.get('Accept-Encoding', '')
+    body, is_gzip = archive.read(stored, gzip_ok=gzip_ok)
+    response = Response(
+        stream_view(body),
+        mimetype=mimetypes.guess_type(stored)[0] or 'application/octet-stream',
+        direct_passthrough=True,
+    )
+    response.content_length = len(body)
+    response.headers['Vary'] = 'Accept-Encoding'
+    if is_gzip:
+        response.headers['Content-Encoding'] = 'gzip'
+    return response
@@ -0,0 +1,77 @@
+# Read side of the single-file site archive (writer and layout:
+# mathnotes/sitegenerator/archive.py). Kept here because the server image
+# ships only server/.
+import mmap
+import os
+import posixpath
+import struct
+import threading
+
+MAGIC = b"MNSITE\0\0"
+VERSION = 1
+_HEADER = struct.Struct("<8sIIQ")
+_ENTRY = struct.Struct("<HQQQQ")
+
+
+class SiteArchive:
+    """A memory-mapped archive: path -> (offset, length, gzip offset, gzip length)."""
+
+    def __init__(self, path):
+        self.path = str(path)
+        with open(self.path, "rb") as f:
+            st = os.fstat(f.fileno())
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self.stamp = (st.st_ino, st.st_mtime_ns, st.st_size)
+
+        magic, version, count, offset = _HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{self.path} is not a version {VERSION} site archive")
+        view = memoryview(self._map)
+        self.index = {}
+        for _ in range(count):
+            path_len, *entry = _ENTRY.unpack_from(view, offset)
+            offset += _ENTRY.size
+            self.index[str(view[offset:offset + path_len], "utf-8")] = tuple(entry)
+            offset += path_len
+        view.release()
+
+    def find(self, path):
+        """The stored path serving a request path (a file, or a directory's
+        index.html), or None. Keys are normalized as the writer stores them."""
+        path = posixpath.normpath("/" + path).lstrip("/")
+        if path in self.index:
+            return path
+        index_path = f"{path}/index.html" if path else "index.html"
+        return index_path if index_path in self.index else None
+
+    def read(self, path, gzip_ok=False):
+        """(body, is_gzip) for a stored path; the gzip variant when allowed
+        and present.
+
+        body is a memoryview into the map, not a copy: it keeps the map
+        alive (and open) for as long as the response holds it.
+        """
+        offset, length, gz_offset, gz_length = self.index[path]
+        if gzip_ok and gz_length:
+            return memoryview(self._map)[gz_offset:gz_offset + gz_length], True
+        return memoryview(self._map)[offset:offset + length], False
+
+
+_lock = threading.Lock()
+_current = None
+
+
+def open_archive(path):
+    """The archive at path, remapped once a deploy has replaced the file."""
+    global _current
+    st = os.stat(path)
+    archive = _current
+    stamp = (st.st_ino, st.st_mtime_ns, st.st_size)
+    if archive is None or archive.path != str(path) or archive.stamp != stamp:
+        with _lock:
+            if _current is archive:
+                # The old map is left to the garbage collector rather than
+                # closed: other threads may still be slicing from it
+                _current = SiteArchive(path)
+            archive = _current
+    return archive
@@ -0,0 +1,92 @@
+// Service worker generated by the site build (mathnotes/service_worker.py).
+// The precache list and page revisions live in {{ manifest_url }}; this
+// file embeds its revision so every deploy that changes any of them
+// installs a fresh worker.
+const REVISION = {{ revision|tojson }};
+const MANIFEST_URL = {{ manifest_url|tojson }};
+const PRECACHE = `precache-${REVISION}`;
+const PAGES = 'pages';
+
+let manifest = null;
+
+async function loadManifest() {
+  if (!manifest) {
+    const cache = await caches.open(PRECACHE);
+    const response = (await cache.match(MANIFEST_URL)) || (await fetch(MANIFEST_URL, { cache: 'no-cache' }));
+    manifest = await response.json();
+  }
+  return manifest;
+}
+
+function pageKey(path, revision) {
+  return `${path}?rev=${revision}`;
+}
+
+self.addEventListener('install', (event) => {
+  event.waitUntil((async () => {
+    const response = await fetch(MANIFEST_URL, { cache: 'no-cache' });
+    const precache = await caches.open(PRECACHE);
+    await precache.put(MANIFEST_URL, response.clone());
+    manifest = await response.json();
+    await precache.addAll(manifest.precache.map((entry) => new Request(entry.url, { cache: 'no-cache' })));
+    const pages = await caches.open(PAGES);
+    await Promise.all(manifest.core_pages.map(async (path) => {
+      const page = await fetch(path, { cache: 'no-cache' });
+      if (page.ok) await pages.put(pageKey(path, manifest.pages[path]), page);
+    }));
+    await self.skipWaiting();
+  })());
+});
+
+self.addEventListener('activate', (event) => {
+  event.waitUntil((async () => {
+    const names = await caches.keys();
+    await Promise.all(names.filter((name) => name !== PRECACHE && name !== PAGES).map((name) => caches.delete(name)));
+    await self.clients.claim();
+  })());
+});
+
+// Pages: the cached copy is served without touching the network while its
+// revision matches this deploy's; an outdated copy is served immediately
+// and replaced in the background (stale-while-revalidate).
+async function pageResponse(event, path, revision) {
+  const cache = await caches.open(PAGES);
+  const current = await cache.match(pageKey(path, revision));
+  if (current) return current;
+
+  const update = fetch(event.request).then(async (response) => {
+    if (response.ok) {
+      const stale = await cache.keys();
+      await Promise.all(stale
+        .filter((request) => new URL(request.url).pathname === path)
+        .map((request) => cache.delete(request)));
+      await cache.put(pageKey(path, revision), response.clone());
+    }
+    return response;
+  });
+  const outdated = await cache.match(path, { ignoreSearch: true });
+  if (outdated) {
+    event.waitUntil(update.catch(() => {}));
+    return outdated;
+  }
+  return update;
+}
+
+self.addEventListener('fetch', (event) => {
+  const url = new URL(event.request.url);
+  if (event.request.method !== 'GET' || url.origin !== self.location.origin) return;
+
+  event.respondWith((async () => {
+    let pages;
+    try {
+      ({ pages } = await loadManifest());
+    } catch (e) {
+      return fetch(event.request);  // no manifest yet (e.g. offline mid-install)
+    }
+    if (url.pathname in pages && !url.search) {
+      return pageResponse(event, url.pathname, pages[url.pathname]);
+    }
+    const precached = await (await caches.open(PRECACHE)).match(event.request);
+    return precached || fetch(event.request);
+  })());
+});
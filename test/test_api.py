@@ -0,0 +1,309 @@
+"""Tests for the /api blueprint served by server/app.py.
+
+Run standalone (no pytest needed):
+    python3 test/test_api.py
+or inside the web container:
+    docker exec -i -w /app web-dev python3 - < test/test_api.py
+"""
+
+import os
+import sys
+import threading
+import time
+
+_candidates = [os.getcwd()]  # running via stdin; cwd must be the repo/app root
+try:
+    _candidates.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+except NameError:
+    pass
+for _root in _candidates:
+    if os.path.isdir(os.path.join(_root, "server", "api")):
+        sys.path.insert(0, os.path.join(_root, "server"))
+        break
+
+from api.cache import ResultCache, canonical_key  # noqa: E402
+from api.pool import ComputePool, DeadlineExceeded, PoolSaturated  # noqa: E402
+
+
+def make_client():
+    from flask import Flask
+    import api
+
+    api._cache.clear()
+    app = Flask(__name__)
+    app.register_blueprint(api.api)
+    return app.test_client()
+
+
+def test_canonical_key_ignores_key_order():
+    assert canonical_key({"a": 1, "b": [1, 2]}) == canonical_key({"b": [1, 2], "a": 1})
+    assert canonical_key({"a": 1}) != canonical_key({"a": 2})
+
+
+def test_lru_evicts_by_count_and_bytes():
+    cache = ResultCache(max_entries=2, max_bytes=10)
+    cache.put("a", b"1234")
+    cache.put("b", b"1234")
+    cache.get("a")  # b is now least recently used
+    cache.put("c", b"1234")
+    assert cache.get("b") is None and cache.get("a") and cache.get("c")
+
+    cache.put("d", b"12345678")
+    assert cache.total_bytes <= 10
+    assert cache.get("d") is not None
+
+    cache.put("huge", b"x" * 11)
+    assert cache.get("huge") is None, "an entry over the byte budget must not be stored"
+
+
+def test_concurrent_identical_requests_compute_once():
+    cache = ResultCache()
+    calls = []
+    started = threading.Event()
+
+    def slow():
+        calls.append(1)
+        started.set()
+        time.sleep(0.2)
+        return b"result"
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.get_or_compute("k", slow)))
+               for _ in range(5)]
+    threads[0].start()
+    started.wait()
+    for t in threads[1:]:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert len(calls) == 1, f"expected one computation, got {len(calls)}"
+    assert [r.body for r in results] == [b"result"] * 5
+
+
+def test_failed_computation_is_not_cached():
+    cache = ResultCache()
+
+    def boom():
+        raise RuntimeError("boom")
+
+    try:
+        cache.get_or_compute("k", boom)
+        assert False, "expected the error to propagate"
+    except RuntimeError:
+        pass
+    assert cache.get_or_compute("k", lambda: b"ok").body == b"ok"
+
+
+def test_compute_sets_strong_etag_and_honors_if_none_match():
+    client = make_client()
+    payload = {"system": "logistic", "params": {"r": 3.7}}
+
+    first = client.post("/api/compute", json=payload)
+    assert first.status_code == 200
+    etag = first.headers["ETag"]
+    assert etag.startswith('"') and not etag.startswith("W/"), etag
+
+    reordered = {"params": {"r": 3.7}, "system": "logistic"}
+    again = client.post("/api/compute", json=reordered, headers={"If-None-Match": etag})
+    assert again.status_code == 304
+    assert again.data == b""
+
+
+def test_pool_rejects_when_saturated():
+    pool = ComputePool(workers=1, queue_depth=0, time_budget=5)
+    try:
+        busy = threading.Thread(target=pool.run, args=(time.sleep, 0.5))
+        busy.start()
+        time.sleep(0.1)
+        try:
+            pool.run(time.sleep, 0)
+            assert False, "expected PoolSaturated with the only slot taken"
+        except PoolSaturated as e:
+            assert e.retry_after >= 1
+        busy.join()
+        assert pool.run(abs, -3) == 3, "slot must be released once the job ends"
+    finally:
+        pool.shutdown()
+
+
+def test_pool_enforces_time_budget():
+    pool = ComputePool(workers=1, queue_depth=1, time_budget=5)
+    try:
+        start = time.time()
+        try:
+            pool.run(time.sleep, 2, budget=0.2)
+            assert False, "expected DeadlineExceeded"
+        except DeadlineExceeded:
+            pass
+        assert time.time() - start < 1, "requester must stop waiting at its budget"
+    finally:
+        pool.shutdown()
+
+
+def test_saturated_compute_returns_429_with_retry_after():
+    import api
+
+    client = make_client()
+    orig = api._pool
+
+    class FullPool:
+        def run(self, fn, *args, **kwargs):
+            raise PoolSaturated(retry_after=7)
+
+    api._pool = FullPool()
+    try:
+        response = client.post("/api/compute", json={"x": 1})
+        assert response.status_code == 429
+        assert response.headers["Retry-After"] == "7"
+    finally:
+        api._pool = orig
+
+
+def test_bifurcation_fixed_points_land_in_one_bin_per_column():
+    from api.dynamics import attractor_density
+
+    # logistic map below r=3: every orbit settles on x* = 1 - 1/r, here
+    # 0.6429..0.6552, strictly inside the bin [41/64, 42/64) in every column
+    counts = attractor_density("logistic", r_min=2.8, r_max=2.9, x_min=0.0, x_max=1.0,
+                               width=8, height=64, seeds=4, transient=300, iterations=50)
+    assert counts.shape == (64, 8)
+    assert (counts.sum(axis=0) == 4 * 50).all()
+    assert ((counts > 0).sum(axis=0) == 1).all(), "a fixed point should fill a single bin"
+    # row 0 is the top of the image (x_max): bin 41 from the bottom is row 22
+    assert (counts.argmax(axis=0) == 22).all()
+
+
+def test_bifurcation_buffer_fits_the_byte_budget():
+    from api.dynamics import CHUNK, CHUNK_BYTES, MAX_SEEDS, MAX_WIDTH, _chunk
+
+    assert _chunk(4, 8) == CHUNK
+    largest = _chunk(MAX_SEEDS, MAX_WIDTH)
+    assert largest >= 1 and largest * MAX_SEEDS * MAX_WIDTH * 8 <= CHUNK_BYTES
+
+
+def test_bifurcation_rejects_bad_parameters():
+    client = make_client()
+    assert client.post("/api/bifurcation", json={"family": "nope"}).status_code == 400
+    assert client.post("/api/bifurcation", json={"r_min": 4, "r_max": 3}).status_code == 400
+    assert client.post("/api/bifurcation", json=[1, 2]).status_code == 400
+    assert client.post("/api/bifurcation", json="logistic").status_code == 400
+    too_big = {"width": 2000, "seeds": 256, "transient": 10000, "iterations": 10000}
+    response = client.post("/api/bifurcation", json=too_big)
+    assert response.status_code == 400 and "limit" in response.get_json()["error"]
+
+
+def test_fft_recovers_circle_as_single_epicycle():
+    import math
+    from api.fourier import path_coefficients
+
+    # a unit circle drawn unevenly: bunched points must not bias the result
+    angles = [2 * math.pi * (i / 400) ** 2 for i in range(400)]
+    points = [[math.cos(a), math.sin(a)] for a in angles]
+    result = path_coefficients(points, samples=256, k=3, closed=True)
+    assert result["freq"][0] == 1
+    assert abs(result["amp"][0] - 1) < 1e-3, result["amp"]
+    assert result["amp"][1] < 1e-3, result["amp"]
+
+
+def test_fft_batch_applies_shared_defaults():
+    client = make_client()
+    square = [[0, 0], [1, 0], [1, 1], [0, 1]]
+    response = client.post("/api/fft", json={
+        "samples": 64, "k": 5,
+        "paths": [{"points": square}, {"points": square, "k": 2}],
+    })
+    assert response.status_code == 200
+    results = response.get_json()["results"]
+    assert [len(r["freq"]) for r in results] == [5, 2]
+    assert all(r["samples"] == 64 for r in results)
+
+    assert client.post("/api/fft", json={"points": [[0, 0]]}).status_code == 400
+
+
+def test_fft_rejects_malformed_points_and_flags():
+    client = make_client()
+    square = [[0, 0], [1, 0], [1, 1], [0, 1]]
+    for points in (
+        [{"x": 0, "y": 0}, [1, 0], [1, 1]],  # mixed shapes
+        [[0, 0], [1, "1"]],  # a string coordinate
+        [[0, 0], [True, 1]],
+        [[0, 0], [1, 1e400]],
+    ):
+        response = client.post("/api/fft", json={"points": points})
+        assert response.status_code == 400, points
+    response = client.post("/api/fft", json={"points": square, "closed": "false"})
+    assert response.status_code == 400 and "closed" in response.get_json()["error"]
+    assert client.post("/api/fft", json={"points": square, "closed": False}).status_code == 200
+
+
+def test_heat_sine_mode_decays_at_analytic_rate():
+    import numpy as np
+    from api.heat import advance
+
+    grid, alpha, dt, steps = 201, 1.0, 1e-3, 50
+    x = np.linspace(0, 1, grid)
+    frames, u = advance(grid=grid, bc="dirichlet", alpha=alpha, dt=dt,
+                        u=np.sin(np.pi * x), steps_per_frame=steps, count=2)
+    expected = np.exp(-np.pi ** 2 * alpha * dt * steps * 2) * np.sin(np.pi * x)
+    assert np.abs(u - expected).max() < 1e-3
+    assert len(frames) == 2 * grid * 4
+
+
+def test_heat_streams_float32_frames():
+    client = make_client()
+    response = client.post("/api/heat", json={"grid": 50, "frames": 60, "bc": "neumann"})
+    assert response.status_code == 200
+    assert response.headers["X-Heat-Frames"] == "60"
+    assert len(response.data) == 60 * 50 * 4
+
+    import numpy as np
+    frames = np.frombuffer(response.data, dtype="<f4").reshape(60, 50)
+    # insulated ends: heat spreads out but is not lost
+    totals = np.trapezoid(frames, dx=1 / 49, axis=1)
+    assert np.allclose(totals, totals[0], rtol=1e-4)
+    assert frames[-1].max() < frames[0].max()
+
+
+def test_heat_rejects_non_object_bodies():
+    client = make_client()
+    for body in ([0.0, 1.0, 0.0], "dirichlet", 3):
+        response = client.post("/api/heat", json=body)
+        assert response.status_code == 400 and "JSON object" in response.get_json()["error"]
+
+
+if __name__ == "__main__":
+    test_canonical_key_ignores_key_order()
+    print("PASS: canonical key ignores key order")
+    test_lru_evicts_by_count_and_bytes()
+    print("PASS: LRU evicts by count and bytes")
+    test_concurrent_identical_requests_compute_once()
+    print("PASS: concurrent identical requests compute once")
+    test_failed_computation_is_not_cached()
+    print("PASS: failed computation is not cached")
+    test_compute_sets_strong_etag_and_honors_if_none_match()
+    print("PASS: compute sets strong ETag and honors If-None-Match")
+    test_pool_rejects_when_saturated()
+    print("PASS: pool rejects when saturated")
+    test_pool_enforces_time_budget()
+    print("PASS: pool enforces time budget")
+    test_saturated_compute_returns_429_with_retry_after()
+    print("PASS: saturated compute returns 429 with Retry-After")
+    test_bifurcation_fixed_points_land_in_one_bin_per_column()
+    print("PASS: bifurcation fixed points land in one bin per column")
+    test_bifurcation_buffer_fits_the_byte_budget()
+    print("PASS: bifurcation buffer fits the byte budget")
+    test_bifurcation_rejects_bad_parameters()
+    print("PASS: bifurcation rejects bad parameters")
+    test_fft_recovers_circle_as_single_epicycle()
+    print("PASS: fft recovers circle as single epicycle")
+    test_fft_batch_applies_shared_defaults()
+    print("PASS: fft batch applies shared defaults")
+    test_fft_rejects_malformed_points_and_flags()
+    print("PASS: fft rejects malformed points and flags")
+    test_heat_sine_mode_decays_at_analytic_rate()
+    print("PASS: heat sine mode decays at analytic rate")
+    test_heat_streams_float32_frames()
+    print("PASS: heat streams float32 frames")
+    test_heat_rejects_non_object_bodies()
+    print("PASS: heat rejects non-object bodies")
@@ -0,0 +1,132 @@
+"""Tests for the incrementally maintained site bibliography.
+
+Run standalone (no pytest needed):
+    python3 test/test_bibliography.py
+or inside the dev builder container:
+    docker exec -i -w /app mathnotes-static-builder python3 - < test/test_bibliography.py
+"""
+
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+from types import SimpleNamespace
+
+try:
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+except NameError:
+    pass  # running via stdin; cwd must be the repo/app root
+
+from mathnotes.sources import Bibliography, build_bibliography
+
+
+def write(path, text):
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(text, encoding="utf-8")
+    # force a distinct mtime even on coarse-grained filesystems
+    stamp = time.time() + write.bump
+    write.bump += 1
+    os.utime(path, (stamp, stamp))
+
+
+write.bump = 1
+
+
+def fake_mapper(pages):
+    """pages: canonical url -> content path (relative to the temp cwd)."""
+    return SimpleNamespace(url_mappings=dict(pages), get_file_path=lambda url: pages[url])
+
+
+def in_tmp_site(test):
+    def run():
+        old = os.getcwd()
+        with tempfile.TemporaryDirectory() as tmp:
+            os.chdir(tmp)
+            try:
+                test()
+            finally:
+                os.chdir(old)
+    run.__name__ = test.__name__
+    return run
+
+
+def site():
+    write("content/algebra/sources.yaml", "sources:\n  - title: Algebra\n    author: Artin\n")
+    write("content/algebra/groups.md",
+          "---\ntitle: Groups\nsources:\n  - title: Topics\n    author: Herstein\n---\nBody\n")
+    write("content/algebra/rings.md", "---\ntitle: Rings\n---\nBody\n")
+    write("content/analysis/limits.md",
+          "---\ntitle: Limits\nsources:\n  - title: algebra\n    author: ARTIN\n"
+          "    section: Chapter 1\n---\nBody\n")
+    return fake_mapper({
+        "algebra/groups": "content/algebra/groups.md",
+        "algebra/rings": "content/algebra/rings.md",
+        "analysis/limits": "content/analysis/limits.md",
+    })
+
+
+def cited(entries):
+    return {e["title"]: [c["url"] for c in e["cited_by"]] for e in entries}
+
+
+@in_tmp_site
+def test_incremental_matches_full_rebuild():
+    mapper = site()
+    bibliography = Bibliography()
+    entries = bibliography.update(mapper)
+    assert entries == build_bibliography(mapper)
+    assert cited(entries) == {
+        "Algebra": ["/mathnotes/algebra/groups/", "/mathnotes/algebra/rings/",
+                    "/mathnotes/analysis/limits/"],
+        "Topics": ["/mathnotes/algebra/groups/"],
+    }
+
+    # one page drops its own source; the shared directory source stays
+    write("content/algebra/groups.md", "---\ntitle: Groups\n---\nBody\n")
+    entries = bibliography.update(mapper)
+    assert entries == build_bibliography(mapper)
+    assert "Topics" not in cited(entries)
+
+    # a sources.yaml edit reaches every page below it
+    write(
+        "content/algebra/sources.yaml",
+        "sources:\n  - title: Abstract Algebra\n    author: Dummit\n",
+    )
+    entries = bibliography.update(mapper)
+    assert entries == build_bibliography(mapper)
+    assert cited(entries)["Abstract Algebra"] == ["/mathnotes/algebra/groups/",
+                                                  "/mathnotes/algebra/rings/"]
+
+
+@in_tmp_site
+def test_unchanged_pages_are_not_reread():
+    mapper = site()
+    bibliography = Bibliography()
+    bibliography.update(mapper)
+    digest = bibliography.digest
+
+    reads = []
+    original = bibliography._read_page
+    bibliography._read_page = lambda url, *args: reads.append(url) or original(url, *args)
+    bibliography.update(mapper)
+    assert reads == [] and bibliography.digest == digest
+
+    write("content/analysis/limits.md", "---\ntitle: Limits and Continuity\n---\nBody\n")
+    bibliography.update(mapper)
+    assert reads == ["analysis/limits"]
+    assert bibliography.digest != digest
+
+    # removed pages drop out of cited_by
+    del mapper.url_mappings["algebra/rings"]
+    entries = bibliography.update(mapper)
+    assert cited(entries) == {"Algebra": ["/mathnotes/algebra/groups/"],
+                              "Topics": ["/mathnotes/algebra/groups/"]}
+
+
+if __name__ == "__main__":
+    test_incremental_matches_full_rebuild()
+    print("PASS: incremental matches full rebuild")
+    test_unchanged_pages_are_not_reread()
+    print("PASS: unchanged pages are not reread")
@@ -0,0 +1,80 @@
+"""Tests for the letter-sharded definition/theorem index pages.
+
+Run standalone (no pytest needed):
+    python3 test/test_block_index_pages.py
+or inside the dev builder container:
+    docker exec -i -w /app mathnotes-static-builder python3 - < test/test_block_index_pages.py
+"""
+
+import os
+import sys
+from types import SimpleNamespace
+
+try:
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+except NameError:
+    pass  # running via stdin; cwd must be the repo/app root
+
+from mathnotes.sitegenerator.pages import DefinitionIndexPage
+from mathnotes.reference_graph import ReferenceGraph
+
+
+def fake_ref(title, html="<p>body</p>"):
+    label = title.lower().replace(" ", "-").replace("$", "")
+    block = SimpleNamespace(label=label, title=title, rendered_html=html)
+    return SimpleNamespace(block=block, full_url=f"/mathnotes/x/#{label}", page_title="X")
+
+
+def make_page(refs):
+    index = {r.block.label: r for r in refs}
+    block_index = SimpleNamespace(
+        index=index,
+        find_blocks_by_type=lambda t: list(refs),
+        reverse_index=SimpleNamespace(
+            get_references_for_label=lambda label: SimpleNamespace(direct_references=[])
+        ),
+    )
+    return DefinitionIndexPage({
+        "block_index": block_index,
+        "reference_graph": ReferenceGraph(block_index),
+    })
+
+
+def test_blocks_are_sharded_by_initial_letter():
+    page = make_page([fake_ref("Group"), fake_ref("Abelian Group"), fake_ref("Field"),
+                      fake_ref("$\\sigma$ algebra"), fake_ref("Algebra")])
+    specs = page.get_specs()
+
+    landing = specs[0]
+    assert landing.output_path == "mathnotes/definitions/index.html"
+    assert landing.context["blocks"] == []
+    assert landing.context["tooltip_data"] == "[]", "no site-wide tooltip JSON on the landing page"
+    assert [(letter["name"], letter["count"]) for letter in landing.context["letters"]] == [
+        ("#", 1), ("A", 2), ("F", 1), ("G", 1)]
+
+    paths = [s.output_path for s in specs[1:]]
+    assert paths == ["mathnotes/definitions/other/index.html", "mathnotes/definitions/a/index.html",
+                     "mathnotes/definitions/f/index.html", "mathnotes/definitions/g/index.html"]
+    assert all(s.content_hash for s in specs[1:])
+
+
+def test_oversized_letters_split_and_hashes_track_content():
+    refs = [fake_ref(f"Alpha {i:03d}") for i in range(5)] + [fake_ref("Beta")]
+    page = make_page(refs)
+    page.max_shard_blocks = 2
+    specs = page.get_specs()
+    assert [s.output_path.split("/")[2] for s in specs[1:]] == ["a", "a-2", "a-3", "b"]
+
+    before = {s.output_path: s.content_hash for s in specs}
+    refs[-1].block.rendered_html = "<p>changed</p>"
+    page._specs_cache = None
+    after = {s.output_path: s.content_hash for s in page.get_specs()}
+    changed = [path for path in after if after[path] != before[path]]
+    assert changed == ["mathnotes/definitions/b/index.html"], changed
+
+
+if __name__ == "__main__":
+    test_blocks_are_sharded_by_initial_letter()
+    print("PASS: blocks are sharded by initial letter")
+    test_oversized_letters_split_and_hashes_track_content()
+    print("PASS: oversized letters split and hashes track content")
@@ -0,0 +1,154 @@
+"""Tests for the warm build service and its socket protocol.
+
+Run standalone (no pytest needed):
+    python3 test/test_build_daemon.py
+or inside the dev builder container:
+    docker exec -i -w /app mathnotes-static-builder python3 - < test/test_build_daemon.py
+"""
+
+import os
+import sys
+import tempfile
+from pathlib import Path
+from types import SimpleNamespace
+
+try:
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+except NameError:
+    pass  # running via stdin; cwd must be the repo/app root
+
+from mathnotes.sitegenerator.daemon import BuildService, DaemonUnavailable, request, serve
+from mathnotes.sitegenerator.page_store import PageStore
+
+
+class FakeBuilder:
+    def __init__(self, output_dir):
+        self.output_dir = Path(output_dir)
+        self.url_mapper = SimpleNamespace(
+            url_mappings={"algebra/groups/": "content/algebra/groups.tex"}
+        )
+        self._render_cache = {}
+        self.refreshed = []
+        self.built_into = []
+
+    def refresh(self, changed=None):
+        self.refreshed.append(changed)
+
+    def _set_output_dir(self, path):
+        self.output_dir = path
+
+    def build(self, cancel=None):
+        self.built_into.append(str(self.output_dir))
+
+    def build_pages(self, urls):
+        return [f"{url.strip('/')}/index.html" for url in urls]
+
+    def render_url(self, url):
+        return "<h1>Groups</h1>" if url == "/mathnotes/algebra/groups/" else None
+
+
+def in_temp_dir(fn):
+    def run():
+        old_cwd = os.getcwd()
+        with tempfile.TemporaryDirectory() as td:
+            os.chdir(td)
+            try:
+                fn(td)
+            finally:
+                os.chdir(old_cwd)
+    run.__name__ = fn.__name__
+    return run
+
+
+@in_temp_dir
+def test_requests_reuse_one_builder_and_refresh_only_changes(td):
+    os.makedirs("content/algebra")
+    Path("content/algebra/groups.tex").write_text("v1")
+    builder = FakeBuilder("site")
+    service = BuildService(builder)
+
+    assert service.handle({"cmd": "build"})["ok"]
+    assert builder.refreshed == [], "nothing changed since the service started"
+
+    Path("content/algebra/rings.tex").write_text("new")
+    response = service.handle({"cmd": "build", "output": "elsewhere"})
+    assert response["ok"] and response["output"] == "elsewhere"
+    assert builder.refreshed == [["content/algebra/rings.tex"]]
+    assert builder.built_into == ["site", "elsewhere"]
+    assert builder.output_dir == Path("site"), "--output applies to one build only"
+
+    rendered = service.handle({"cmd": "render", "url": "/mathnotes/algebra/groups/"})
+    assert rendered["html"] == "<h1>Groups</h1>"
+    assert not service.handle({"cmd": "render", "url": "/nope/"})["ok"]
+    assert service.handle({"cmd": "build", "pages": ["/a/"]})["written"] == ["a/index.html"]
+    stats = service.handle({"cmd": "stats"})
+    assert stats["builds"] == 2 and stats["pages"] == 1
+    assert not service.handle({"cmd": "bogus"})["ok"]
+
+
+@in_temp_dir
+def test_python_changes_make_the_service_stale(td):
+    os.makedirs("mathnotes")
+    service = BuildService(FakeBuilder("site"))
+    Path("mathnotes/builder.py").write_text("x = 1")
+    response = service.handle({"cmd": "build"})
+    assert not response["ok"] and response["stale"]
+
+
+@in_temp_dir
+def test_a_watched_service_leaves_refreshing_to_the_watcher(td):
+    os.makedirs("mathnotes")
+    builder = FakeBuilder("site")
+    service = BuildService(builder, watched=True)
+    Path("mathnotes/builder.py").write_text("x = 1")
+    Path("mathnotes/notes.tex").write_text("edited")
+    assert service.handle({"cmd": "build"})["ok"], "the watcher restarts on code changes"
+    assert builder.refreshed == [], "the watcher already applied these changes"
+
+
+@in_temp_dir
+def test_pages_come_from_the_store_without_the_build_lock(td):
+    store = PageStore()
+    service = BuildService(FakeBuilder("site"), page_store=store)
+    assert not service.handle({"cmd": "published"})["ok"], "nothing published yet"
+
+    store.publish({"mathnotes/algebra/groups/index.html": "<h1>Groups</h1>"})
+    with service.lock:  # a build in progress
+        page = service.handle({"cmd": "page", "path": "mathnotes/algebra/groups/"})
+        assert page["body"] == "<h1>Groups</h1>"
+        assert service.handle({"cmd": "published"})["timestamp"] == store.published
+    assert not service.handle({"cmd": "page", "path": "mathnotes/nope/"})["ok"]
+    assert not BuildService(FakeBuilder("site")).handle({"cmd": "page", "path": ""})["ok"]
+
+
+@in_temp_dir
+def test_socket_round_trip_and_missing_daemon(td):
+    socket_path = os.path.join(td, "build.sock")
+    try:
+        request({"cmd": "stats"}, socket_path=socket_path)
+        assert False, "expected DaemonUnavailable"
+    except DaemonUnavailable:
+        pass
+
+    server = serve(BuildService(FakeBuilder("site")), socket_path=socket_path, background=True)
+    try:
+        response = request(
+            {"cmd": "render", "url": "/mathnotes/algebra/groups/"}, socket_path=socket_path
+        )
+        assert response == {"ok": True, "html": "<h1>Groups</h1>"}
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+if __name__ == "__main__":
+    test_requests_reuse_one_builder_and_refresh_only_changes()
+    print("PASS: requests reuse one builder and refresh only changes")
+    test_python_changes_make_the_service_stale()
+    print("PASS: python changes make the service stale")
+    test_a_watched_service_leaves_refreshing_to_the_watcher()
+    print("PASS: a watched service leaves refreshing to the watcher")
+    test_pages_come_from_the_store_without_the_build_lock()
+    print("PASS: pages come from the store without the build lock")
+    test_socket_round_trip_and_missing_daemon()
+    print("PASS: socket round trip and missing daemon")
@@ -0,0 +1,107 @@
+"""Tests for the persisted content catalog snapshot.
+
+Run standalone (no pytest needed):
+    python3 test/test_catalog_snapshot.py
+or inside the dev builder container:
+    docker exec -i -w /app mathnotes-static-builder python3 - < test/test_catalog_snapshot.py
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+try:
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+except NameError:
+    pass  # running via stdin; cwd must be the repo/app root
+
+import mathnotes.content_discovery as content_discovery
+from mathnotes.catalog_snapshot import changed_since_snapshot, restore_catalog, save_catalog
+from mathnotes.config import CONTENT_DIRS
+from mathnotes.content_discovery import ContentDiscovery
+
+
+def write(path, text, age=0):
+    with open(path, "w") as f:
+        f.write(text)
+    stamp = time.time() - age
+    os.utime(path, (stamp, stamp))
+
+
+def in_temp_site(fn):
+    def run():
+        old_cwd = os.getcwd()
+        with tempfile.TemporaryDirectory() as td:
+            for d in CONTENT_DIRS:
+                os.makedirs(os.path.join(td, d), exist_ok=True)
+            os.chdir(td)
+            try:
+                fn()
+            finally:
+                os.chdir(old_cwd)
+    run.__name__ = fn.__name__
+    return run
+
+
+def counting_loads():
+    """Spy on how many content files discovery parses."""
+    loaded = []
+    original = content_discovery.load_content_file
+
+    def load(path):
+        loaded.append(str(path))
+        return original(path)
+
+    content_discovery.load_content_file = load
+    return loaded, lambda: setattr(content_discovery, "load_content_file", original)
+
+
+@in_temp_site
+def test_restore_rereads_only_changed_files():
+    write("content/test/keep.tex", "\\title{Keep}\n", age=60)
+    write("content/test/touched.tex", "\\title{Touched}\n", age=60)
+    write("content/test/edit.tex", "\\title{Edit}\n", age=60)
+    write("content/test/gone.tex", "\\title{Gone}\n", age=60)
+    first = ContentDiscovery()
+    first.build_url_mappings()
+    save_catalog(first, ".cache/catalog.bin")
+
+    write("content/test/touched.tex", "\\title{Touched}\n")  # same bytes, new mtime
+    write("content/test/edit.tex", "\\title{Edited}\n\\slug{edited}\n")
+    os.remove("content/test/gone.tex")
+    write("content/test/new.tex", "\\title{New}\n")
+    assert sorted(changed_since_snapshot(".cache/catalog.bin")) == [
+        "content/test/edit.tex", "content/test/gone.tex", "content/test/new.tex",
+    ]
+
+    loaded, restore = counting_loads()
+    try:
+        second = ContentDiscovery()
+        assert restore_catalog(second, ".cache/catalog.bin")
+    finally:
+        restore()
+    assert sorted(loaded) == ["content/test/edit.tex", "content/test/new.tex"], loaded
+
+    full = ContentDiscovery()
+    full.build_url_mappings()
+    assert list(second.url_mappings.items()) == list(full.url_mappings.items())
+    assert second.titles == full.titles
+
+
+@in_temp_site
+def test_missing_or_foreign_snapshot_falls_back():
+    discovery = ContentDiscovery()
+    assert not restore_catalog(discovery, ".cache/catalog.bin")
+    assert changed_since_snapshot(".cache/catalog.bin") is None
+    os.makedirs(".cache")
+    with open(".cache/catalog.bin", "wb") as f:
+        f.write(b"not a catalog")
+    assert not restore_catalog(discovery, ".cache/catalog.bin")
+
+
+if __name__ == "__main__":
+    test_restore_rereads_only_changed_files()
+    print("PASS: restore re-reads only changed files")
+    test_missing_or_foreign_snapshot_falls_back()
+    print("PASS: missing or foreign snapshot falls back")
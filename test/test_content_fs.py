@@ -0,0 +1,167 @@
+"""Tests for the pluggable content filesystem.
+
+Run standalone (no pytest needed):
+    python3 test/test_content_fs.py
+or inside the dev builder container:
+    docker exec -i -w /app mathnotes-static-builder python3 - < test/test_content_fs.py
+"""
+
+import os
+import subprocess
+import sys
+import tempfile
+
+try:
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+except NameError:
+    pass  # running via stdin; cwd must be the repo/app root
+
+from mathnotes.content_fs import GitTreeFS, MemoryFS, WorkingTreeFS, using_content_fs
+from mathnotes.sources import collect_directory_sources
+
+TREE = {
+    "content/algebra/groups.tex": "\\title{Groups}\n",
+    "content/algebra/rings/ideals.tex": "\\title{Ideals}\n",
+    "content/algebra-notes.tex": "\\title{Notes}\n",
+    "content/algebra/sources.yaml": "sources:\n  - title: Algebra\n    author: Artin\n",
+    "content/algebra/rings/sources.yaml": "sources:\n  - title: Rings\n    author: Lam\n",
+}
+
+# Path order: a directory's contents before a sibling whose name extends it
+TEX_ORDER = [
+    "content/algebra/groups.tex",
+    "content/algebra/rings/ideals.tex",
+    "content/algebra-notes.tex",
+]
+
+
+def write_tree(root, files):
+    for path, text in files.items():
+        full = os.path.join(root, path)
+        os.makedirs(os.path.dirname(full), exist_ok=True)
+        with open(full, "w") as f:
+            f.write(text)
+
+
+def git(repo, *args):
+    return subprocess.run(
+        ["git", "-C", repo, "-c", "user.name=t", "-c", "user.email=t@example.com", *args],
+        check=True, capture_output=True, text=True,
+    ).stdout.strip()
+
+
+def test_memory_fs():
+    fs = MemoryFS(TREE)
+    assert fs.files("content", ".tex") == TEX_ORDER
+    assert fs.files("content/algebra/rings", ".tex") == ["content/algebra/rings/ideals.tex"]
+    assert fs.read_text("content/algebra/groups.tex") == "\\title{Groups}\n"
+    assert fs.size("content/algebra/groups.tex") == len("\\title{Groups}\n")
+    stamp = fs.stamp("content/algebra/groups.tex")
+    fs.write("content/algebra/groups.tex", "\\title{Groups!}\n")
+    assert fs.stamp("content/algebra/groups.tex") != stamp
+    fs.remove("content/algebra/groups.tex")
+    assert not fs.is_file("content/algebra/groups.tex")
+    assert fs.stamp("content/algebra/groups.tex") is None
+    try:
+        fs.read_text("content/algebra/groups.tex")
+        assert False, "expected FileNotFoundError"
+    except FileNotFoundError:
+        pass
+
+
+def test_working_tree_lists_like_memory():
+    old_cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as td:
+        write_tree(td, TREE)
+        os.chdir(td)
+        try:
+            fs = WorkingTreeFS()
+            assert fs.on_disk
+            assert fs.files("content", ".tex") == TEX_ORDER
+            assert fs.read_text("content/algebra/rings/ideals.tex") == "\\title{Ideals}\n"
+            assert fs.stamp("content/missing.tex") is None
+            assert fs.size("content/algebra/groups.tex") == len("\\title{Groups}\n")
+            assert fs.size("content/missing.tex") is None
+        finally:
+            os.chdir(old_cwd)
+
+
+def test_git_tree_reads_a_commit_without_checkout():
+    with tempfile.TemporaryDirectory() as repo:
+        git(repo, "init", "-q")
+        write_tree(repo, TREE)
+        git(repo, "add", "-A")
+        git(repo, "commit", "-q", "-m", "first")
+        first = git(repo, "rev-parse", "HEAD")
+        write_tree(repo, {
+            "content/algebra/groups.tex": "\\title{Groups, revised}\n",
+            "content/new.tex": "x",
+        })
+        git(repo, "add", "-A")
+        git(repo, "commit", "-q", "-m", "second")
+        # uncommitted edits are invisible to either revision
+        write_tree(repo, {"content/algebra/groups.tex": "\\title{Scratch}\n"})
+
+        old = GitTreeFS(first, repo)
+        new = GitTreeFS("HEAD", repo)
+        try:
+            assert not old.on_disk and old.commit == first
+            assert old.files("content", ".tex") == TEX_ORDER
+            assert old.read_text("content/algebra/groups.tex") == "\\title{Groups}\n"
+            assert new.read_text("content/algebra/groups.tex") == "\\title{Groups, revised}\n"
+            assert new.is_file("content/new.tex") and not old.is_file("content/new.tex")
+            ideals, groups = "content/algebra/rings/ideals.tex", "content/algebra/groups.tex"
+            assert old.stamp(ideals) == new.stamp(ideals)
+            assert old.stamp(groups) != new.stamp(groups)
+            assert old.size("content/algebra/groups.tex") == len("\\title{Groups}\n")
+            assert old.size("content/new.tex") is None
+            try:
+                old.read_text("content/new.tex")
+                assert False, "expected FileNotFoundError"
+            except FileNotFoundError:
+                pass
+        finally:
+            old.close()
+            new.close()
+
+
+def test_sources_read_through_the_content_fs():
+    with using_content_fs(MemoryFS(TREE)):
+        sources = collect_directory_sources("content/algebra/rings/ideals.tex")
+    assert [s["title"] for s in sources] == ["Algebra", "Rings"]
+
+
+def test_discovery_runs_in_memory():
+    from mathnotes.content_discovery import ContentDiscovery
+
+    fs = MemoryFS({
+        "content/algebra/groups.tex": "\\title{Groups}\n\nA group is a set.\n",
+        "content/algebra/rings.tex": "\\title{Rings}\n\\slug{ring-theory}\n\nA ring is a set.\n",
+    })
+    with using_content_fs(fs):
+        discovery = ContentDiscovery()
+        discovery.build_url_mappings()
+        assert discovery.url_mappings == {
+            "algebra/groups/": "content/algebra/groups.tex",
+            "algebra/ring-theory/": "content/algebra/rings.tex",
+        }
+        assert discovery.titles["content/algebra/groups.tex"] == "Groups"
+
+        fs.write("content/algebra/groups.tex", "\\title{Group Theory}\n\nA group is a set.\n")
+        fs.remove("content/algebra/rings.tex")
+        assert discovery.apply_changes(["content/algebra/groups.tex", "content/algebra/rings.tex"])
+        assert discovery.url_mappings == {"algebra/groups/": "content/algebra/groups.tex"}
+        assert discovery.titles["content/algebra/groups.tex"] == "Group Theory"
+
+
+if __name__ == "__main__":
+    test_memory_fs()
+    print("PASS: memory fs")
+    test_working_tree_lists_like_memory()
+    print("PASS: working tree lists like memory")
+    test_git_tree_reads_a_commit_without_checkout()
+    print("PASS: git tree reads a commit without checkout")
+    test_sources_read_through_the_content_fs()
+    print("PASS: sources read through the content fs")
+    test_discovery_runs_in_memory()
+    print("PASS: discovery runs in memory")
@@ -0,0 +1,91 @@
+"""Tests for per-page demo bundles.
+
+Run standalone (no pytest needed):
+    python3 test/test_demo_bundles.py
+or inside the dev builder container:
+    docker exec -i -w /app mathnotes-static-builder python3 - < test/test_demo_bundles.py
+"""
+
+import json
+import os
+import sys
+import tempfile
+
+try:
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+except NameError:
+    pass  # running via stdin; cwd must be the repo/app root
+
+from mathnotes.demo_bundles import (
+    demo_preloads, js_report, load_demo_manifest, page_demos, summarize,
+)
+
+MANIFEST = {
+    "main": {"file": "main-A.js", "imports": ["chunk-core.js"]},
+    "demos": {
+        "pendulum": {"file": "pendulum-B.js", "imports": ["chunk-p5.js"]},
+        "cobweb": {"file": "cobweb-C.js", "imports": ["chunk-p5.js", "chunk-plot.js"]},
+    },
+    "bytes": {
+        "main-A.js": 30000, "chunk-core.js": 10000, "pendulum-B.js": 8000,
+        "cobweb-C.js": 6000, "chunk-p5.js": 900000, "chunk-plot.js": 20000,
+    },
+}
+
+
+def demo(name, n=1):
+    return f'<div class="demo-component" data-demo="{name}" id="demo-{name}-{n}"></div>'
+
+
+def test_page_demos_in_order_of_first_use():
+    html = f"<p>Text</p>{demo('cobweb')}<p>More</p>{demo('pendulum')}{demo('cobweb', 2)}"
+    assert page_demos(html) == ["cobweb", "pendulum"]
+    assert page_demos("<p>No demos here</p>") == []
+
+
+def test_preloads_cover_each_chunk_once():
+    assert demo_preloads(["pendulum", "cobweb"], MANIFEST) == [
+        "/static/dist/pendulum-B.js",
+        "/static/dist/chunk-p5.js",
+        "/static/dist/cobweb-C.js",
+        "/static/dist/chunk-plot.js",
+    ]
+    assert demo_preloads(["no-such-demo"], MANIFEST) == []
+    assert demo_preloads(["pendulum"], None) == [], "no JS build yet: no preloads"
+
+
+def test_js_bytes_per_page():
+    demos_by_page = {
+        "/": [],
+        "/mathnotes/a/": ["pendulum"],
+        "/mathnotes/b/": ["pendulum", "cobweb"],
+    }
+    report = js_report(demos_by_page, MANIFEST)
+    assert report["/"] == {"demos": [], "js_bytes": 40000}
+    assert report["/mathnotes/a/"]["js_bytes"] == 40000 + 8000 + 900000
+    assert report["/mathnotes/b/"]["js_bytes"] == 40000 + 8000 + 6000 + 900000 + 20000, (
+        "shared chunks count once"
+    )
+    line = summarize(report)
+    assert "max (/mathnotes/b/)" in line and "2 of 3 pages load demo code" in line
+    assert summarize(js_report({}, MANIFEST)) == "Module JS per page: no pages built"
+
+
+def test_missing_manifest_loads_as_none():
+    with tempfile.TemporaryDirectory() as td:
+        path = os.path.join(td, "demo-manifest.json")
+        assert load_demo_manifest(path) is None
+        with open(path, "w") as f:
+            json.dump(MANIFEST, f)
+        assert load_demo_manifest(path) == MANIFEST
+
+
+if __name__ == "__main__":
+    test_page_demos_in_order_of_first_use()
+    print("PASS: page demos in order of first use")
+    test_preloads_cover_each_chunk_once()
+    print("PASS: preloads cover each chunk once")
+    test_js_bytes_per_page()
+    print("PASS: JS bytes per page")
+    test_missing_manifest_loads_as_none()
+    print("PASS: missing manifest loads as none")
@@ -0,0 +1,104 @@
+"""Tests for the deploy manifest diff behind targeted cache purges.
+
+Run standalone (no pytest needed):
+    python3 test/test_deploy_manifest.py
+or inside the dev builder container:
+    docker exec -i -w /app mathnotes-static-builder python3 - < test/test_deploy_manifest.py
+"""
+
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+try:
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+except NameError:
+    pass  # running via stdin; cwd must be the repo/app root
+
+from mathnotes.deploy_manifest import (
+    build_manifest, changed_paths, file_entries, load_manifest, page_entry, public_urls,
+    write_manifest,
+)
+
+BASE = "https://lacunary.org"
+
+
+def manifest(files=None, **pages):
+    return build_manifest(
+        {
+            f"/mathnotes/{name}/": page_entry(f"mathnotes/{name}/index.html", html)
+            for name, html in pages.items()
+        },
+        BASE,
+        files,
+    )
+
+
+def test_only_changed_added_and_removed_pages_are_listed():
+    previous = manifest(groups="<h1>Groups</h1>", rings="<h1>Rings</h1>", sets="<h1>Sets</h1>")
+    current = manifest(groups="<h1>Groups</h1>", rings="<h1>Rings!</h1>", fields="<h1>Fields</h1>")
+    paths = changed_paths(previous, current)
+    assert paths == ["/mathnotes/fields/", "/mathnotes/rings/", "/mathnotes/sets/"]
+    assert public_urls(paths, BASE)[0] == "https://lacunary.org/mathnotes/fields/"
+
+
+def test_without_a_previous_manifest_everything_changed():
+    current = manifest(groups="a", rings="b")
+    assert changed_paths(None, current) == ["/mathnotes/groups/", "/mathnotes/rings/"]
+
+
+def test_published_files_are_diffed_with_the_pages():
+    with tempfile.TemporaryDirectory() as td:
+        root = Path(td)
+        (root / "static" / "dist").mkdir(parents=True)
+        (root / "static" / "dist" / "latexblocks.css").write_text("body{}")
+        (root / "robots.txt").write_text("User-agent: *\n")
+        (root / "index.html").write_text("<h1>Home</h1>")
+        files = file_entries(root, skip={"index.html"})
+        assert sorted(files) == ["/robots.txt", "/static/dist/latexblocks.css"], "pages are skipped"
+
+        previous = manifest(files=files, groups="a")
+        (root / "static" / "dist" / "latexblocks.css").write_text("body{margin:0}")
+        current = manifest(files=file_entries(root, skip={"index.html"}), groups="a")
+        assert changed_paths(previous, current) == ["/static/dist/latexblocks.css"]
+        assert changed_paths(current, manifest(groups="a")) == [
+            "/robots.txt", "/static/dist/latexblocks.css",
+        ], "removed files are purged too"
+
+
+def test_content_pages_are_not_listed_as_files():
+    with tempfile.TemporaryDirectory() as td:
+        root = Path(td)
+        (root / "mathnotes" / "algebra" / "groups").mkdir(parents=True)
+        (root / "mathnotes" / "algebra" / "groups" / "index.html").write_text("<h1>Groups</h1>")
+        # spelled as ContentPages builds it: canonical URLs end in "/"
+        entry = page_entry("mathnotes/algebra/groups//index.html", "<h1>Groups</h1>")
+        assert entry["output"] == "mathnotes/algebra/groups/index.html"
+        assert file_entries(root, skip={entry["output"]}) == {}
+
+
+def test_manifest_round_trip_and_version_check():
+    with tempfile.TemporaryDirectory() as td:
+        path = Path(td) / "deploy-manifest.json"
+        current = manifest(groups="a")
+        write_manifest(path, current)
+        assert load_manifest(path) == current
+        assert changed_paths(load_manifest(path), current) == []
+
+        path.write_text('{"version": 0, "pages": {}}')
+        assert load_manifest(path) is None
+        assert load_manifest(Path(td) / "missing.json") is None
+
+
+if __name__ == "__main__":
+    test_only_changed_added_and_removed_pages_are_listed()
+    print("PASS: only changed, added and removed pages are listed")
+    test_without_a_previous_manifest_everything_changed()
+    print("PASS: without a previous manifest everything changed")
+    test_published_files_are_diffed_with_the_pages()
+    print("PASS: published files are diffed with the pages")
+    test_content_pages_are_not_listed_as_files()
+    print("PASS: content pages are not listed as files")
+    test_manifest_round_trip_and_version_check()
+    print("PASS: manifest round trip and version check")
@@ -0,0 +1,138 @@
+"""Tests for glyph-usage-driven web font subsetting.
+
+Run standalone (no pytest needed):
+    python3 test/test_font_subset.py
+or inside the dev builder container:
+    docker exec -i -w /app mathnotes-static-builder python3 - < test/test_font_subset.py
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+from pathlib import Path
+
+try:
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+except NameError:
+    pass  # running via stdin; cwd must be the repo/app root
+
+import mathnotes.font_subset as fs
+from mathnotes.font_subset import (
+    collect_codepoints, split_codepoints, subset_web_fonts, unicode_range,
+)
+
+ALPHA, SUM, DOUBLE_STRUCK_R = 0x3B1, 0x2211, 0x211D
+SCRIPT_A = 0x1D49C  # outside the BMP: a surrogate pair in JSON
+
+
+def make_font(path: Path, codepoints):
+    from fontTools.fontBuilder import FontBuilder
+    from fontTools.pens.ttGlyphPen import TTGlyphPen
+
+    names = [".notdef"] + [f"u{cp:04X}" for cp in codepoints]
+    pen = TTGlyphPen(None)
+    pen.moveTo((0, 0))
+    pen.lineTo((0, 500))
+    pen.lineTo((400, 500))
+    pen.closePath()
+    box = pen.glyph()
+    fb = FontBuilder(1000, isTTF=True)
+    fb.setupGlyphOrder(names)
+    fb.setupCharacterMap({cp: f"u{cp:04X}" for cp in codepoints})
+    fb.setupGlyf({name: box for name in names})
+    fb.setupHorizontalMetrics({name: (500, 0) for name in names})
+    fb.setupHorizontalHeader(ascent=800, descent=-200)
+    fb.setupNameTable({"familyName": "Test Math", "styleName": "Regular"})
+    fb.setupOS2()
+    fb.setupPost()
+    fb.save(str(path))
+
+
+def test_codepoints_from_text_entities_and_json_escapes():
+    pages = [
+        "<p>&alpha; &#8721;</p>",
+        '<script>[{"content": "\\ud835\\udc9c"}]</script>',
+        "<mi>α</mi>",
+    ]
+    counts, n_pages = collect_codepoints(pages)
+    assert n_pages == 3
+    assert counts[ALPHA] == 2 and counts[SUM] == 1 and counts[SCRIPT_A] == 1
+    assert 0xD835 not in counts, "surrogates are joined into one code point"
+
+
+def test_split_and_unicode_range():
+    counts, n_pages = collect_codepoints(["α"] * 19 + ["α ∑"])
+    core, rare = split_codepoints(counts, n_pages, core_share=0.1)
+    assert ALPHA in core and ord("A") in core, "ASCII is always core"
+    assert rare == {SUM}
+    assert unicode_range({0x20, 0x21, 0x22, ALPHA, SUM}) == "U+20-22,U+3B1,U+2211"
+
+
+def test_fonts_are_split_and_cached_by_glyph_set():
+    try:
+        import fontTools  # noqa: F401
+    except ImportError:
+        print("SKIP: fontTools not installed")
+        return
+
+    calls = []
+    real_subset = fs._subset_file
+
+    def counting_subset(source, target, codepoints):
+        calls.append((target.name, frozenset(codepoints)))
+        real_subset(source, target, codepoints)
+
+    with tempfile.TemporaryDirectory() as td:
+        old_cache, fs.FONT_CACHE_DIR = fs.FONT_CACHE_DIR, os.path.join(td, "cache")
+        fs._subset_file = counting_subset
+        try:
+            font = Path(td) / "Math.ttf"
+            make_font(font, [*range(0x20, 0x7F), ALPHA, SUM, DOUBLE_STRUCK_R])
+
+            def fresh_dist():
+                """What copy_web_assets leaves behind."""
+                dist = Path(td) / "dist"
+                shutil.rmtree(dist, ignore_errors=True)
+                (dist / "fonts").mkdir(parents=True)
+                shutil.copy(font, dist / "fonts" / "Math.ttf")
+                (dist / "latexblocks.css").write_text(
+                    "@font-face {\n  font-family: 'Test Math';\n"
+                    "  src: url(fonts/Math.ttf) format('truetype');\n}\n"
+                    "math { font-family: 'Test Math'; }\n"
+                )
+                return dist
+
+            pages = ["<mi>α</mi>"] * 30 + ["<mo>∑</mo> and a CJK 漢 the font lacks"]
+            dist = fresh_dist()
+            assert subset_web_fonts(dist, pages)
+            css = (dist / "latexblocks.css").read_text()
+            assert css.count("@font-face") == 2
+            assert "url(fonts/Math.core.ttf)" in css and "url(fonts/Math.rare.ttf)" in css
+            assert "unicode-range: U+2211;" in css, "rare chunk claims only glyphs this font has"
+            assert "U+211D" not in css, "unused glyphs are dropped"
+            from fontTools.ttLib import TTFont
+            core = TTFont(str(dist / "fonts" / "Math.core.ttf"))
+            assert set(core.getBestCmap()) == {*range(0x20, 0x7F), ALPHA}
+            assert len(calls) == 2
+
+            # Same glyphs again: copied from the cache, subsetter not run
+            dist = fresh_dist()
+            assert subset_web_fonts(dist, pages)
+            assert (dist / "fonts" / "Math.rare.ttf").exists() and len(calls) == 2
+
+            # A page starts using a new glyph: a new glyph set
+            assert subset_web_fonts(fresh_dist(), pages + ["ℝ"])
+            assert len(calls) == 4
+        finally:
+            fs.FONT_CACHE_DIR = old_cache
+            fs._subset_file = real_subset
+
+
+if __name__ == "__main__":
+    test_codepoints_from_text_entities_and_json_escapes()
+    print("PASS: code points from text, entities and JSON escapes")
+    test_split_and_unicode_range()
+    print("PASS: split and unicode-range")
+    test_fonts_are_split_and_cached_by_glyph_set()
+    print("PASS: fonts are split and cached by glyph set")
@@ -115,9 +115,7 @@ def test_tex_pages_end_to_end():
         # labels_from_rendered_html pass in page_renderer.render_page).
         assert "gizmo" in a["tooltip_data"]
 
-        from pathlib import Path
-        from mathnotes.navigation import get_page_title
-        assert get_page_title(Path("content/test/page-b.tex")) == "Page B"
+        assert discovery.titles["content/test/page-b.tex"] == "Page B"
 
     in_temp_site(check)
 
@@ -186,9 +184,94 @@ def test_markdown_content_rejected():
     in_temp_site(check)
 
 
+def test_index_and_sidebar_from_catalog():
+    def check(td):
+        os.makedirs("content/test/sub-topic", exist_ok=True)
+        os.makedirs("content/test/.drafts", exist_ok=True)
+        for path, text in [
+            ("content/test/zeta.tex", "\\title{Zeta}\n"),
+            ("content/test/alpha-page.tex", "Untitled.\n"),
+            ("content/test/sub-topic/inner.tex", "\\title{Inner}\n"),
+            ("content/test/.drafts/hidden.tex", "\\title{Hidden}\n"),
+        ]:
+            with open(path, "w") as f:
+                f.write(text)
+
+        from mathnotes.file_utils import get_all_content_for_section
+        from mathnotes.navigation import get_page_navigation
+
+        discovery, _, _ = fresh_pipeline()
+        assert get_all_content_for_section("content/test", discovery) == [
+            {"name": "Alpha Page", "path": "test/alpha-page/", "is_subdir": False},
+            {"name": "Zeta", "path": "test/zeta/", "is_subdir": False},
+            {"name": "Sub Topic", "is_subdir": True, "files": [
+                {"name": "Inner", "path": "test/sub-topic/inner/", "is_subdir": False},
+            ]},
+        ]
+
+        nav = get_page_navigation("content/test/sub-topic/inner.tex", discovery)
+        assert nav["prev_page"] is None and nav["next_page"] is None
+        [section] = nav["tree"]["children"]
+        assert section["name"] == "Test" and section["expanded"]
+        titles = [item.get("title") or item.get("name") for item in section["children"]]
+        assert titles == ["Alpha Page", "Zeta", "Sub Topic"]
+        assert section["children"][2]["children"][0]["is_current"]
+
+        nav = get_page_navigation("content/test/alpha-page.tex", discovery)
+        assert nav["next_page"] == {"url": "/mathnotes/test/zeta/", "title": "Zeta"}
+    in_temp_site(check)
+
+
+def test_incremental_discovery_matches_full_rebuild():
+    def check(td):
+        from mathnotes.content_discovery import ContentDiscovery
+
+        def write(path, text):
+            with open(path, "w") as f:
+                f.write(text)
+
+        def full():
+            fresh = ContentDiscovery()
+            fresh.build_url_mappings()
+            return list(fresh.url_mappings.items()), fresh.titles
+
+        write("content/test/b.tex", "\\title{B}\n")
+        write("content/algebra/z.tex", "\\title{Z}\n")
+        discovery = ContentDiscovery()
+        discovery.build_url_mappings()
+        url_mappings, file_to_canonical = discovery.url_mappings, discovery.file_to_canonical
+
+        write("content/test/a.tex", "\\title{A}\n")
+        write("content/test/b.tex", "\\title{B}\n\\slug{bee}\n")
+        assert discovery.apply_changes(
+            ["content/test/a.tex", "content/test/b.tex", "templates/base.html"]
+        )
+        assert (list(discovery.url_mappings.items()), discovery.titles) == full()
+        assert "test/bee/" in url_mappings, "dicts must be updated in place"
+
+        # rename: old path deleted, new path created
+        os.rename("content/test/a.tex", "content/test/c.tex")
+        assert discovery.apply_changes(["content/test/a.tex", "content/test/c.tex"])
+        assert (list(discovery.url_mappings.items()), discovery.titles) == full()
+        assert "content/test/a.tex" not in file_to_canonical
+
+        assert not discovery.apply_changes(["content/test/c.tex"]), "unchanged file"
+
+        write("content/test/d.tex", "\\title{D}\n\\slug{c}\n")
+        try:
+            discovery.apply_changes(["content/test/d.tex"])
+            assert False, "expected a URL collision"
+        except ValueError as e:
+            assert "URL collision" in str(e)
+        assert "content/test/d.tex" not in file_to_canonical
+        assert file_to_canonical["content/test/c.tex"] == "test/c/"
+    in_temp_site(check)
+
+
 def main():
     tests = [test_tex_pages_end_to_end, test_url_collision_errors, test_markdown_content_rejected,
-             test_referenced_by_panel_renders_math_in_titles]
+             test_referenced_by_panel_renders_math_in_titles, test_index_and_sidebar_from_catalog,
+             test_incremental_discovery_matches_full_rebuild]
     failures = 0
     for t in tests:
         try:
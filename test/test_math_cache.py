@@ -0,0 +1,231 @@
+"""Tests for the site-wide TeX -> MathML memo.
+
+Run standalone (no pytest needed):
+    python3 test/test_math_cache.py
+or inside the dev builder container:
+    docker exec -i -w /app mathnotes-static-builder python3 - < test/test_math_cache.py
+"""
+
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import textwrap
+
+try:
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+except NameError:
+    pass  # running via stdin; cwd must be the repo/app root
+
+from mathnotes.content_fs import MemoryFS, using_content_fs
+from mathnotes.math_cache import MAX_AGE, MathCache, math_spans, normalize
+
+# Speaks the tex2mml worker's JSON-lines protocol; "\bad" is a TeX error.
+# Replies are padded so a batch overflows the pipe unless requests and
+# replies stream concurrently.
+FAKE_WORKER = textwrap.dedent(r"""
+    import json, sys
+    for line in sys.stdin:
+        req = json.loads(line)
+        if "\\bad" in req["latex"]:
+            reply = {"id": req["id"], "error": "Undefined control sequence \\bad"}
+        else:
+            tag = "block" if req["display"] else "inline"
+            mathml = f'<math display="{tag}">{req["latex"]}</math>' + " " * 2000
+            reply = {"id": req["id"], "mathml": mathml}
+        print(json.dumps(reply), flush=True)
+""")
+
+
+class FakeConverter:
+    """The parts of latexblocks' MathConverter the cache relies on."""
+
+    def __init__(self, worker_path, sty_path=None):
+        self.worker_path = worker_path
+        self.sty_path = sty_path
+        self.node_modules_dir = None
+        self._proc = None
+        self._next_id = 0
+        self.spawns = 0
+        self.round_trips = 0
+
+    def _spawn(self):
+        self.spawns += 1
+        self._proc = subprocess.Popen(
+            [sys.executable, self.worker_path],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            text=True,
+            bufsize=1,
+        )
+
+    def convert(self, latex, display, alttext=None):
+        self.round_trips += 1
+        if self._proc is None or self._proc.poll() is not None:
+            self._spawn()
+        self._next_id += 1
+        request = {"id": self._next_id, "latex": latex, "display": display}
+        self._proc.stdin.write(json.dumps(request) + "\n")
+        reply = json.loads(self._proc.stdout.readline())
+        if "error" in reply:
+            raise ValueError(reply["error"])
+        return reply["mathml"]
+
+    def close(self):
+        if self._proc is not None:
+            self._proc.stdin.close()
+            self._proc.wait(timeout=10)
+        self._proc = None
+
+
+def with_converter(fn):
+    def run():
+        with tempfile.TemporaryDirectory() as td:
+            worker = os.path.join(td, "worker.py")
+            sty = os.path.join(td, "macros.sty")
+            with open(worker, "w") as f:
+                f.write(FAKE_WORKER)
+            with open(sty, "w") as f:
+                f.write("\\newcommand{\\R}{\\mathbb{R}}\n")
+            converter = FakeConverter(worker, sty)
+            try:
+                fn(converter, td)
+            finally:
+                converter.close()
+    run.__name__ = fn.__name__
+    return run
+
+
+@with_converter
+def test_each_unique_expression_converts_once(converter, td):
+    cache = MathCache(converter)
+    first = cache.convert("x", False)
+    assert first.startswith('<math display="inline">x</math>')
+    assert cache.convert("x", False) is first
+    assert cache.convert("  x\n", False) is first, "whitespace is normalized away"
+    cache.convert("x", True)
+    cache.convert("x", False, alttext="x")
+    assert converter.round_trips == 3, "display mode and alttext are part of the key"
+    assert cache.hits == 2
+
+    assert normalize("a +\n  b") == "a + b"
+    assert normalize("a % note\n+ b") == "a % note\n+ b", "a comment keeps its line break"
+
+
+@with_converter
+def test_misses_convert_in_one_pipelined_batch(converter, td):
+    cache = MathCache(converter)
+    cache.convert("x_0", False)
+    requests = [(f"x_{i}", False, None) for i in range(300)] + [(r"\bad", False, None)]
+    # 299 new, x_0 already memoized, \bad rejected
+    assert cache.convert_many(requests) == 299
+    assert converter.spawns == 1 and converter.round_trips == 1
+    assert converter._next_id == 301, "batch ids continue the converter's sequence"
+    assert cache.convert("x_299", False).startswith('<math display="inline">x_299</math>')
+    assert converter.round_trips == 1
+
+    try:
+        cache.convert(r"\bad", False)
+        assert False, "a rejected expression still raises when rendered"
+    except ValueError:
+        pass
+    assert cache.convert("y", False).startswith("<math"), "the worker is still in sequence"
+
+
+def test_batches_fall_back_to_single_conversions():
+    """A converter without the internals _pipeline drives converts one request at a time."""
+    class PlainConverter:
+        worker_path = sty_path = node_modules_dir = None
+
+        def convert(self, latex, display, alttext=None):
+            if "\\bad" in latex:
+                raise ValueError(latex)
+            return f"<math>{latex}</math>"
+
+    cache = MathCache(PlainConverter())
+    assert cache.convert_many([("x", False, None), (r"\bad", False, None)]) == 1
+    assert cache.convert("x", False) == "<math>x</math>" and cache.hits == 1
+
+
+@with_converter
+def test_memo_persists_until_macros_change(converter, td):
+    path = os.path.join(td, "cache", "math.bin")
+    cache = MathCache(converter)
+    mathml = cache.convert(r"\R", False)
+    cache.save(path)
+
+    restored = MathCache(converter)
+    assert restored.load(path) and len(restored) == 1
+    assert restored.convert(r"\R", False) == mathml
+    assert converter.round_trips == 1
+
+    # Entries nobody uses age out
+    for _ in range(MAX_AGE + 1):
+        stale = MathCache(converter)
+        stale.load(path)
+        stale.save(path)
+    fresh = MathCache(converter)
+    assert fresh.load(path) and len(fresh) == 0
+
+    restored.save(path)
+    with open(converter.sty_path, "a") as f:
+        f.write("\\newcommand{\\C}{\\mathbb{C}}\n")
+    assert not MathCache(converter).load(path), "another macro package starts empty"
+
+
+@with_converter
+def test_math_still_in_content_never_ages(converter, td):
+    """A long-lived builder reuses unchanged pages without looking their math up again."""
+    path = os.path.join(td, "math.bin")
+    cache = MathCache(converter)
+    with cache._scanning_file("content/a.tex"):
+        cache.convert("a", False)
+    cache.convert("b", False)  # a span the scan missed, converted by the parse
+    with using_content_fs(MemoryFS({"content/a.tex": "$a$"})):
+        for _ in range(MAX_AGE + 2):
+            cache.save(path)
+        assert len(cache) == 1, "only the math no scanned file holds ages out"
+        cache.convert("a", False)
+        assert converter.round_trips == 2
+
+        # a process that doesn't rescan the file still knows what it holds
+        restored = MathCache(converter)
+        assert restored.load(path) and restored.restored
+        for _ in range(MAX_AGE + 2):
+            restored.save(path)
+        assert len(restored) == 1
+    restored.save(path)
+    assert MathCache(converter).load(path) and restored._file_keys == {}, \
+        "a file gone from the content no longer keeps its math"
+
+
+def test_math_spans_from_source():
+    source = (
+        "Let $x \\in \\R$ cost \\$5 % not $math$ here\n"
+        "\\[\n  \\sum_i a_i\n\\]\n"
+        "\\bal a &= b \\eal\n"
+        "$$y$$\n"
+    )
+    spans = math_spans(source, {"bal": "\\[\\begin{aligned}", "eal": "\\end{aligned}\\]"})
+    assert spans == [
+        ("x \\in \\R", False),
+        ("\\sum_i a_i", True),
+        ("\\begin{aligned} a &= b \\end{aligned}", True),
+        ("y", True),
+    ], spans
+
+
+if __name__ == "__main__":
+    test_each_unique_expression_converts_once()
+    print("PASS: each unique expression converts once")
+    test_misses_convert_in_one_pipelined_batch()
+    print("PASS: misses convert in one pipelined batch")
+    test_batches_fall_back_to_single_conversions()
+    print("PASS: batches fall back to single conversions")
+    test_memo_persists_until_macros_change()
+    print("PASS: memo persists until macros change")
+    test_math_still_in_content_never_ages()
+    print("PASS: math still in content never ages")
+    test_math_spans_from_source()
+    print("PASS: math spans from source")
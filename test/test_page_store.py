@@ -0,0 +1,95 @@
+"""Tests for the in-memory page store behind the dev server's memory mode.
+
+Run standalone (no pytest needed):
+    python3 test/test_page_store.py
+or inside the dev builder container:
+    docker exec -i -w /app mathnotes-static-builder python3 - < test/test_page_store.py
+"""
+
+import os
+import sys
+from types import SimpleNamespace
+
+try:
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+except NameError:
+    pass  # running via stdin; cwd must be the repo/app root
+
+from mathnotes.content_fs import MemoryFS, using_content_fs
+from mathnotes.sitegenerator.page_store import PageStore
+
+
+def content_page_output_path():
+    """Where ContentPages writes algebra/groups.tex, as the build spells it."""
+    from mathnotes.content_discovery import ContentDiscovery
+    from mathnotes.sitegenerator.pages import ContentPages
+
+    rendered = {"content": "<p>A group is a set.</p>", "metadata": {}, "tooltip_data": {}}
+    fs = MemoryFS({"content/algebra/groups.tex": "\\title{Groups}\n\nA group is a set.\n"})
+    with using_content_fs(fs):
+        discovery = ContentDiscovery()
+        discovery.build_url_mappings()
+        pages = ContentPages({
+            "url_mapper": discovery,
+            "block_index": SimpleNamespace(index={}),
+            "page_renderer": SimpleNamespace(render_page=lambda path: rendered),
+        })
+        (spec,) = pages.get_specs()
+    return spec.output_path
+
+
+def test_publish_swaps_in_only_changed_pages():
+    store = PageStore()
+    assert store.publish({"index.html": "home", "mathnotes/algebra/groups/index.html": "v1"}) == 2
+    before = store._pages
+
+    assert store.publish({"index.html": "home", "mathnotes/algebra/groups/index.html": "v2"}) == 1
+    assert before["mathnotes/algebra/groups/index.html"] == "v1", (
+        "readers holding the old build keep it"
+    )
+    assert store.get("mathnotes/algebra/groups/") == "v2"
+    assert store.generation == 2
+
+    assert store.publish({"index.html": "home", "mathnotes/algebra/groups/index.html": "v2"}) == 0
+    assert store.generation == 2 and store.published
+
+
+def test_publish_drops_removed_pages_but_update_keeps_them():
+    store = PageStore()
+    store.publish({"index.html": "home", "mathnotes/a/index.html": "a"})
+    assert store.update({"mathnotes/b/index.html": "b"}) == 1
+    assert store.get("mathnotes/a") == "a" and store.get("/mathnotes/b/") == "b"
+    assert store.publish({"index.html": "home"}) == 2
+    assert store.get("mathnotes/a/") is None and len(store) == 1
+
+
+def test_lookup_by_request_path():
+    store = PageStore()
+    store.publish({"index.html": "home", "sitemap.xml": "<urlset/>", "404.html": "missing"})
+    assert store.get("") == "home"
+    assert store.get("index.html") == "home"
+    assert store.get("sitemap.xml") == "<urlset/>"
+    assert store.get("404.html") == "missing"
+    assert store.get("static/dist/main.css") is None
+
+
+def test_content_pages_are_found_by_url():
+    output_path = content_page_output_path()
+    store = PageStore()
+    store.publish({"index.html": "home", output_path: "groups"})
+    assert store.get("mathnotes/algebra/groups/") == "groups"
+    assert store.get("/mathnotes/algebra/groups") == "groups"
+    assert store.update({output_path: "groups, edited"}) == 1 and len(store) == 2
+    assert store.get("mathnotes/algebra/groups/") == "groups, edited"
+    assert store.publish({"index.html": "home", output_path: "groups, edited"}) == 0
+
+
+if __name__ == "__main__":
+    test_publish_swaps_in_only_changed_pages()
+    print("PASS: publish swaps in only changed pages")
+    test_publish_drops_removed_pages_but_update_keeps_them()
+    print("PASS: publish drops removed pages, update keeps them")
+    test_lookup_by_request_path()
+    print("PASS: lookup by request path")
+    test_content_pages_are_found_by_url()
+    print("PASS: content pages are found by url")
@@ -0,0 +1,92 @@
+"""Tests for the shared reverse-reference closure used by the block index pages.
+
+Run standalone (no pytest needed):
+    python3 test/test_reference_graph.py
+or inside the dev builder container:
+    docker exec -i -w /app mathnotes-static-builder python3 - < test/test_reference_graph.py
+"""
+
+import os
+import sys
+from types import SimpleNamespace
+
+try:
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+except NameError:
+    pass  # running via stdin; cwd must be the repo/app root
+
+from mathnotes.reference_graph import ReferenceGraph
+
+
+def fake_index(edges, page_refs=()):
+    """edges: (referenced, referrer) block label pairs; page_refs: labels
+    referenced from page prose (no source block)."""
+    labels = sorted({label for edge in edges for label in edge})
+    index = {
+        label: SimpleNamespace(block=SimpleNamespace(label=label, title=label.title()))
+        for label in labels
+    }
+    # a synonym key pointing at an existing block must not add a node
+    index["alias-of-a"] = index["a"]
+
+    direct = {label: [] for label in labels}
+    for referenced, referrer in edges:
+        direct[referenced].append(SimpleNamespace(source_label=referrer))
+    for label in page_refs:
+        direct[label].append(SimpleNamespace(source_label=None))
+
+    reverse_index = SimpleNamespace(
+        get_references_for_label=lambda label: SimpleNamespace(direct_references=direct[label])
+    )
+    return SimpleNamespace(index=index, reverse_index=reverse_index)
+
+
+def labels_by_depth(transitive):
+    return {depth: sorted(r.block.label for r in refs) for depth, refs in transitive.items()}
+
+
+def test_transitive_referrers_are_grouped_by_shortest_depth():
+    # c -> b -> a, d -> c, and d -> a directly
+    graph = ReferenceGraph(fake_index([("a", "b"), ("b", "c"), ("c", "d"), ("a", "d")]),
+                           max_depth=3)
+    direct, transitive = graph.references_for("a")
+    assert sorted(r.source_label for r in direct) == ["b", "d"]
+    # d is already direct, so only c is new at depth 2, and nothing at 3
+    assert labels_by_depth(transitive) == {2: ["c"]}
+
+    direct, transitive = graph.references_for("b")
+    assert labels_by_depth(transitive) == {2: ["d"]}
+
+
+def test_cycles_and_page_references_do_not_leak_into_closure():
+    graph = ReferenceGraph(fake_index([("a", "b"), ("b", "a")], page_refs=["a"]), max_depth=2)
+    direct, transitive = graph.references_for("a")
+    assert len(direct) == 2, "page-level references stay in the direct list"
+    assert transitive == {}, "a block never transitively references itself"
+
+
+def test_unknown_label_and_invalidate():
+    index = fake_index([("a", "b")])
+    graph = ReferenceGraph(index, max_depth=2)
+    assert graph.references_for("missing") == ([], {})
+
+    index.index["c"] = SimpleNamespace(block=SimpleNamespace(label="c", title="C"))
+    assert graph.references_for("c") == ([], {}), "compiled graph is reused until invalidated"
+    graph.invalidate()
+    old_lookup = index.reverse_index.get_references_for_label
+    index.reverse_index.get_references_for_label = lambda label: (
+        SimpleNamespace(direct_references=[SimpleNamespace(source_label="a")])
+        if label == "c" else old_lookup(label)
+    )
+    direct, transitive = graph.references_for("c")
+    assert [r.source_label for r in direct] == ["a"]
+    assert labels_by_depth(transitive) == {2: ["b"]}
+
+
+if __name__ == "__main__":
+    test_transitive_referrers_are_grouped_by_shortest_depth()
+    print("PASS: transitive referrers are grouped by shortest depth")
+    test_cycles_and_page_references_do_not_leak_into_closure()
+    print("PASS: cycles and page references do not leak into closure")
+    test_unknown_label_and_invalidate()
+    print("PASS: unknown label and invalidate")
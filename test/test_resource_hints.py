@@ -0,0 +1,117 @@
+"""Tests for build-time prefetch/preload hints on content pages.
+
+Run standalone (no pytest needed):
+    python3 test/test_resource_hints.py
+or inside the dev builder container:
+    docker exec -i -w /app mathnotes-static-builder python3 - < test/test_resource_hints.py
+"""
+
+import os
+import sys
+import tempfile
+from collections import Counter
+from types import SimpleNamespace
+
+try:
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+except NameError:
+    pass  # running via stdin; cwd must be the repo/app root
+
+from mathnotes.content_fs import MemoryFS, using_content_fs
+from mathnotes.resource_hints import (
+    PAGE_OVERHEAD_BYTES,
+    estimated_page_size,
+    page_resource_hints,
+    referenced_pages,
+)
+
+GROUPS = "/mathnotes/algebra/groups/"
+RINGS = "/mathnotes/algebra/rings/"
+FIELDS = "/mathnotes/algebra/fields/"
+SETS = "/mathnotes/foundations/sets/"
+NAVIGATION = {
+    "prev_page": {"url": SETS, "title": "Sets"},
+    "next_page": {"url": RINGS, "title": "Rings"},
+}
+
+
+def test_referenced_pages_counts_other_pages_only():
+    index = {
+        "def:ring": SimpleNamespace(full_url=f"{RINGS}#def:ring"),
+        "thm:ring-ideal": SimpleNamespace(full_url=f"{RINGS}#thm:ring-ideal"),
+        "def:field": SimpleNamespace(full_url=f"{FIELDS}#def:field"),
+        "def:group": SimpleNamespace(full_url=f"{GROUPS}#def:group"),
+    }
+    block_index = SimpleNamespace(index=index)
+    labels = ["def:ring", "thm:ring-ideal", "def:field", "def:group", "missing"]
+    counts = referenced_pages(labels, block_index, GROUPS)
+    assert counts == Counter({RINGS: 2, FIELDS: 1})
+
+
+def test_hints_are_ranked_and_deduplicated():
+    sizes = {RINGS: 100, FIELDS: 100, SETS: 100}
+    references = Counter({FIELDS: 3, RINGS: 1})
+    hints = page_resource_hints(
+        GROUPS, "<p>no figures</p>", NAVIGATION, references, sizes, budget=10_000
+    )
+    assert [h["href"] for h in hints] == [RINGS, FIELDS, SETS]
+    assert all(h["rel"] == "prefetch" and h["as"] == "document" for h in hints)
+
+
+def test_budget_skips_hints_that_do_not_fit():
+    sizes = {RINGS: 5000, FIELDS: 800, SETS: 300}
+    hints = page_resource_hints(GROUPS, "", NAVIGATION, Counter({FIELDS: 1}), sizes, budget=1200)
+    assert [h["href"] for h in hints] == [FIELDS, SETS], "the next page alone is over budget"
+    assert page_resource_hints(GROUPS, "", NAVIGATION, Counter(), sizes, budget=0) == []
+
+
+def test_first_content_image_is_preloaded():
+    old_cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as td:
+        os.chdir(td)
+        try:
+            os.makedirs("content/algebra")
+            with open("content/algebra/cayley.png", "wb") as f:
+                f.write(b"\0" * 400)
+            content = (
+                '<p><img alt="Cayley graph" src="/mathnotes/algebra/cayley.png"></p>'
+                '<img src="/mathnotes/algebra/missing.png">'
+            )
+            hints = page_resource_hints(
+                GROUPS, content, NAVIGATION, Counter(), {RINGS: 100}, budget=1000
+            )
+        finally:
+            os.chdir(old_cwd)
+    assert hints[0] == {"rel": "preload", "href": "/mathnotes/algebra/cayley.png", "as": "image"}
+    assert [h["href"] for h in hints[1:]] == [RINGS]
+
+
+def test_image_sizes_come_from_the_content_fs():
+    content = '<img src="/mathnotes/algebra/cayley.png">'
+    with using_content_fs(MemoryFS({"content/algebra/cayley.png": "x" * 950})):
+        hints = page_resource_hints(
+            GROUPS, content, NAVIGATION, Counter(), {RINGS: 100}, budget=1000
+        )
+    assert [h["href"] for h in hints] == ["/mathnotes/algebra/cayley.png"], (
+        "no room for the next page"
+    )
+
+
+def test_page_size_is_estimated_without_rendering():
+    size = estimated_page_size("<p>é</p>", '[{"label": "def:group"}]')
+    assert size == len("<p>é</p>".encode("utf-8")) + 24 + PAGE_OVERHEAD_BYTES
+
+
+if __name__ == "__main__":
+    test_referenced_pages_counts_other_pages_only()
+    print("PASS: referenced pages counts other pages only")
+    test_hints_are_ranked_and_deduplicated()
+    print("PASS: hints are ranked and deduplicated")
+    test_budget_skips_hints_that_do_not_fit()
+    print("PASS: budget skips hints that do not fit")
+    test_first_content_image_is_preloaded()
+    print("PASS: first content image is preloaded")
+    test_image_sizes_come_from_the_content_fs()
+    print("PASS: image sizes come from the content fs")
+    test_page_size_is_estimated_without_rendering()
+    print("PASS: page size is estimated without rendering")
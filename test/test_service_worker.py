@@ -0,0 +1,100 @@
+"""Tests for the service worker's precache manifest.
+
+Run standalone (no pytest needed):
+    python3 test/test_service_worker.py
+or inside the dev builder container:
+    docker exec -i -w /app mathnotes-static-builder python3 - < test/test_service_worker.py
+"""
+
+import json
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+try:
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+except NameError:
+    pass  # running via stdin; cwd must be the repo/app root
+
+from mathnotes.deploy_manifest import build_manifest, page_entry
+from mathnotes.service_worker import precache_manifest, write_service_worker
+
+
+class FakeGenerator:
+    def render_template(self, name, **context):
+        return f"{name} {context['revision']} {context['manifest_url']}"
+
+
+def make_build(td, groups_html="<h1>Groups</h1>"):
+    out = Path(td)
+    dist = out / "static" / "dist"
+    dist.mkdir(parents=True, exist_ok=True)
+    (dist / "manifest.json").write_text(
+        json.dumps({"main.css": "main-AB12.css", "main.js": "main-CD34.js"})
+    )
+    (dist / "latexblocks.css").write_text(".math-block {}")
+    deploy = build_manifest({
+        "/": page_entry("index.html", "home"),
+        "/mathnotes/algebra/groups/": page_entry(
+            "mathnotes/algebra/groups/index.html", groups_html
+        ),
+        "/sitemap.xml": page_entry("sitemap.xml", "<urlset/>"),
+    }, "https://lacunary.org")
+    return out, deploy
+
+
+def test_manifest_lists_assets_core_pages_and_page_revisions():
+    with tempfile.TemporaryDirectory() as td:
+        out, deploy = make_build(td)
+        manifest = precache_manifest(out, deploy, core_pages=["/", "/mathnotes/"])
+
+        urls = [entry["url"] for entry in manifest["precache"]]
+        assert urls == [
+            "/static/dist/main-AB12.css",
+            "/static/dist/main-CD34.js",
+            "/static/dist/latexblocks.css",
+        ]
+        assert manifest["precache"][0]["revision"] is None, "hashed filenames need no revision"
+        assert manifest["precache"][2]["revision"]
+        assert manifest["core_pages"] == ["/"], "core pages this build didn't produce are skipped"
+        assert sorted(manifest["pages"]) == ["/", "/mathnotes/algebra/groups/"], "only HTML pages"
+        assert manifest["pages"]["/"] == deploy["pages"]["/"]["sha256"][:16]
+
+
+def test_demo_chunks_are_left_to_the_pages_using_them():
+    with tempfile.TemporaryDirectory() as td:
+        out, deploy = make_build(td)
+        dist = out / "static" / "dist"
+        (dist / "manifest.json").write_text(
+            json.dumps({"main.js": "main-CD34.js", "pendulum.js": "pendulum-EF56.js"})
+        )
+        (dist / "demo-manifest.json").write_text(json.dumps({
+            "main": {"file": "main-CD34.js", "imports": []},
+            "demos": {"pendulum": {"file": "pendulum-EF56.js", "imports": []}},
+            "bytes": {"main-CD34.js": 100, "pendulum-EF56.js": 50},
+        }))
+        urls = [entry["url"] for entry in precache_manifest(out, deploy)["precache"]]
+        assert urls == ["/static/dist/main-CD34.js", "/static/dist/latexblocks.css"]
+
+
+def test_revision_follows_page_changes():
+    with tempfile.TemporaryDirectory() as td:
+        out, deploy = make_build(td)
+        first = write_service_worker(out, FakeGenerator(), deploy)
+        assert (out / "sw.js").read_text() == f"sw.js {first['revision']} /sw-manifest.json"
+        assert json.loads((out / "sw-manifest.json").read_text()) == first
+
+        _, same = make_build(td)
+        assert precache_manifest(out, same)["revision"] == first["revision"]
+        _, edited = make_build(td, groups_html="<h1>Groups!</h1>")
+        assert precache_manifest(out, edited)["revision"] != first["revision"]
+
+
+if __name__ == "__main__":
+    test_manifest_lists_assets_core_pages_and_page_revisions()
+    print("PASS: manifest lists assets, core pages and page revisions")
+    test_demo_chunks_are_left_to_the_pages_using_them()
+    print("PASS: demo chunks are left to the pages using them")
+    test_revision_follows_page_changes()
+    print("PASS: revision follows page changes")
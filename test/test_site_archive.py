@@ -0,0 +1,142 @@
+"""Tests for the single-file site archive: the builder's writer and the
+server's memory-mapped reader must agree on the layout.
+
+Run standalone (no pytest needed):
+    python3 test/test_site_archive.py
+or inside the dev builder container:
+    docker exec -i -w /app mathnotes-static-builder python3 - < test/test_site_archive.py
+"""
+
+import gzip
+import os
+import sys
+import tempfile
+from pathlib import Path
+from types import SimpleNamespace
+
+_root = os.getcwd()  # running via stdin; cwd must be the repo/app root
+try:
+    _root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+except NameError:
+    pass
+sys.path.insert(0, _root)
+sys.path.insert(0, os.path.join(_root, "server"))
+
+from mathnotes.content_fs import MemoryFS, using_content_fs  # noqa: E402
+from mathnotes.sitegenerator.archive import ArchiveWriter  # noqa: E402
+from site_archive import SiteArchive, open_archive  # noqa: E402
+
+PAGE = (
+    "<html><body>"
+    + "<p>A group is a set with an associative operation.</p>" * 40
+    + "</body></html>"
+).encode()
+
+
+def content_page_output_path():
+    """Where ContentPages writes algebra/groups.tex, as the build spells it."""
+    from mathnotes.content_discovery import ContentDiscovery
+    from mathnotes.sitegenerator.pages import ContentPages
+
+    rendered = {"content": "<p>A group is a set.</p>", "metadata": {}, "tooltip_data": {}}
+    fs = MemoryFS({"content/algebra/groups.tex": "\\title{Groups}\n\nA group is a set.\n"})
+    with using_content_fs(fs):
+        discovery = ContentDiscovery()
+        discovery.build_url_mappings()
+        pages = ContentPages({
+            "url_mapper": discovery,
+            "block_index": SimpleNamespace(index={}),
+            "page_renderer": SimpleNamespace(render_page=lambda path: rendered),
+        })
+        (spec,) = pages.get_specs()
+    return spec.output_path
+
+
+def test_round_trip_with_precompressed_pages():
+    with tempfile.TemporaryDirectory() as td:
+        writer = ArchiveWriter(Path(td) / "site.mnsite")
+        writer.add("index.html", b"home")
+        writer.add("mathnotes/algebra/groups/index.html", PAGE)
+        writer.add("static/dist/fonts/main.woff2", PAGE)  # not compressible by type
+        writer.close()
+        assert len(writer) == 3 and writer.size == 4 + 2 * len(PAGE)
+
+        archive = SiteArchive(writer.path)
+        assert archive.find("") == "index.html"
+        groups = "mathnotes/algebra/groups/index.html"
+        assert archive.find("/mathnotes/algebra/groups/") == groups
+        assert archive.find("mathnotes/algebra/groups/index.html") == groups
+        assert archive.find("mathnotes/algebra/rings/") is None
+
+        assert archive.read("index.html", gzip_ok=True) == (b"home", False), (
+            "too small to compress"
+        )
+        body, is_gzip = archive.read("mathnotes/algebra/groups/index.html", gzip_ok=True)
+        assert is_gzip and gzip.decompress(body) == PAGE
+        assert isinstance(body, memoryview), "bodies are views into the map, not copies"
+        assert archive.read("mathnotes/algebra/groups/index.html") == (PAGE, False)
+        assert archive.read("static/dist/fonts/main.woff2", gzip_ok=True) == (PAGE, False)
+
+
+def test_tree_import_and_overwrites():
+    with tempfile.TemporaryDirectory() as td:
+        tree = Path(td) / "assets"
+        (tree / "static" / "dist").mkdir(parents=True)
+        (tree / "static" / "dist" / "main.css").write_text("body{}")
+        (tree / "index.html").write_text("from the tree")
+
+        writer = ArchiveWriter(Path(td) / "site.mnsite", compress=False)
+        writer.add("index.html", b"rendered")
+        writer.add_tree(tree)
+        writer.close()
+
+        archive = SiteArchive(writer.path)
+        assert sorted(archive.index) == ["index.html", "static/dist/main.css"]
+        assert archive.read("index.html")[0] == b"from the tree", "a later add wins"
+        assert writer.size == len(b"from the tree") + len(b"body{}")
+
+
+def test_content_pages_are_found_by_url():
+    with tempfile.TemporaryDirectory() as td:
+        writer = ArchiveWriter(Path(td) / "site.mnsite")
+        writer.add(content_page_output_path(), PAGE)
+        writer.close()
+
+        archive = SiteArchive(writer.path)
+        assert list(archive.index) == ["mathnotes/algebra/groups/index.html"]
+        assert list(writer.digests) == list(archive.index)
+        assert archive.find("/mathnotes/algebra/groups/") == "mathnotes/algebra/groups/index.html"
+        assert archive.find("mathnotes//algebra/groups") == "mathnotes/algebra/groups/index.html"
+
+
+def test_replaced_archive_is_remapped():
+    with tempfile.TemporaryDirectory() as td:
+        path = Path(td) / "site.mnsite"
+        for version in (b"v1", b"v2"):
+            tmp = ArchiveWriter(Path(td) / "site.mnsite.tmp")
+            tmp.add("index.html", version)
+            tmp.close()
+            os.replace(tmp.path, path)
+            archive = open_archive(path)
+            assert archive.read("index.html")[0] == version
+
+
+def test_aborted_archive_is_removed():
+    with tempfile.TemporaryDirectory() as td:
+        writer = ArchiveWriter(Path(td) / "site.mnsite.tmp")
+        writer.add("index.html", b"half")
+        writer.abort()
+        assert not writer.path.exists()
+
+
+if __name__ == "__main__":
+    test_round_trip_with_precompressed_pages()
+    print("PASS: round trip with precompressed pages")
+    test_tree_import_and_overwrites()
+    print("PASS: tree import and overwrites")
+    test_content_pages_are_found_by_url()
+    print("PASS: content pages are found by url")
+    test_replaced_archive_is_remapped()
+    print("PASS: replaced archive is remapped")
+    test_aborted_archive_is_removed()
+    print("PASS: aborted archive is removed")
@@ -0,0 +1,58 @@
+"""Tests for template dependency tracking in the static site generator.
+
+Run standalone (no pytest needed):
+    python3 test/test_template_dependencies.py
+or inside the dev builder container:
+    docker exec -i -w /app mathnotes-static-builder python3 - < test/test_template_dependencies.py
+"""
+
+import os
+import sys
+import tempfile
+
+try:
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+except NameError:
+    pass  # running via stdin; cwd must be the repo/app root
+
+from mathnotes.sitegenerator.core import StaticSiteGenerator
+
+TEMPLATES = {
+    "base.html": "{% include 'nav.html' %}{% block content %}{% endblock %}",
+    "nav.html": "<nav></nav>",
+    "macros.html": "{% macro cite(x) %}[{{ x }}]{% endmacro %}",
+    "page.html": "{% extends 'base.html' %}{% block content %}{{ body }}{% endblock %}",
+    "bibliography.html": ("{% extends 'base.html' %}{% from 'macros.html' import cite %}"
+                          "{% block content %}{{ cite(1) }}{% endblock %}"),
+    "dynamic.html": "{% include which %}",
+}
+
+
+def make_generator(td):
+    for name, source in TEMPLATES.items():
+        with open(os.path.join(td, name), "w") as f:
+            f.write(source)
+    return StaticSiteGenerator(template_dir=td, output_dir=os.path.join(td, "out"))
+
+
+def test_dependencies_follow_extends_include_and_import():
+    with tempfile.TemporaryDirectory() as td:
+        generator = make_generator(td)
+        assert generator.template_dependencies("page.html") == {"page.html", "base.html", "nav.html"}
+        assert generator.template_dependencies("bibliography.html") == {
+            "bibliography.html", "base.html", "nav.html", "macros.html"}
+        assert "macros.html" not in generator.template_dependencies("page.html"), \
+            "editing bibliography-only macros must not touch content pages"
+
+
+def test_dynamic_references_depend_on_everything():
+    with tempfile.TemporaryDirectory() as td:
+        generator = make_generator(td)
+        assert generator.template_dependencies("dynamic.html") == set(TEMPLATES)
+
+
+if __name__ == "__main__":
+    test_dependencies_follow_extends_include_and_import()
+    print("PASS: dependencies follow extends, include and import")
+    test_dynamic_references_depend_on_everything()
+    print("PASS: dynamic references depend on everything")
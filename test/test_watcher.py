@@ -24,7 +24,7 @@ for _root in _candidates:
         break
 
 from watch_and_build import (
-    requires_restart, should_ignore, snapshot_then_build, initial_build_with_retry,
+    requires_restart, should_ignore, initial_build_with_retry,
 )
 
 
@@ -65,39 +65,6 @@ def test_generated_notation_sty_is_ignored():
     assert not should_ignore("latex/mathnotes.sty")
 
 
-def test_changes_landing_during_a_build_surface_afterward():
-    """The snapshot must be taken BEFORE the build: a file that changes
-    while the build runs has to show up as a diff on the next poll (at
-    worst one redundant rebuild) instead of being absorbed into a
-    post-build snapshot and lost."""
-    import tempfile
-    import time
-    import watch_and_build as wb
-
-    with tempfile.TemporaryDirectory() as td:
-        f = os.path.join(td, "page.tex")
-        with open(f, "w") as fh:
-            fh.write("v1")
-
-        orig_dirs, orig_build = wb.CONTENT_DIRS, wb.build_site
-
-        def build_that_races(output_dir, builder=None):
-            # a change lands while the build is running
-            future = time.time() + 5
-            os.utime(f, (future, future))
-            return "fake-builder"
-
-        wb.CONTENT_DIRS = [td]
-        wb.build_site = build_that_races
-        try:
-            builder, snapshot = wb.snapshot_then_build("/tmp/unused")
-            assert builder == "fake-builder"
-            changed = wb.find_changes(snapshot, wb.get_mtimes(wb.CONTENT_DIRS))
-            assert f in changed, "mid-build change was swallowed by the snapshot"
-        finally:
-            wb.CONTENT_DIRS, wb.build_site = orig_dirs, orig_build
-
-
 def test_startup_snapshot_precedes_heavy_imports():
     """The watcher's baseline snapshot must be captured before the
     mathnotes imports load build code: a .py file replaced while those
@@ -130,7 +97,7 @@ def test_failed_initial_build_reexecs_when_python_changed_since_startup():
     def fake_reexec():
         raise Reexeced
 
-    def failing_build(output_dir, builder=None):
+    def failing_build(output_dir, builder=None, changed=None):
         raise RuntimeError("boom")
 
     with tempfile.TemporaryDirectory() as td:
@@ -155,6 +122,50 @@ def test_failed_initial_build_reexecs_when_python_changed_since_startup():
             wb.CONTENT_DIRS, wb.build_site, wb.STARTUP_MTIMES, wb._reexec = orig
 
 
+def test_build_worker_can_be_superseded():
+    """A newer change cancels the in-flight build; the worker reports it as
+    cancelled (not failed) and keeps its changes for the next build."""
+    import watch_and_build as wb
+
+    started = wb.threading.Event()
+
+    def slow_build(output_dir, builder=None, changed=None, cancel=None):
+        started.set()
+        assert cancel.wait(5), "build was never cancelled"
+        raise wb.BuildCancelled()
+
+    orig = wb.build_site
+    wb.build_site = slow_build
+    try:
+        worker = wb.BuildWorker("/tmp/unused", "builder", ["content/test/a.tex"])
+        worker.start()
+        assert started.wait(5)
+        worker.cancel.set()
+        worker.join(5)
+        assert not worker.is_alive()
+        assert worker.cancelled and worker.error is None
+        assert worker.builder == "builder" and worker.changes == ["content/test/a.tex"]
+    finally:
+        wb.build_site = orig
+
+
+def test_only_page_edits_skip_disk_in_memory_mode():
+    """In-memory mode renders .tex and template edits straight into the page
+    store; deletions, images and asset bundles still need a disk build."""
+    import tempfile
+    import watch_and_build as wb
+
+    with tempfile.TemporaryDirectory() as td:
+        tex = os.path.join(td, "groups.tex")
+        with open(tex, "w") as fh:
+            fh.write("v1")
+        assert wb.renders_in_memory([tex, "templates/page.html"])
+        assert not wb.renders_in_memory([os.path.join(td, "deleted.tex")])
+        assert not wb.renders_in_memory([tex, "content/algebra/figure.png"])
+        assert not wb.renders_in_memory(["(JS/CSS rebuild)"])
+        assert not wb.renders_in_memory([])
+
+
 if __name__ == "__main__":
     test_python_source_changes_require_restart()
     print("PASS: python source changes require restart")
@@ -168,9 +179,11 @@ if __name__ == "__main__":
     print("PASS: latex dir is watched")
     test_generated_notation_sty_is_ignored()
     print("PASS: generated notation sty is ignored")
-    test_changes_landing_during_a_build_surface_afterward()
-    print("PASS: mid-build changes surface after the build")
     test_startup_snapshot_precedes_heavy_imports()
     print("PASS: startup snapshot precedes heavy imports")
     test_failed_initial_build_reexecs_when_python_changed_since_startup()
     print("PASS: failed initial build re-execs on stale python")
+    test_build_worker_can_be_superseded()
+    print("PASS: build worker can be superseded")
+    test_only_page_edits_skip_disk_in_memory_mode()
+    print("PASS: only page edits skip disk in memory mode")